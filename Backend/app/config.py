@@ -9,14 +9,139 @@ load_dotenv(dotenv_path=env_path)
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None  # derived from DATABASE_URL when unset
+
+    # Connection pools (API role; the worker role has its own smaller pool)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    WORKER_DB_POOL_SIZE: int = 2
+    WORKER_DB_MAX_OVERFLOW: int = 2
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+
     REDIS_URL: str | None = None
     S3_ENDPOINT: str | None = None
     S3_BUCKET: str | None = None
     S3_ACCESS_KEY: str | None = None
     S3_SECRET_KEY: str | None = None
+    S3_PUBLIC_ENDPOINT: str | None = None  # host clients use for presigned URLs
+    S3_REGION: str = "us-east-1"
     OPENAI_API_KEY: str | None = None
     GEMINI_API_KEY: str | None = None
 
+    # LLM HTTP client pooling
+    GEMINI_TIMEOUT_SECONDS: float = 30.0
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+
+    # LLM provider base URLs (point both at a local fake provider for failure testing)
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com/v1beta"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
+
+    # LLM provider protection: token bucket per provider + API key (shared via Redis;
+    # rps <= 0 disables), jittered exponential retries, circuit breaker per provider
+    GEMINI_RATE_LIMIT_RPS: float = 2.0
+    GEMINI_RATE_LIMIT_BURST: int = 10
+    OPENAI_RATE_LIMIT_RPS: float = 5.0
+    OPENAI_RATE_LIMIT_BURST: int = 20
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0
+    LLM_RETRY_MAX_ATTEMPTS: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 20.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_WINDOW_SECONDS: float = 30.0
+    LLM_BREAKER_OPEN_SECONDS: float = 30.0
+    LLM_BREAKER_SLOW_CALL_SECONDS: float = 20.0
+
+    # Hedged requests (opt-in): once Gemini is slower than its recent p95 (clamped),
+    # the same request goes to OpenAI too and the first answer wins. A hedge only
+    # fires if both calls' estimated cost fits LLM_HEDGE_MAX_COST_USD.
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_WINDOW: int = 200
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_INITIAL_DELAY_SECONDS: float = 8.0
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 0.5
+    LLM_HEDGE_MAX_DELAY_SECONDS: float = 15.0
+    LLM_HEDGE_MAX_COST_USD: float = 0.05
+    GEMINI_COST_PER_1K_TOKENS: float = 0.01
+    OPENAI_COST_PER_1K_TOKENS: float = 0.0006
+
+    # LLM response cache (in-process LRU + shared Redis tier)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: float = 86400.0
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_MAX_VALUE_BYTES: int = 1_000_000
+    LLM_CACHE_LOCK_TTL_SECONDS: float = 60.0
+    LLM_CACHE_LOCK_WAIT_SECONDS: float = 60.0
+    LLM_CACHE_POLL_INTERVAL_SECONDS: float = 0.05
+
+    # Streaming generation: how often partial output is persisted to the node
+    STREAM_FLUSH_INTERVAL_SECONDS: float = 0.5
+
+    # Branch DAG executor: max nodes calling the LLM at once
+    DAG_MAX_CONCURRENCY: int = 4
+
+    # Content-addressed blob store for node outputs ('filesystem' or 's3')
+    BLOB_BACKEND: str = "filesystem"
+    BLOB_ROOT: str = "blobs"
+    BLOB_COMPRESSION_LEVEL: int = 6
+
+    # Delta-compressed packfiles of project history
+    PACK_ROOT: str = "packs"
+
+    # List endpoints: keyset page sizes and NDJSON server-side cursor batch
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 1000
+    STREAM_BATCH_SIZE: int = 500
+
+    # Artifact uploads: streamed multipart to S3/MinIO with a per-upload size cap
+    ARTIFACT_MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024 * 1024
+    ARTIFACT_PART_SIZE_BYTES: int = 8 * 1024 * 1024
+    ARTIFACT_UPLOAD_CONCURRENCY: int = 4
+    ARTIFACT_PRESIGN_EXPIRES_SECONDS: int = 3600
+
+    # Artifact downloads: on-disk LRU of S3 objects (larger objects stream from S3)
+    ARTIFACT_CACHE_DIR: str = "artifact_cache"
+    ARTIFACT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    ARTIFACT_CACHE_MAX_OBJECT_BYTES: int = 256 * 1024 * 1024
+
+    # S3/MinIO: one pooled client per process (utils.storage)
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_MAX_ATTEMPTS: int = 5
+    S3_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    S3_READ_TIMEOUT_SECONDS: float = 60.0
+
+    # Node responses up to this size are stored inline (compressed); larger ones as blobs
+    RESPONSE_INLINE_MAX_BYTES: int = 4096
+
+    # Full-text search (Postgres text search config; text indexed per field)
+    SEARCH_LANGUAGE: str = "english"
+    SEARCH_MAX_DOCUMENT_CHARS: int = 100_000
+
+    # Semantic similarity: embedder ('module:factory', default hashing) + mmap vector index
+    SIMILARITY_ENABLED: bool = True
+    EMBEDDING_FUNCTION: str | None = None
+    EMBEDDING_DIM: int = 256
+    VECTOR_INDEX_ROOT: str = "vector_index"
+    VECTOR_SEARCH_NPROBE: int = 16
+    # Replaced vectors leave tombstones; compact once they are this share of the rows
+    VECTOR_COMPACT_TOMBSTONE_RATIO: float = 0.25
+    VECTOR_COMPACT_MIN_TOMBSTONES: int = 10_000
+
+    # Conversation context: lineage packed into a token budget (recent steps verbatim,
+    # older ones as cached summaries written by 'llm' or 'extractive')
+    CONTEXT_MAX_TOKENS: int = 6000
+    CONTEXT_RECENT_STEPS: int = 4
+    CONTEXT_VERBATIM_SHARE: float = 0.75
+    CONTEXT_SUMMARY_MAX_TOKENS: int = 120
+    CONTEXT_SUMMARIZER: str = "llm"
+
     class Config:
         env_file = env_path
         extra = "ignore"
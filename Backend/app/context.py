@@ -0,0 +1,249 @@
+# ---------------------------------------------------------
+# 🧵 Token-Budgeted Conversation Context
+# ---------------------------------------------------------
+# A step is sent to the LLM with the history of its lineage (root → parent),
+# packed into CONTEXT_MAX_TOKENS:
+#   newest steps          → verbatim prompt + response (CONTEXT_RECENT_STEPS)
+#   older steps           → short summaries, cached on `nodes.summary`
+#   beyond the budget     → dropped, with a note saying how many
+# A summary is computed once per response (writing a node's response clears
+# it, see app.responses), so prompt size — and per-call latency and cost —
+# stays flat however deep a branch grows.
+import asyncio
+from sqlalchemy import bindparam, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.responses import read_response
+from Backend.app.tree import lineage_query
+from Backend.utils.llm_router import acall_chat_completion, run_sync
+
+# Rule-of-thumb tokenizer: ~4 characters per token for English text and code
+CHARS_PER_TOKEN = 4
+SUMMARY_SOURCE_MAX_TOKENS = 8000
+
+SUMMARY_SYSTEM_PROMPT = "You condense reasoning steps into brief notes for later steps."
+SUMMARY_PROMPT = (
+    "Summarize this reasoning step in at most {words} words. Keep decisions, "
+    "results and facts later steps may rely on; drop everything else.\n\n{step}"
+)
+
+
+def count_tokens(text: str | None) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clip_tokens(text: str, max_tokens: int) -> str:
+    """Shortens `text` to about `max_tokens`, keeping its beginning and end."""
+    limit = max(0, max_tokens) * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    half = max(0, limit // 2 - 1)
+    return f"{text[:half]}\n…\n{text[len(text) - half:]}" if half else ""
+
+
+def _render_step(title: str | None, prompt: str | None, response: str | None) -> str:
+    return f"### {title or 'Step'}\nPrompt: {prompt or ''}\nResponse: {response or ''}"
+
+
+def _render_summary(title: str | None, summary: str) -> str:
+    return f"- {title or 'Step'}: {summary}"
+
+
+# ---------------------------------------------------------
+# 📐 Planning — which steps go in verbatim, summarized or not at all
+# ---------------------------------------------------------
+def lineage_rows_query(parent_id: int):
+    """Root → parent, as plain rows of just the columns planning needs."""
+    node = models.Node
+    return lineage_query(parent_id).with_only_columns(
+        node.id, node.title, node.prompt, node.summary, node.response_ref, node.response_inline
+    )
+
+
+def plan_context(db: Session, parent_id: int | None, responses: dict[int, str] | None = None) -> dict:
+    """
+    Walks the lineage ending at `parent_id` newest-first and fits it into the
+    budget. Responses are only read for steps that need them; pass
+    `responses` when some are already at hand.
+    """
+    lineage = db.execute(lineage_rows_query(parent_id)).all() if parent_id is not None else []
+    return plan_lineage(lineage, responses)
+
+
+def plan_lineage(lineage: list, responses: dict[int, str] | None = None) -> dict:
+    """
+    plan_context on already fetched lineage rows. Touches no session — only
+    storage, for responses — so async callers run it in a thread.
+    """
+    plan = {"recent": [], "summaries": [], "omitted": 0}
+    if not lineage:
+        return plan
+    responses = responses or {}
+
+    def response_of(node) -> str:
+        text = responses.get(node.id)
+        return read_response(node.response_ref, node.response_inline) if text is None else text
+
+    budget = settings.CONTEXT_MAX_TOKENS
+    verbatim_budget = int(budget * settings.CONTEXT_VERBATIM_SHARE)
+    older = list(lineage)  # root → parent
+    used = 0
+
+    # The parent always goes in verbatim (clipped if it alone exceeds the share)
+    while older and len(plan["recent"]) < settings.CONTEXT_RECENT_STEPS:
+        node = older[-1]
+        block = _render_step(node.title, node.prompt, response_of(node))
+        if plan["recent"] and used + count_tokens(block) > verbatim_budget:
+            break
+        block = clip_tokens(block, verbatim_budget - used)
+        plan["recent"].insert(0, block)
+        used += count_tokens(block)
+        older.pop()
+
+    remaining = budget - used
+    for node in reversed(older):
+        if node.summary is not None:
+            cost = count_tokens(_render_summary(node.title, node.summary))
+        else:
+            cost = settings.CONTEXT_SUMMARY_MAX_TOKENS
+        if cost > remaining:
+            break
+        remaining -= cost
+        entry = {"node_id": node.id, "title": node.title, "summary": node.summary}
+        if node.summary is None:
+            entry["response_ref"] = node.response_ref
+            entry["source"] = clip_tokens(
+                f"Prompt: {node.prompt or ''}\nResponse: {response_of(node)}",
+                SUMMARY_SOURCE_MAX_TOKENS,
+            )
+        plan["summaries"].insert(0, entry)
+
+    plan["omitted"] = len(older) - len(plan["summaries"])
+    return plan
+
+
+# ---------------------------------------------------------
+# 📝 Summaries — computed once, cached per node
+# ---------------------------------------------------------
+def _extractive_summary(source: str) -> str:
+    return clip_tokens(" ".join(source.split()), settings.CONTEXT_SUMMARY_MAX_TOKENS)
+
+
+async def _summarize(source: str) -> tuple[str, bool]:
+    """Returns (summary, cacheable). A fallback after an LLM failure is not cached."""
+    if settings.CONTEXT_SUMMARIZER != "llm":
+        return _extractive_summary(source), True
+    try:
+        result = await acall_chat_completion(
+            SUMMARY_PROMPT.format(words=settings.CONTEXT_SUMMARY_MAX_TOKENS * 3 // 4, step=source),
+            system=SUMMARY_SYSTEM_PROMPT,
+        )
+        raw = result.get("raw")
+        if raw and raw.get("provider") != "mock":
+            return clip_tokens(result["text"].strip(), settings.CONTEXT_SUMMARY_MAX_TOKENS), True
+    except Exception as e:
+        print(f"⚠️ Step summary failed, using an excerpt: {e}")
+    return _extractive_summary(source), False
+
+
+async def summarize_missing(plan: dict) -> list[dict]:
+    """Fills in the plan's missing summaries concurrently; returns the rows to cache."""
+    missing = [entry for entry in plan["summaries"] if entry["summary"] is None]
+    results = await asyncio.gather(*(_summarize(entry["source"]) for entry in missing))
+
+    rows = []
+    for entry, (summary, cacheable) in zip(missing, results):
+        entry["summary"] = summary
+        if cacheable:
+            rows.append({"node_id": entry["node_id"], "ref": entry["response_ref"], "summary": summary})
+    return rows
+
+
+# Only cached if the response is still the one that was summarized
+# (NULL-safe: steps without a response are cached too)
+SAVE_SUMMARY_SQL = (
+    update(models.Node.__table__)
+    .where(
+        models.Node.__table__.c.id == bindparam("node_id"),
+        models.Node.__table__.c.response_ref.is_not_distinct_from(bindparam("ref")),
+    )
+    .values(summary=bindparam("summary"))
+)
+
+
+def save_summaries(db: Session, rows: list[dict]):
+    """Caches summaries in one executemany; committed with the caller's transaction."""
+    if rows:
+        db.execute(SAVE_SUMMARY_SQL, rows)
+
+
+# ---------------------------------------------------------
+# 🧩 Rendering + Entry Points
+# ---------------------------------------------------------
+def render_context(plan: dict, prompt: str | None) -> str:
+    prompt = prompt or ""
+    if not plan["recent"] and not plan["summaries"]:
+        return prompt
+
+    parts = ["Conversation so far (oldest first):"]
+    if plan["omitted"]:
+        parts.append(f"[{plan['omitted']} earlier step(s) omitted]")
+    if plan["summaries"]:
+        parts.append("Summaries of earlier steps:\n" + "\n".join(
+            _render_summary(entry["title"], entry["summary"]) for entry in plan["summaries"]
+        ))
+    if plan["recent"]:
+        parts.append("Most recent steps:\n" + "\n\n".join(plan["recent"]))
+    parts.append(f"Current step:\n{prompt}")
+    return "\n\n".join(parts)
+
+
+async def abuild_context(
+    db: Session | AsyncSession,
+    parent_id: int | None,
+    prompt: str | None,
+    responses: dict[int, str] | None = None,
+) -> str:
+    """
+    The prompt to send for a step under `parent_id`, history included.
+    Works with sync sessions (executors) and async sessions (engine routes);
+    new summaries are written in the session but committed by the caller.
+    With an async session the lineage is one async query and responses are
+    read in a thread, so blob, S3 and pack reads never block the loop.
+    """
+    if isinstance(db, AsyncSession):
+        lineage = []
+        if parent_id is not None:
+            lineage = (await db.execute(lineage_rows_query(parent_id))).all()
+        plan = await asyncio.to_thread(plan_lineage, lineage, responses)
+        rows = await summarize_missing(plan)
+        if rows:
+            await db.execute(SAVE_SUMMARY_SQL, rows)
+    else:
+        plan = plan_context(db, parent_id, responses)
+        save_summaries(db, await summarize_missing(plan))
+    return render_context(plan, prompt)
+
+
+def build_context(
+    db: Session, parent_id: int | None, prompt: str | None, responses: dict[int, str] | None = None
+) -> str:
+    """Sync variant for RQ jobs and sync routes (summaries run on the router's loop)."""
+    plan = plan_context(db, parent_id, responses)
+    save_summaries(db, run_sync(summarize_missing(plan)))
+    return render_context(plan, prompt)
+
+
+def preview_context(db: Session, parent_id: int | None, prompt: str | None) -> tuple[str, int]:
+    """
+    Read-only build_context: cached summaries as they are, an excerpt for
+    any missing one — no LLM call, nothing written. Returns (context, number
+    of excerpts standing in for summaries not computed yet).
+    """
+    plan = plan_context(db, parent_id)
+    missing = [entry for entry in plan["summaries"] if entry["summary"] is None]
+    for entry in missing:
+        entry["summary"] = _extractive_summary(entry["source"])
+    return render_context(plan, prompt), len(missing)
@@ -2,22 +2,195 @@
 # 🧱 Database Configuration — SQLAlchemy Setup
 # ---------------------------------------------------------
 from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from Backend.app.config import settings
+import os
+import threading
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # ---------------------------------------------------------
 # Database URL from Environment
 # ---------------------------------------------------------
 DATABASE_URL = settings.DATABASE_URL
 
-# Create SQLAlchemy Engine
-engine = create_engine(DATABASE_URL)
+# Declarative Base for Models
+Base = declarative_base()
+
+
+# ---------------------------------------------------------
+# Async Driver Mapping (asyncpg for Postgres, aiosqlite for SQLite)
+# ---------------------------------------------------------
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Maps a sync DATABASE_URL onto its async driver,
+    e.g. postgresql://… → postgresql+asyncpg://…, sqlite:///… → sqlite+aiosqlite:///…
+    """
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        return url
+    return f"{ASYNC_DRIVERS[dialect]}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+
+
+# ---------------------------------------------------------
+# Pool Telemetry — wait time / timeouts per engine role
+# ---------------------------------------------------------
+class PoolStats:
+    """Counters for how long callers waited to check out a connection."""
+
+    def __init__(self, role: str):
+        self.role = role
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+            }
+
+
+def _instrumented_pool(base: type, stats: PoolStats) -> type:
+    # A subclass per role: the stats survive pool.recreate() on dispose/reconnect
+    class InstrumentedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            timed_out = False
+            try:
+                return super()._do_get()
+            except sa_exc.TimeoutError:
+                timed_out = True
+                raise
+            finally:
+                stats.record(time.perf_counter() - started, timed_out)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+POOL_STATS: dict[str, PoolStats] = {}
+
+
+def _engine_options(url: str, role: str, pool_size: int, max_overflow: int, is_async: bool) -> dict:
+    """
+    Settings-driven pool configuration. With DB_PGBOUNCER_TRANSACTION_MODE the
+    app keeps no pool of its own (PgBouncer pools) and asyncpg's prepared
+    statement caches are disabled, as transaction pooling requires.
+    """
+    if url.startswith("sqlite"):
+        return {}
+
+    stats = POOL_STATS.setdefault(role, PoolStats(role))
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        options["poolclass"] = _instrumented_pool(NullPool, stats)
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__lucid_{uuid.uuid4().hex}__",
+            }
+        return options
+
+    base = AsyncAdaptedQueuePool if is_async else QueuePool
+    options.update(
+        poolclass=_instrumented_pool(base, stats),
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    return options
+
+
+def _pgbouncer_async_url(url: str) -> str:
+    # SQLAlchemy's asyncpg dialect keeps its own prepared statement cache
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE and url.startswith("postgresql+asyncpg"):
+        separator = "&" if "?" in url else "?"
+        return f"{url}{separator}prepared_statement_cache_size=0"
+    return url
+
+
+# ---------------------------------------------------------
+# Engines per Role — API requests vs RQ worker jobs
+# ---------------------------------------------------------
+# Create SQLAlchemy Engine (API role)
+engine = create_engine(
+    DATABASE_URL,
+    **_engine_options(DATABASE_URL, "api", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, False),
+)
 
 # Create Session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Declarative Base for Models
-Base = declarative_base()
+# Worker role: long-running jobs get their own, smaller pool so they can
+# never starve API requests of connections (and vice versa)
+worker_engine = create_engine(
+    DATABASE_URL,
+    **_engine_options(
+        DATABASE_URL, "worker", settings.WORKER_DB_POOL_SIZE, settings.WORKER_DB_MAX_OVERFLOW, False
+    ),
+)
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine)
+
+async_engine = create_async_engine(
+    _pgbouncer_async_url(ASYNC_DATABASE_URL),
+    **_engine_options(
+        ASYNC_DATABASE_URL, "api_async", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, True
+    ),
+)
+
+# expire_on_commit=False: async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def pool_metrics() -> dict:
+    """Live pool state (checked out, overflow, …) plus wait-time counters per role."""
+    pools = {"api": engine.pool, "worker": worker_engine.pool, "api_async": async_engine.sync_engine.pool}
+    metrics = {}
+    for role, pool in pools.items():
+        entry = {"pool": type(pool).__name__, "status": pool.status()}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                entry[name] = getattr(pool, name)()
+        if role in POOL_STATS:
+            entry.update(POOL_STATS[role].snapshot())
+        metrics[role] = entry
+    return metrics
 
 
 # ---------------------------------------------------------
@@ -35,14 +208,30 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Async counterpart of get_db for `async def` routes,
+    so database I/O never blocks the event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # ---------------------------------------------------------
 # Database Initialization Function
 # ---------------------------------------------------------
 def init_db():
     """
-    Initializes database tables dynamically.
+    Brings the schema up to date by running the Alembic migrations
+    (Backend/migrations). Unlike create_all, this also alters existing tables.
     Imports models lazily to avoid circular imports.
     """
+    from alembic import command
+    from alembic.config import Config
     from Backend.app import models  # ✅ Lazy import prevents circular dependency
-    print("🧩 Creating database tables (if not exist)...")
-    Base.metadata.create_all(bind=engine)
+
+    print("🧩 Applying database migrations...")
+    alembic_cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    with engine.begin() as connection:
+        alembic_cfg.attributes["connection"] = connection
+        command.upgrade(alembic_cfg, "head")
@@ -2,9 +2,10 @@
 # 🌌 Lucid-Core Main Entry — FastAPI Application
 # ---------------------------------------------------------
 from fastapi import FastAPI
-from Backend.app.routes import projects, plan, nodes, branches
-from Backend.app.database import init_db
+from Backend.app.routes import projects, plan, nodes, branches, artifacts, search, metrics, intelligent_engine
+from Backend.app.database import init_db, async_engine
 from Backend.app.config import settings
+from Backend.utils.llm_router import close_llm_clients
 
 # ---------------------------------------------------------
 # Initialize FastAPI App
@@ -34,6 +35,13 @@ def on_startup():
     init_db()
     print("✅ Database initialized successfully.\n")
 
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # Release pooled keep-alive connections to the LLM providers
+    await close_llm_clients()
+    await async_engine.dispose()
+
 # ---------------------------------------------------------
 # Register Routers
 # ---------------------------------------------------------
@@ -41,6 +49,10 @@ app.include_router(projects.router)
 app.include_router(plan.router)
 app.include_router(nodes.router)
 app.include_router(branches.router)
+app.include_router(artifacts.router)
+app.include_router(search.router)
+app.include_router(intelligent_engine.router)
+app.include_router(metrics.router)
 
 # ---------------------------------------------------------
 # Health Check
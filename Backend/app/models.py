@@ -1,7 +1,8 @@
 # ---------------------------------------------------------
 # 🧩 Lucid-Core Models — SQLAlchemy ORM Definitions
 # ---------------------------------------------------------
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Text, DateTime, Enum, Index, LargeBinary
+from sqlalchemy import event, select, literal, delete, or_
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -47,7 +48,16 @@ class Branch(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     project = relationship("Project", back_populates="branches")
-    nodes = relationship("Node", back_populates="branch", cascade="all, delete")
+    # Two FKs link branches and nodes (nodes.branch_id, branches.base_node_id):
+    # the relationship follows the node's membership, not the fork point
+    nodes = relationship(
+        "Node", back_populates="branch", cascade="all, delete", foreign_keys="Node.branch_id"
+    )
+
+    __table_args__ = (
+        Index("uq_branches_project_name", "project_id", "name", unique=True),
+        Index("ix_branches_project_created", "project_id", "created_at", "id"),
+    )
 
 
 # ---------------------------------------------------------
@@ -63,14 +73,30 @@ class Node(Base):
 
     title = Column(String(255))
     prompt = Column(Text)
-    response_ref = Column(Text)
+    response_ref = Column(Text)  # inline:, sha256: or pack: ref (see app.responses)
+    response_inline = Column(LargeBinary, nullable=True)  # zlib text of small responses
     status = Column(Enum(NodeStatus), default=NodeStatus.pending)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Incremental execution: input fingerprint of the last successful run,
+    # and the fingerprint of its output that children build on
+    fingerprint = Column(String(64), nullable=True)
+    output_fingerprint = Column(String(64), nullable=True)
+
+    # Cached short summary of prompt + response for context packing (app.context);
+    # cleared whenever the response is rewritten
+    summary = Column(Text, nullable=True)
+
     project = relationship("Project", back_populates="nodes")
-    branch = relationship("Branch", back_populates="nodes")
+    branch = relationship("Branch", back_populates="nodes", foreign_keys=[branch_id])
     artifacts = relationship("Artifact", back_populates="node", cascade="all, delete")
 
+    __table_args__ = (
+        Index("ix_nodes_branch_created", "branch_id", "created_at", "id"),
+        Index("ix_nodes_project_created", "project_id", "created_at", "id"),
+        Index("ix_nodes_parent_id", "parent_id"),
+    )
+
 
 # ---------------------------------------------------------
 # ARTIFACT MODEL
@@ -82,6 +108,74 @@ class Artifact(Base):
     node_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"))
     file_path = Column(String(512))
     file_type = Column(String(50))
+    sha256 = Column(String(64), nullable=True)  # checksum of the stored bytes
+    size_bytes = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     node = relationship("Node", back_populates="artifacts")
+
+    __table_args__ = (
+        Index("ix_artifacts_node_created", "node_id", "created_at", "id"),
+        Index("ix_artifacts_sha256", "sha256"),
+    )
+
+
+# ---------------------------------------------------------
+# NODE CLOSURE (ANCESTRY INDEX)
+# ---------------------------------------------------------
+class NodeClosure(Base):
+    """
+    One row per (ancestor, descendant) pair in the reasoning tree,
+    including a depth-0 self row, so subtree / ancestor queries are
+    plain indexed lookups instead of recursive walks.
+    """
+    __tablename__ = "node_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_node_closure_descendant_depth", "descendant_id", "depth"),
+    )
+
+
+# ---------------------------------------------------------
+# CLOSURE MAINTENANCE — runs inside every ORM flush that
+# inserts or deletes a Node (sync and async sessions alike)
+# ---------------------------------------------------------
+@event.listens_for(Node, "after_insert")
+def _index_inserted_node(mapper, connection, target):
+    closure = NodeClosure.__table__
+    connection.execute(
+        closure.insert().values(ancestor_id=target.id, descendant_id=target.id, depth=0)
+    )
+    if target.parent_id is not None:
+        connection.execute(
+            closure.insert().from_select(
+                ["ancestor_id", "descendant_id", "depth"],
+                select(closure.c.ancestor_id, literal(target.id), closure.c.depth + 1)
+                .where(closure.c.descendant_id == target.parent_id),
+            )
+        )
+
+
+@event.listens_for(Node, "before_delete")
+def _unindex_deleted_node(mapper, connection, target):
+    closure = NodeClosure.__table__
+    # Children are re-rooted (parent_id SET NULL), so the whole subtree
+    # loses every ancestor above the deleted node.
+    subtree = select(closure.c.descendant_id).where(closure.c.ancestor_id == target.id)
+    ancestors = select(closure.c.ancestor_id).where(
+        closure.c.descendant_id == target.id, closure.c.depth > 0
+    )
+    connection.execute(
+        delete(closure).where(
+            closure.c.descendant_id.in_(subtree), closure.c.ancestor_id.in_(ancestors)
+        )
+    )
+    connection.execute(
+        delete(closure).where(
+            or_(closure.c.ancestor_id == target.id, closure.c.descendant_id == target.id)
+        )
+    )
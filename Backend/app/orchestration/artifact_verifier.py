@@ -0,0 +1,70 @@
+import hashlib
+from Backend.app.database import WorkerSessionLocal
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.utils.storage import get_s3_client
+
+# Direct (presigned) uploads land under the staging prefix; only verified
+# bytes are promoted to their content-addressed key.
+STAGING_PREFIX = "artifacts/staging/"
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def artifact_key(digest: str) -> str:
+    """Content-addressed object key: identical files are stored once."""
+    return f"artifacts/sha256/{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def verify_artifact(artifact_id: int, declared_sha256: str | None = None):
+    """
+    Background job for artifacts uploaded straight to MinIO via presigned URLs.
+
+    🔹 Streams the staged object and computes its SHA-256
+    🔹 A mismatch with the client's declared checksum deletes object and row
+    🔹 Otherwise the object is promoted to its content-addressed key
+       (server-side copy, or dropped if those bytes are already stored)
+    """
+    s3 = get_s3_client()
+    bucket = settings.S3_BUCKET
+    db = WorkerSessionLocal()
+    try:
+        artifact = db.get(models.Artifact, artifact_id)
+        if artifact is None or not artifact.file_path.startswith(STAGING_PREFIX):
+            return {"artifact_id": artifact_id, "status": "skipped"}
+
+        staging_key = artifact.file_path
+        body = s3.get_object(Bucket=bucket, Key=staging_key)["Body"]
+        digest, size = hashlib.sha256(), 0
+        for chunk in iter(lambda: body.read(READ_CHUNK_BYTES), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        if declared_sha256 and declared_sha256.lower() != sha256:
+            print(f"❌ Artifact {artifact_id} failed verification (declared {declared_sha256}, got {sha256})")
+            s3.delete_object(Bucket=bucket, Key=staging_key)
+            db.delete(artifact)
+            db.commit()
+            return {"artifact_id": artifact_id, "status": "rejected"}
+
+        target_key = artifact_key(sha256)
+        try:
+            s3.head_object(Bucket=bucket, Key=target_key)
+        except Exception:
+            s3.copy({"Bucket": bucket, "Key": staging_key}, bucket, target_key)
+        s3.delete_object(Bucket=bucket, Key=staging_key)
+
+        artifact.file_path = target_key
+        artifact.sha256 = sha256
+        artifact.size_bytes = size
+        db.commit()
+        print(f"✅ Artifact {artifact_id} verified ({size} bytes, sha256 {sha256[:12]}…)")
+        return {"artifact_id": artifact_id, "status": "verified", "sha256": sha256}
+
+    except Exception as e:
+        print(f"❌ Artifact verification error for {artifact_id}: {e}")
+        db.rollback()
+        return {"error": str(e)}
+
+    finally:
+        db.close()
@@ -0,0 +1,203 @@
+import asyncio
+from collections import defaultdict
+from sqlalchemy import update
+from Backend.app.database import WorkerSessionLocal
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.context import abuild_context
+from Backend.app.orchestration.executor import DEFAULT_SYSTEM_PROMPT, DEFAULT_MODEL
+from Backend.app.responses import store_response, read_response
+from Backend.app.search import index_nodes
+from Backend.app.orchestration.fingerprint import input_fingerprint, output_fingerprint
+from Backend.utils.llm_router import acall_chat_completion, run_sync
+
+
+def _mark_status(db, node_ids, status: models.NodeStatus):
+    if node_ids:
+        db.execute(
+            update(models.Node)
+            .where(models.Node.id.in_(list(node_ids)))
+            .values(status=status)
+        )
+        db.commit()
+
+
+async def aexecute_branch(
+    branch_id: int, max_concurrency: int | None = None, force: bool = False
+):
+    """
+    Executes a branch as a dependency graph built from `parent_id`.
+
+    🔹 Nodes whose parent is done (or outside the branch) run concurrently,
+       bounded by `max_concurrency` (defaults to DAG_MAX_CONCURRENCY)
+    🔹 Each step is sent with its lineage packed into a token budget
+       (recent steps verbatim, older ones as cached summaries — app.context)
+    🔹 Incremental: a completed node whose fingerprint (prompt, system, model,
+       parent output fingerprint) is unchanged keeps its output and is not
+       re-run — so edits re-run only dirty descendants and failed runs resume
+       from the failed node. `force=True` re-runs everything.
+    🔹 Status transitions are written in one UPDATE per batch of finished nodes
+    🔹 Descendants of a failed node are skipped and stay as they are
+    """
+    limit = max_concurrency or settings.DAG_MAX_CONCURRENCY
+    print(f"🌳 Executing branch {branch_id} (concurrency={limit}, force={force})...")
+
+    db = WorkerSessionLocal()
+    pending: set = set()
+    in_flight: set[int] = set()  # marked running, result not written yet
+    try:
+        nodes = (
+            db.query(models.Node)
+            .filter(models.Node.branch_id == branch_id)
+            .order_by(models.Node.created_at, models.Node.id)
+            .all()
+        )
+        if not nodes:
+            return {"error": "No nodes found in this branch."}
+
+        # Snapshot plain values so committed (expired) ORM rows are never reloaded
+        prompts = {n.id: n.prompt for n in nodes}
+        parents = {n.id: n.parent_id for n in nodes}
+        stored = {
+            n.id: (n.fingerprint, n.output_fingerprint, (n.response_ref, n.response_inline))
+            for n in nodes
+            if n.status == models.NodeStatus.completed and n.response_ref
+        }
+        children = defaultdict(list)
+        for n in nodes:
+            if n.parent_id in prompts:
+                children[n.parent_id].append(n.id)
+
+        roots = [n.id for n in nodes if n.parent_id not in prompts]
+
+        # Parents outside this branch (e.g. a fork's base node) come from storage
+        refs: dict[int, tuple] = {}  # node id → (response_ref, response_inline)
+        out_fps: dict[int, str | None] = {}
+        external = {parents[nid] for nid in roots if parents[nid] is not None}
+        if external:
+            for parent in db.query(models.Node).filter(models.Node.id.in_(external)):
+                if parent.status == models.NodeStatus.completed:
+                    refs[parent.id] = (parent.response_ref, parent.response_inline)
+                    out_fps[parent.id] = parent.output_fingerprint or output_fingerprint(
+                        parent.fingerprint, read_response(*refs[parent.id])
+                    )
+
+        outputs: dict[int, str] = {}
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(node_id: int):
+            async with semaphore:
+                try:
+                    # Lineage history within the token budget; this run's outputs skip storage reads
+                    prompt = await abuild_context(db, parents[node_id], prompts[node_id], outputs)
+                    result = await acall_chat_completion(
+                        prompt, system=DEFAULT_SYSTEM_PROMPT, model=DEFAULT_MODEL
+                    )
+                    return node_id, result
+                except Exception as e:
+                    return node_id, {"text": f"[Execution Error] {e}"}
+
+        fingerprints: dict[int, str] = {}
+        completed, failed, reused = [], [], []
+
+        def dispatch(node_ids: list[int]):
+            # Clean nodes resolve immediately and release their children;
+            # dirty ones are started as LLM calls.
+            worklist, to_run = list(node_ids), []
+            while worklist:
+                nid = worklist.pop()
+                fp = input_fingerprint(
+                    prompts[nid], DEFAULT_SYSTEM_PROMPT, DEFAULT_MODEL, out_fps.get(parents[nid])
+                )
+                fingerprints[nid] = fp
+                previous = stored.get(nid)
+                if not force and previous and previous[0] == fp and previous[1]:
+                    out_fps[nid] = previous[1]
+                    refs[nid] = previous[2]
+                    reused.append(nid)
+                    worklist.extend(children[nid])
+                else:
+                    to_run.append(nid)
+
+            _mark_status(db, to_run, models.NodeStatus.running)
+            in_flight.update(to_run)
+            for nid in to_run:
+                pending.add(asyncio.create_task(run(nid)))
+
+        dispatch(roots)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            rows, ready = [], []
+            for task in done:
+                node_id, result = task.result()
+                if "raw" in result:
+                    text = result["text"]
+                    outputs[node_id] = text
+                    out_fps[node_id] = output_fingerprint(fingerprints[node_id], text)
+                    rows.append({
+                        "id": node_id,
+                        "status": models.NodeStatus.completed,
+                        **store_response(text),
+                        "summary": None,
+                        "fingerprint": fingerprints[node_id],
+                        "output_fingerprint": out_fps[node_id],
+                    })
+                    completed.append(node_id)
+                    ready.extend(children[node_id])
+                else:
+                    print(f"❌ Node {node_id} failed: {result.get('text', '')[:200]}")
+                    rows.append({
+                        "id": node_id,
+                        "status": models.NodeStatus.failed,
+                        "fingerprint": None,
+                        "output_fingerprint": None,
+                    })
+                    failed.append(node_id)
+
+            # One bulk UPDATE-by-primary-key for the whole finished batch
+            db.execute(update(models.Node), rows)
+            finished = [row["id"] for row in rows if row["status"] == models.NodeStatus.completed]
+            index_nodes(db, finished, outputs)
+            db.commit()
+            in_flight.difference_update(row["id"] for row in rows)
+            dispatch(ready)
+
+        done_ids = set(completed) | set(failed) | set(reused)
+        skipped = [nid for nid in prompts if nid not in done_ids]
+        print(
+            f"✅ Branch {branch_id} done: {len(completed)} executed, {len(reused)} unchanged, "
+            f"{len(failed)} failed, {len(skipped)} skipped."
+        )
+        return {
+            "branch_id": branch_id,
+            "completed": completed,
+            "reused": reused,
+            "failed": failed,
+            "skipped": skipped,
+        }
+
+    except Exception as e:
+        print(f"❌ Branch execution error for branch {branch_id}: {e}")
+        db.rollback()
+        for task in pending:
+            task.cancel()
+        # Nodes of the interrupted batch must not stay "running" forever
+        try:
+            _mark_status(db, in_flight, models.NodeStatus.failed)
+        except Exception as reset_error:
+            db.rollback()
+            print(f"⚠️ Could not reset in-flight nodes of branch {branch_id}: {reset_error}")
+        return {"error": str(e)}
+
+    finally:
+        db.close()
+
+
+def execute_branch(branch_id: int, max_concurrency: int | None = None, force: bool = False):
+    """
+    Sync entry point for RQ workers.
+    Runs on the LLM router's loop so pooled provider connections are reused.
+    """
+    return run_sync(aexecute_branch(branch_id, max_concurrency, force))
@@ -1,7 +1,14 @@
-from Backend.app.database import SessionLocal
+from Backend.app.database import WorkerSessionLocal
 from Backend.app import models
+from Backend.app.context import build_context
+from Backend.app.responses import apply_response
+from Backend.app.search import index_node
 from Backend.utils.llm_router import call_chat_completion
-import datetime, os
+
+# Defaults used for every node execution (and its fingerprint)
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant."
+DEFAULT_MODEL = "gpt-4o-mini"
+
 
 def execute_node(node_id: int):
     """
@@ -10,27 +17,27 @@ def execute_node(node_id: int):
     """
     print(f"🧠 Executing Node {node_id}...")
 
-    db = SessionLocal()  # Create new DB session in worker
+    db = WorkerSessionLocal()  # Create new DB session in worker
     try:
         node = db.query(models.Node).filter(models.Node.id == node_id).first()
         if not node:
             print(f"❌ Node {node_id} not found in DB.")
             return {"error": "Node not found"}
 
-        print(f"🔍 Prompt: {node.prompt[:80]}")
+        print(f"🔍 Prompt: {(node.prompt or '')[:80]}")
 
-        # Call LLM (Gemini > OpenAI)
-        result = call_chat_completion(node.prompt or "")
+        # Call LLM (Gemini > OpenAI) with the lineage packed into the context budget
+        prompt = build_context(db, node.parent_id, node.prompt)
+        result = call_chat_completion(prompt, system=DEFAULT_SYSTEM_PROMPT, model=DEFAULT_MODEL)
         output = result.get("text", "[Empty response]")
 
         # Save LLM output
-        node.status = models.NodeStatus.ok
-        node.response_ref = f"node_{node.id}_{datetime.datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.txt"
-
-        artifacts_path = os.path.join("artifacts", node.response_ref)
-        os.makedirs("artifacts", exist_ok=True)
-        with open(artifacts_path, "w", encoding="utf-8") as f:
-            f.write(output)
+        node.status = models.NodeStatus.completed
+        apply_response(node, output)
+        # Ran outside a branch run — force the next incremental run to redo it
+        node.fingerprint = None
+        node.output_fingerprint = None
+        index_node(db, node, output)
 
         db.commit()
         print(f"✅ Node {node_id} executed successfully.")
@@ -38,7 +45,7 @@ def execute_node(node_id: int):
             "node_id": node.id,
             "prompt": node.prompt,
             "output": output[:500],
-            "artifact_path": os.path.abspath(artifacts_path)
+            "response_ref": node.response_ref,
         }
 
     except Exception as e:
@@ -0,0 +1,32 @@
+import hashlib
+import json
+
+
+def _digest(parts: dict) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def input_fingerprint(
+    prompt: str | None, system: str, model: str, parent_output_fingerprint: str | None
+) -> str:
+    """
+    Identifies everything that determines a node's result: its own inputs
+    plus the output fingerprint of its parent (and therefore all ancestors).
+    """
+    return _digest({
+        "prompt": prompt or "",
+        "system": system,
+        "model": model,
+        "parent": parent_output_fingerprint or "",
+    })
+
+
+def output_fingerprint(node_fingerprint: str | None, output: str) -> str:
+    """
+    Fingerprint handed down to children. Includes the output itself, so a
+    re-run that reproduces the same text leaves the children clean.
+    """
+    return _digest({
+        "node": node_fingerprint or "",
+        "output": hashlib.sha256(output.encode("utf-8")).hexdigest(),
+    })
@@ -0,0 +1,165 @@
+from sqlalchemy import select, insert, update
+from sqlalchemy.orm import Session
+from Backend.app import models, tree, search
+
+
+class MergeConflict(Exception):
+    """Raised when both sides changed the same step since the merge base."""
+
+    def __init__(self, conflicts: list[dict]):
+        super().__init__(f"{len(conflicts)} conflicting step(s)")
+        self.conflicts = conflicts
+
+
+# Columns carried over when a source node is replayed onto the target
+REPLAYED_COLUMNS = (
+    "title",
+    "prompt",
+    "response_ref",
+    "response_inline",
+    "status",
+    "fingerprint",
+    "output_fingerprint",
+    "summary",
+)
+
+
+def _since(db: Session, branch_id: int, merge_base: int | None):
+    """
+    Own nodes of a branch that were added after the fork point, plus the
+    skipped ones: own nodes that are the merge base or one of its ancestors
+    and therefore already part of both histories. New nodes need not descend
+    from the merge base (e.g. a second root started on the branch).
+    """
+    query = select(models.Node).where(models.Node.branch_id == branch_id)
+    if merge_base is None:
+        nodes = db.execute(query.order_by(models.Node.created_at, models.Node.id)).scalars().all()
+        return nodes, []
+
+    shared = select(models.NodeClosure.ancestor_id).where(
+        models.NodeClosure.descendant_id == merge_base
+    )
+    rows = db.execute(
+        query.add_columns(models.Node.id.in_(shared).label("shared"))
+        .order_by(models.Node.created_at, models.Node.id)
+    ).all()
+    return [n for n, is_shared in rows if not is_shared], [n for n, is_shared in rows if is_shared]
+
+
+def _conflict_key(node):
+    # Titled steps match by title; untitled ones by the step they extend
+    return ("title", node.title) if node.title else ("parent", node.parent_id)
+
+
+def find_conflicts(source_nodes, target_nodes) -> list[dict]:
+    """
+    Steps changed on both sides whose prompts diverged: same title, or —
+    for untitled steps — both extending the same parent step.
+    """
+    target_by_key = {}
+    for n in target_nodes:
+        target_by_key.setdefault(_conflict_key(n), n)
+
+    conflicts = []
+    for n in source_nodes:
+        other = target_by_key.get(_conflict_key(n))
+        if other is not None and (other.prompt or "") != (n.prompt or ""):
+            conflicts.append({
+                "title": n.title,
+                "parent_id": n.parent_id,
+                "source_node_id": n.id,
+                "target_node_id": other.id,
+            })
+    return conflicts
+
+
+def merge_branches(
+    db: Session, source: models.Branch, target: models.Branch, force: bool = False
+) -> dict:
+    """
+    Merges `source` into `target` in a single transaction.
+
+    1️⃣ Merge base = LCA of both branch heads via the closure index.
+    2️⃣ Fast-forward if the target has not moved since the merge base:
+       the source's nodes are relinked to the target with one UPDATE.
+    3️⃣ Otherwise the source's new nodes are replayed on top of the target
+       head with one bulk INSERT, one bulk parent UPDATE and one closure
+       INSERT — constant statements regardless of branch size.
+    Conflicting steps abort the merge unless `force=True`.
+    """
+    source_head = tree.get_branch_head(db, source)
+    target_head = tree.get_branch_head(db, target)
+
+    merge_base = None
+    if source_head is not None and target_head is not None:
+        merge_base = tree.lowest_common_ancestor(db, source_head, target_head)
+
+    source_nodes, skipped = _since(db, source.id, merge_base)
+    skipped_ids = [n.id for n in skipped]
+
+    try:
+        # ⏩ Fast-forward: nothing new on the target side
+        if target_head is None or merge_base == target_head:
+            if source_nodes:
+                db.execute(
+                    update(models.Node)
+                    .where(models.Node.id.in_([n.id for n in source_nodes]))
+                    .values(branch_id=target.id)
+                )
+            source.status = "merged"
+            db.commit()
+            return {
+                "strategy": "fast-forward",
+                "merge_base": merge_base,
+                "merged_nodes": len(source_nodes),
+                "skipped_nodes": skipped_ids,
+                "conflicts": [],
+            }
+
+        # 🔀 Diverged: check for conflicting steps first
+        target_nodes, _ = _since(db, target.id, merge_base)
+        conflicts = find_conflicts(source_nodes, target_nodes)
+        if conflicts and not force:
+            raise MergeConflict(conflicts)
+
+        new_ids = []
+        if source_nodes:
+            rows = [
+                {
+                    "project_id": target.project_id,
+                    "branch_id": target.id,
+                    "parent_id": None,
+                    **{col: getattr(n, col) for col in REPLAYED_COLUMNS},
+                }
+                for n in source_nodes
+            ]
+            new_ids = db.execute(
+                insert(models.Node).returning(models.Node.id, sort_by_parameter_order=True),
+                rows,
+            ).scalars().all()
+
+            # Re-point parents: inside the replayed set → its copy, else → target head
+            remap = {n.id: new_id for n, new_id in zip(source_nodes, new_ids)}
+            db.execute(
+                update(models.Node),
+                [
+                    {"id": remap[n.id], "parent_id": remap.get(n.parent_id, target_head)}
+                    for n in source_nodes
+                ],
+            )
+            tree.index_bulk_nodes(db, new_ids)
+            search.index_nodes(db, new_ids)
+
+        source.status = "merged"
+        db.commit()
+        return {
+            "strategy": "replay",
+            "merge_base": merge_base,
+            "merged_nodes": len(new_ids),
+            "skipped_nodes": skipped_ids,
+            "conflicts": conflicts,
+        }
+
+    except Exception:
+        db.rollback()
+        raise
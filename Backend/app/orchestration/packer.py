@@ -0,0 +1,124 @@
+import hashlib
+from sqlalchemy import bindparam, select, update
+from Backend.app.database import WorkerSessionLocal
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.responses import read_response, pack_dir, make_pack_ref, INLINE_REF_PREFIX
+from Backend.utils.blob_store import get_blob_store, is_blob_ref
+from Backend.utils.packfile import write_pack, PackReader, prune_packs, remove_pack
+
+# Packed nodes are repointed at the pack in batches of this many rows
+REPOINT_BATCH_SIZE = 500
+
+# Only moves a node if its response is still the one that was packed
+REPOINT_SQL = (
+    update(models.Node.__table__)
+    .where(
+        models.Node.__table__.c.id == bindparam("node_id"),
+        models.Node.__table__.c.response_ref == bindparam("old_ref"),
+    )
+    .values(response_ref=bindparam("new_ref"), response_inline=None)
+)
+
+
+def _verify_pack(index_path: str, packed: list[tuple]):
+    """Reads every object back and checks it against the digest it was packed under."""
+    reader = PackReader(index_path)
+    try:
+        for node_id, _old_ref, digest in packed:
+            if hashlib.sha256(reader.read(node_id)).hexdigest() != digest:
+                raise ValueError(f"Packed output of node {node_id} does not match its digest")
+    finally:
+        reader.close()
+
+
+def _release_blobs(db, refs: set[str]) -> int:
+    """
+    Deletes loose blobs no node references any more. A concurrent write of
+    the same content may have found the blob just before it went away, so
+    references are checked again afterwards and such a blob is restored.
+    """
+    store = get_blob_store()
+    node_ref = models.Node.response_ref
+    released = 0
+    for ref in refs:
+        if db.query(models.Node.id).filter(node_ref == ref).first() is not None:
+            continue
+        data = store.get(ref)
+        store.delete(ref)
+        db.commit()  # fresh snapshot for the re-check
+        if db.query(models.Node.id).filter(node_ref == ref).first() is not None:
+            store.put(data)
+            continue
+        released += 1
+    return released
+
+
+def pack_project(project_id: int):
+    """
+    Background job: repacks every stored output of a project into one
+    delta-compressed packfile (parent/sibling deltas) plus its index.
+    Outputs are streamed from the database into the pack; once the pack
+    reads back correctly, packed nodes are repointed at it (`pack:` refs)
+    and their inline copies and unreferenced blobs are released.
+    """
+    print(f"📦 Packing outputs for project {project_id}...")
+    directory = pack_dir(project_id)
+    packed = []  # (node id, ref at pack time, content digest)
+    db = WorkerSessionLocal()
+    try:
+        rows = db.execute(
+            select(
+                models.Node.id,
+                models.Node.parent_id,
+                models.Node.response_ref,
+                models.Node.response_inline,
+            )
+            .where(models.Node.project_id == project_id, models.Node.response_ref.isnot(None))
+            .order_by(models.Node.created_at, models.Node.id)
+            .execution_options(yield_per=REPOINT_BATCH_SIZE)
+        )
+
+        def entries():
+            for n in rows:
+                data = read_response(n.response_ref, n.response_inline).encode("utf-8")
+                digest = hashlib.sha256(data).hexdigest()
+                packed.append((n.id, n.response_ref, digest))
+                yield {"id": n.id, "parent_id": n.parent_id, "ref": digest, "data": data}
+
+        stats = write_pack(directory, entries(), settings.BLOB_COMPRESSION_LEVEL)
+        rows.close()
+        if not packed:
+            prune_packs(directory, stats["index_path"])
+            return {"project_id": project_id, "objects": 0}
+
+        try:
+            _verify_pack(stats["index_path"], packed)
+        except Exception:
+            remove_pack(stats["index_path"])
+            raise
+
+        # The new pack is complete: move nodes onto it, then drop older packs
+        repoint = [
+            {"node_id": node_id, "old_ref": old_ref, "new_ref": make_pack_ref(project_id, digest)}
+            for node_id, old_ref, digest in packed
+            if old_ref != make_pack_ref(project_id, digest)
+        ]
+        for start in range(0, len(repoint), REPOINT_BATCH_SIZE):
+            db.execute(REPOINT_SQL, repoint[start:start + REPOINT_BATCH_SIZE])
+            db.commit()
+        prune_packs(directory, stats["index_path"])
+
+        loose = {old_ref for _, old_ref, _ in packed if is_blob_ref(old_ref)}
+        released = _release_blobs(db, loose)
+    finally:
+        db.close()
+
+    inline = sum(1 for _, old_ref, _ in packed if old_ref.startswith(INLINE_REF_PREFIX))
+    print(
+        f"✅ Packed {stats['objects']} outputs ({stats['deltas']} deltas): "
+        f"{stats['raw_bytes']:,} → {stats['packed_bytes']:,} bytes; "
+        f"released {released} blobs and {inline} inline copies."
+    )
+    return {"project_id": project_id, **stats, "blobs_released": released, "inline_released": inline}
+
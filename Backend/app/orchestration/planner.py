@@ -1,4 +1,5 @@
 import json
+from datetime import datetime
 from sqlalchemy.orm import Session
 from Backend.app import models
 from Backend.utils.llm_router import call_chat_completion
@@ -38,8 +39,12 @@ def create_plan(db: Session, project_id: int, plan_prompt: str):
     if not project:
         raise ValueError(f"Project ID {project_id} not found.")
 
-    # Step 2: Create branch for this plan
-    branch = models.Branch(project_id=project_id, name="ai-plan", status="draft")
+    # Step 2: Create branch for this plan (names are unique per project)
+    branch = models.Branch(
+        project_id=project_id,
+        name=f"ai-plan-{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}",
+        status="draft",
+    )
     db.add(branch)
     db.commit()
     db.refresh(branch)
@@ -0,0 +1,105 @@
+# ---------------------------------------------------------
+# 📑 Keyset Pagination + NDJSON Streaming for List Endpoints
+# ---------------------------------------------------------
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import Session, load_only
+from Backend.app.config import settings
+from Backend.app.database import SessionLocal
+
+
+# ---------------------------------------------------------
+# Opaque Cursors over (created_at, id)
+# ---------------------------------------------------------
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def page_size(limit: int | None) -> int:
+    if limit is None:
+        return settings.PAGE_SIZE_DEFAULT
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive.")
+    return min(limit, settings.PAGE_SIZE_MAX)
+
+
+def _after(query, model, cursor: str | None):
+    query = query.order_by(model.created_at, model.id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                model.created_at > created_at,
+                and_(model.created_at == created_at, model.id > row_id),
+            )
+        )
+    return query
+
+
+# ---------------------------------------------------------
+# Field Projection (e.g. omit prompts from node listings)
+# ---------------------------------------------------------
+def parse_fields(fields: str | None, allowed: tuple, default: tuple) -> tuple:
+    if not fields:
+        return default
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def with_columns(query, model, fields: tuple):
+    """Loads only the projected columns (plus the keyset columns)."""
+    columns = {"id", "created_at"} | {f for f in fields if hasattr(model, f)}
+    return query.options(load_only(*(getattr(model, c) for c in columns)))
+
+
+# ---------------------------------------------------------
+# One Page — LIMIT n+1 to know whether another page exists
+# ---------------------------------------------------------
+def keyset_page(db: Session, query, model, cursor: str | None, limit: int | None):
+    """Returns (rows, next_cursor) for the page after `cursor`."""
+    size = page_size(limit)
+    rows = db.execute(_after(query, model, cursor).limit(size + 1)).scalars().all()
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+
+# ---------------------------------------------------------
+# NDJSON Streaming — server-side cursor, flat memory
+# ---------------------------------------------------------
+def ndjson_response(query, model, serialize, cursor: str | None = None) -> StreamingResponse:
+    """
+    Streams every row after `cursor` as one JSON object per line.
+    Rows are fetched in `yield_per` batches from a server-side cursor on a
+    session owned by the stream, so memory stays flat for any result size.
+    """
+    query = _after(query, model, cursor).execution_options(yield_per=settings.STREAM_BATCH_SIZE)
+
+    def rows():
+        db = SessionLocal()
+        try:
+            for row in db.execute(query).scalars():
+                yield json.dumps(jsonable_encoder(serialize(row))) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
@@ -0,0 +1,211 @@
+# ---------------------------------------------------------
+# 💬 Node Responses — Tiered Storage Policy
+# ---------------------------------------------------------
+# Small responses live inline on the node row (zlib-compressed in
+# `response_inline`), so reading them needs no second round trip. Larger ones
+# go to the content-addressed blob store (filesystem or S3) and only their
+# `sha256:` ref is kept on the row. `response_ref` is always a reference:
+#   inline:<sha256>   → bytes in `response_inline`
+#   sha256:<sha256>   → blob store
+#   pack:<project>:<sha256> → the project's packfile (after a repack released
+#                       the loose copy, see orchestration.packer)
+# Anything else is a legacy value (artifacts-dir file name or raw text)
+# that backfill_responses() normalizes.
+import asyncio
+import hashlib
+import os
+import zlib
+from sqlalchemy import select, update
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.database import WorkerSessionLocal
+from Backend.utils.blob_store import get_blob_store, is_blob_ref
+from Backend.utils.packfile import get_reader
+
+INLINE_REF_PREFIX = "inline:"
+PACK_REF_PREFIX = "pack:"
+
+# Legacy location of per-run output files (pre blob store)
+ARTIFACTS_DIR = "artifacts"
+
+
+# ---------------------------------------------------------
+# ✍️ Writes
+# ---------------------------------------------------------
+def store_response(text: str, inline: bool = False) -> dict:
+    """
+    Applies the size policy and returns the node column values
+    (`response_ref`, `response_inline`) — usable for ORM assignment
+    and for bulk UPDATE rows alike. `inline=True` keeps any size on the row
+    (partial text of a running stream, rewritten on every flush).
+    """
+    data = text.encode("utf-8")
+    if inline or len(data) <= settings.RESPONSE_INLINE_MAX_BYTES:
+        return {
+            "response_ref": INLINE_REF_PREFIX + hashlib.sha256(data).hexdigest(),
+            "response_inline": zlib.compress(data, settings.BLOB_COMPRESSION_LEVEL),
+        }
+    return {"response_ref": get_blob_store().put(data), "response_inline": None}
+
+
+def apply_response(node: models.Node, text: str):
+    for column, value in store_response(text).items():
+        setattr(node, column, value)
+    node.summary = None  # summarized a previous response
+
+
+async def aapply_response(node: models.Node, text: str, partial: bool = False):
+    """
+    apply_response for async routes: blob writes run off the event loop.
+    `partial` progress stays inline, so no blob is written for text that
+    is about to grow; the final save applies the size policy.
+    """
+    for column, value in (await asyncio.to_thread(store_response, text, partial)).items():
+        setattr(node, column, value)
+    node.summary = None
+
+
+class UnknownResponseRef(ValueError):
+    """A client-supplied blob/pack ref that is not stored content of the node's project."""
+
+
+def apply_response_value(db, node: models.Node, value: str):
+    """
+    Client-supplied `response_ref`: a blob or pack ref is kept only if it
+    resolves to content the node's project already stores — knowing a hash
+    must not grant someone else's output, and a dangling ref would fail every
+    later read. Such refs raise UnknownResponseRef; anything else is response text.
+    """
+    if is_blob_ref(value):
+        owned = db.execute(
+            select(models.Node.id)
+            .where(models.Node.project_id == node.project_id, models.Node.response_ref == value)
+            .limit(1)
+        ).first() is not None
+        if not (owned and get_blob_store().exists(value)):
+            raise UnknownResponseRef(f"{value} is not stored for this project")
+    elif is_pack_ref(value):
+        try:
+            project_id, digest = parse_pack_ref(value)
+        except ValueError:
+            raise UnknownResponseRef(f"{value} is not a valid pack ref")
+        if project_id != node.project_id or not _in_pack(project_id, digest):
+            raise UnknownResponseRef(f"{value} is not in this project's pack")
+    else:
+        apply_response(node, value)
+        return
+    node.response_ref, node.response_inline, node.summary = value, None, None
+
+
+# ---------------------------------------------------------
+# 📦 Packed Responses
+# ---------------------------------------------------------
+def pack_dir(project_id: int) -> str:
+    return os.path.join(settings.PACK_ROOT, f"project_{project_id}")
+
+
+def make_pack_ref(project_id: int, digest: str) -> str:
+    return f"{PACK_REF_PREFIX}{project_id}:{digest}"
+
+
+def is_pack_ref(ref: str | None) -> bool:
+    return bool(ref) and ref.startswith(PACK_REF_PREFIX)
+
+
+def parse_pack_ref(ref: str) -> tuple[int, str]:
+    project_id, _, digest = ref[len(PACK_REF_PREFIX):].partition(":")
+    return int(project_id), digest
+
+
+def _in_pack(project_id: int, digest: str) -> bool:
+    with get_reader(pack_dir(project_id)) as reader:
+        return reader is not None and reader.find(digest) is not None
+
+
+def read_packed(ref: str) -> str:
+    """Resolves a pack ref by content digest, so copies of a node's ref (merges) resolve too."""
+    project_id, digest = parse_pack_ref(ref)
+    with get_reader(pack_dir(project_id)) as reader:
+        node_id = reader.find(digest) if reader is not None else None
+        if node_id is None:
+            raise FileNotFoundError(f"{ref} is not in the project's pack")
+        return reader.read(node_id).decode("utf-8")
+
+
+# ---------------------------------------------------------
+# 📖 Reads
+# ---------------------------------------------------------
+def read_response(response_ref: str | None, response_inline: bytes | None = None) -> str:
+    """Resolves stored columns to text (inline, blob, or legacy file/raw text)."""
+    if response_inline is not None:
+        return zlib.decompress(response_inline).decode("utf-8")
+    if not response_ref:
+        return ""
+    if is_blob_ref(response_ref):
+        return get_blob_store().get_text(response_ref)
+    if is_pack_ref(response_ref):
+        return read_packed(response_ref)
+    path = os.path.join(ARTIFACTS_DIR, response_ref)
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    return response_ref
+
+
+def get_response(node: models.Node) -> str:
+    """The single accessor for a node's response text, wherever it is stored."""
+    return read_response(node.response_ref, node.response_inline)
+
+
+# ---------------------------------------------------------
+# 🧹 Backfill — normalize rows written before the policy
+# ---------------------------------------------------------
+def backfill_responses(batch_size: int = 500):
+    """
+    Background job: rewrites legacy `response_ref` values (raw text, artifacts
+    file names) and small blobs under the current policy, in id-ordered
+    batches with one bulk UPDATE each. Safe to re-run.
+    """
+    print("🧹 Normalizing stored node responses...")
+    db = WorkerSessionLocal()
+    last_id, scanned, rewritten = 0, 0, 0
+    try:
+        while True:
+            batch = db.execute(
+                select(models.Node.id, models.Node.response_ref)
+                .where(
+                    models.Node.id > last_id,
+                    models.Node.response_ref.isnot(None),
+                    models.Node.response_inline.is_(None),
+                    models.Node.response_ref.notlike(PACK_REF_PREFIX + "%"),  # already compacted
+                )
+                .order_by(models.Node.id)
+                .limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            rows = []
+            for node_id, ref in batch:
+                text = read_response(ref)
+                columns = store_response(text)
+                if columns["response_ref"] != ref:
+                    rows.append({"id": node_id, **columns})
+
+            if rows:
+                db.execute(update(models.Node), rows)
+                db.commit()
+                rewritten += len(rows)
+
+        print(f"✅ Responses normalized: {rewritten} of {scanned} rows rewritten.")
+        return {"scanned": scanned, "rewritten": rewritten}
+
+    except Exception as e:
+        print(f"❌ Response backfill error: {e}")
+        db.rollback()
+        return {"error": str(e)}
+
+    finally:
+        db.close()
@@ -1,28 +1,68 @@
 # ---------------------------------------------------------
-# 📦 Artifact Routes — Upload, List, Retrieve
+# 📦 Artifact Routes — Upload, Direct Upload/Download, List, Retrieve
 # ---------------------------------------------------------
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header, Request, status
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from fastapi.routing import APIRoute
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from Backend.app.database import get_db
-from Backend.app import models
-import boto3
-import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from Backend.app.database import get_db, get_async_db
+from Backend.app import models, schemas
+from Backend.app.orchestration.artifact_verifier import artifact_key, STAGING_PREFIX
+from Backend.app.pagination import keyset_page, ndjson_response
+from Backend.utils.disk_cache import get_artifact_cache
+from Backend.utils.storage import get_s3_client, get_presign_client, ensure_bucket
+from Backend.utils.s3_multipart import (
+    multipart_upload,
+    object_exists,
+    promote,
+    UploadTooLarge,
+    MIN_PART_SIZE,
+)
+import math
 import os
+import uuid
 from Backend.app.config import settings
 
-router = APIRouter(prefix="/artifacts", tags=["Artifacts"])
+
+# ---------------------------------------------------------
+# 📏 Upload Size Limit, Checked Before the Body Is Read
+# ---------------------------------------------------------
+# FastAPI spools a whole multipart body (UploadFile) before the endpoint
+# runs, so the declared Content-Length is checked up front instead.
+FORM_OVERHEAD_BYTES = 64 * 1024  # multipart boundaries and part headers
+
+
+class UploadLimitRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request):
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                length = request.headers.get("content-length")
+                if length is None:
+                    raise HTTPException(status_code=411, detail="Content-Length required.")
+                if not length.isdigit():
+                    raise HTTPException(status_code=400, detail="Invalid Content-Length.")
+                max_bytes = settings.ARTIFACT_MAX_UPLOAD_BYTES
+                if int(length) > max_bytes + FORM_OVERHEAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+            return await handler(request)
+
+        return limited_handler
+
+
+router = APIRouter(prefix="/artifacts", tags=["Artifacts"], route_class=UploadLimitRoute)
 
 
 # ---------------------------------------------------------
-# 🔗 Initialize MinIO Client
+# 🔗 Shared MinIO Clients (see utils.storage)
 # ---------------------------------------------------------
-s3_client = boto3.client(
-    "s3",
-    endpoint_url=settings.S3_ENDPOINT,
-    aws_access_key_id=settings.S3_ACCESS_KEY,
-    aws_secret_access_key=settings.S3_SECRET_KEY,
-    region_name="auto",
-)
+s3_client = get_s3_client()
+presign_client = get_presign_client()
 
 
 # ---------------------------------------------------------
@@ -32,66 +72,480 @@ s3_client = boto3.client(
 async def upload_artifact(
     node_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    sha256: str = None,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Uploads an artifact (file) and associates it with a Node.
-    Files are stored in MinIO and path is recorded in DB.
+
+    🔹 Streamed to MinIO as a multipart upload (parallel parts, off the event loop)
+    🔹 SHA-256 computed while streaming and stored on the Artifact row
+    🔹 Stored under a content-addressed key — identical bytes are kept once,
+       decided by the hash the server computed; a declared `sha256` that
+       does not match the bytes is rejected
+    🔹 Uploads over ARTIFACT_MAX_UPLOAD_BYTES are rejected with 413 — from
+       the Content-Length before the body is read, and again while streaming
     """
 
-    node = db.query(models.Node).filter(models.Node.id == node_id).first()
+    node = (
+        await db.execute(select(models.Node).where(models.Node.id == node_id))
+    ).scalar_one_or_none()
     if not node:
         raise HTTPException(status_code=404, detail="Node not found.")
 
-    # Generate unique file name
-    file_extension = file.filename.split(".")[-1]
-    file_name = f"{uuid.uuid4()}.{file_extension}"
-    s3_path = f"artifacts/{file_name}"
+    max_bytes = settings.ARTIFACT_MAX_UPLOAD_BYTES
+    if getattr(file, "size", None) and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+
+    bucket = await run_in_threadpool(ensure_bucket)
+    declared = sha256.lower() if sha256 else None
 
+    # No shortcut on a declared hash: knowing a hash must not grant its content.
+    # The bytes are always received; dedupe happens once they are hashed here.
+    staging_key = f"{STAGING_PREFIX}{uuid.uuid4()}"
     try:
-        # Upload to MinIO
-        s3_client.upload_fileobj(
-            file.file,
-            settings.S3_BUCKET,
-            s3_path,
-            ExtraArgs={"ContentType": file.content_type},
+        result = await multipart_upload(
+            s3_client,
+            bucket,
+            staging_key,
+            file.read,
+            part_size=settings.ARTIFACT_PART_SIZE_BYTES,
+            concurrency=settings.ARTIFACT_UPLOAD_CONCURRENCY,
+            max_bytes=max_bytes,
+            content_type=file.content_type,
         )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+    digest = result["sha256"]
+    try:
+        if declared and declared != digest:
+            await run_in_threadpool(s3_client.delete_object, Bucket=bucket, Key=staging_key)
+            raise HTTPException(status_code=400, detail="Checksum mismatch: the upload was corrupted.")
+
+        # Promote the staged object to its content key (or drop it if already there)
+        deduplicated = await object_exists(s3_client, bucket, artifact_key(digest))
+        if deduplicated:
+            await run_in_threadpool(s3_client.delete_object, Bucket=bucket, Key=staging_key)
+        else:
+            await promote(s3_client, bucket, staging_key, artifact_key(digest))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    return await _record_artifact(
+        db, node_id, digest, result["size"], file.content_type, deduplicated
+    )
+
+
+async def _record_artifact(
+    db: AsyncSession, node_id: int, digest: str, size: int | None, content_type: str, deduplicated: bool
+) -> dict:
     # Save record in DB
     artifact = models.Artifact(
         node_id=node_id,
-        file_path=s3_path,
-        file_type=file.content_type,
+        file_path=artifact_key(digest),
+        file_type=content_type,
+        sha256=digest,
+        size_bytes=size,
     )
     db.add(artifact)
-    db.commit()
-    db.refresh(artifact)
+    await db.commit()
+    await db.refresh(artifact)
 
     return {
         "message": "📦 Artifact uploaded successfully",
         "artifact_id": artifact.id,
-        "file_path": s3_path,
-        "file_type": file.content_type,
+        "file_path": artifact.file_path,
+        "file_type": content_type,
+        "sha256": digest,
+        "size_bytes": size,
+        "deduplicated": deduplicated,
     }
 
 
+# ---------------------------------------------------------
+# 🔏 Direct Upload via Presigned URLs (bytes bypass the API)
+# ---------------------------------------------------------
+@router.post("/presign/upload")
+async def presign_upload(
+    request: schemas.ArtifactUploadRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Issues presigned URLs so the client PUTs the file straight to MinIO.
+
+    🔹 Files up to one part: a presigned POST form whose policy limits the
+       object to the declared size — POST `fields` plus the file to `url`
+    🔹 Larger files: a multipart upload with one presigned URL per part —
+       PUT each part, keep the returned ETags, then call /presign/complete
+    🔹 The bytes are always uploaded: a declared `sha256` is only checked
+       by the verification job, never trusted for deduplication
+    """
+    node = (
+        await db.execute(select(models.Node).where(models.Node.id == request.node_id))
+    ).scalar_one_or_none()
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found.")
+    if request.size_bytes > settings.ARTIFACT_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"Upload exceeds {settings.ARTIFACT_MAX_UPLOAD_BYTES} bytes."
+        )
+
+    bucket = await run_in_threadpool(ensure_bucket)
+    key = f"{STAGING_PREFIX}{uuid.uuid4()}"
+    expires = settings.ARTIFACT_PRESIGN_EXPIRES_SECONDS
+    part_size = max(settings.ARTIFACT_PART_SIZE_BYTES, MIN_PART_SIZE)
+    content = {"ContentType": request.content_type} if request.content_type else {}
+
+    if request.size_bytes <= part_size:
+        # S3 enforces the policy: a larger body is refused before it is stored
+        conditions = [["content-length-range", 0, request.size_bytes]]
+        if request.content_type:
+            conditions.append({"Content-Type": request.content_type})
+        form = presign_client.generate_presigned_post(
+            bucket,
+            key,
+            Fields={"Content-Type": request.content_type} if request.content_type else None,
+            Conditions=conditions,
+            ExpiresIn=expires,
+        )
+        return {
+            "key": key,
+            "method": "POST",
+            "url": form["url"],
+            "fields": form["fields"],
+            "expires_in": expires,
+        }
+
+    try:
+        upload = await run_in_threadpool(
+            s3_client.create_multipart_upload, Bucket=bucket, Key=key, **content
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Could not start upload: {str(e)}")
+
+    parts = [
+        {
+            "part_number": number,
+            "url": presign_client.generate_presigned_url(
+                "upload_part",
+                Params={
+                    "Bucket": bucket,
+                    "Key": key,
+                    "UploadId": upload["UploadId"],
+                    "PartNumber": number,
+                },
+                ExpiresIn=expires,
+            ),
+        }
+        for number in range(1, math.ceil(request.size_bytes / part_size) + 1)
+    ]
+    return {
+        "key": key,
+        "method": "PUT",
+        "upload_id": upload["UploadId"],
+        "part_size": part_size,
+        "parts": parts,
+        "expires_in": expires,
+    }
+
+
+def _uploaded_bytes(bucket: str, key: str, upload_id: str) -> int:
+    pages = s3_client.get_paginator("list_parts").paginate(Bucket=bucket, Key=key, UploadId=upload_id)
+    return sum(part["Size"] for page in pages for part in page.get("Parts", []))
+
+
+@router.post("/presign/complete", status_code=status.HTTP_202_ACCEPTED)
+async def complete_presigned_upload(
+    request: schemas.ArtifactUploadComplete, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Completion callback for a direct upload: finishes the multipart upload
+    (if any), records the Artifact row and queues its checksum verification,
+    which promotes the object to its content-addressed key. A rejected
+    upload is deleted (or aborted) so nothing oversized or orphaned stays.
+    """
+    if not request.key.startswith(STAGING_PREFIX):
+        raise HTTPException(status_code=400, detail="Unknown upload key.")
+
+    bucket = settings.S3_BUCKET
+    max_bytes = settings.ARTIFACT_MAX_UPLOAD_BYTES
+
+    async def discard():
+        try:
+            if request.upload_id:
+                await run_in_threadpool(
+                    s3_client.abort_multipart_upload,
+                    Bucket=bucket, Key=request.key, UploadId=request.upload_id,
+                )
+            await run_in_threadpool(s3_client.delete_object, Bucket=bucket, Key=request.key)
+        except Exception as e:
+            print(f"⚠️ Could not discard rejected upload {request.key}: {e}")
+
+    node = (
+        await db.execute(select(models.Node).where(models.Node.id == request.node_id))
+    ).scalar_one_or_none()
+    if not node:
+        await discard()
+        raise HTTPException(status_code=404, detail="Node not found.")
+
+    try:
+        if request.upload_id:
+            # Parts are sized before assembly, so an oversized upload is never completed
+            if await run_in_threadpool(_uploaded_bytes, bucket, request.key, request.upload_id) > max_bytes:
+                await discard()
+                raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+            await run_in_threadpool(
+                s3_client.complete_multipart_upload,
+                Bucket=bucket,
+                Key=request.key,
+                UploadId=request.upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": p.part_number, "ETag": p.etag}
+                        for p in sorted(request.parts, key=lambda p: p.part_number)
+                    ]
+                },
+            )
+        head = await run_in_threadpool(s3_client.head_object, Bucket=bucket, Key=request.key)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Upload not found or incomplete: {str(e)}")
+
+    size = head["ContentLength"]
+    if size > max_bytes:
+        await discard()
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {max_bytes} bytes.")
+
+    artifact = models.Artifact(
+        node_id=request.node_id,
+        file_path=request.key,
+        file_type=request.content_type or head.get("ContentType"),
+        size_bytes=size,
+    )
+    db.add(artifact)
+    await db.commit()
+    await db.refresh(artifact)
+
+    # Lazy import: the queue connects to Redis on import
+    from Backend.app.worker.jobs import enqueue_artifact_verification
+
+    job = enqueue_artifact_verification(artifact.id, request.sha256)
+    return {
+        "message": "📦 Artifact recorded — verifying checksum",
+        "artifact_id": artifact.id,
+        "file_path": artifact.file_path,
+        "size_bytes": size,
+        "job_id": job.id,
+    }
+
+
+# ---------------------------------------------------------
+# 🔗 Presigned Download URL
+# ---------------------------------------------------------
+@router.get("/{artifact_id}/download-url")
+def artifact_download_url(artifact_id: int, db: Session = Depends(get_db)):
+    """Short-lived GET URL: the client downloads straight from MinIO."""
+    artifact = db.query(models.Artifact).filter(models.Artifact.id == artifact_id).first()
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+
+    params = {"Bucket": settings.S3_BUCKET, "Key": artifact.file_path}
+    if artifact.file_type:
+        params["ResponseContentType"] = artifact.file_type
+    expires = settings.ARTIFACT_PRESIGN_EXPIRES_SECONDS
+    return {
+        "artifact_id": artifact.id,
+        "url": presign_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires),
+        "expires_in": expires,
+    }
+
+
+# ---------------------------------------------------------
+# ⬇️ Download Artifact Content (Range / ETag, local read-through cache)
+# ---------------------------------------------------------
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Single `bytes=` range → inclusive (start, end); None serves the whole file.
+    Multi-range requests are answered with the whole file, as RFC 9110 allows.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable.",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+def _etag_matches(if_none_match: str | None, etag: str | None) -> bool:
+    if not if_none_match or not etag:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _read_s3(body):
+    try:
+        for chunk in iter(lambda: body.read(DOWNLOAD_CHUNK_BYTES), b""):
+            yield chunk
+    finally:
+        body.close()
+
+
+@router.get("/{artifact_id}/content")
+def download_artifact(
+    artifact_id: int,
+    range: str = Header(None),
+    if_none_match: str = Header(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Streams an artifact's bytes through the API.
+
+    🔹 `If-None-Match` against the ETag (the SHA-256 for checksummed
+       artifacts) answers 304 without touching storage; other artifacts use
+       S3's ETag, cached with the file so hits and misses send the same one
+    🔹 `Range: bytes=…` answers 206 with just that slice
+    🔹 Objects up to ARTIFACT_CACHE_MAX_OBJECT_BYTES are served as files from
+       the local on-disk LRU (filled from S3 on a miss); larger ones stream from S3
+    """
+    artifact = db.query(models.Artifact).filter(models.Artifact.id == artifact_id).first()
+    if not artifact:
+        raise HTTPException(status_code=404, detail="Artifact not found.")
+
+    etag = f'"{artifact.sha256}"' if artifact.sha256 else None
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cache = get_artifact_cache()
+    bucket, key = settings.S3_BUCKET, artifact.file_path
+    media_type = artifact.file_type or "application/octet-stream"
+
+    cached = cache.open(key)
+    hit = cached is not None
+    head = None
+    if not hit or (etag is None and cached[1] is None):
+        try:
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+        except Exception:
+            if not hit:
+                raise HTTPException(status_code=404, detail="Artifact content not found in storage.")
+
+    if hit:
+        # Same validator as on a miss: the S3 ETag is cached alongside the file
+        f, cached_etag = cached
+        etag = etag or cached_etag or (head or {}).get("ETag")
+        if _etag_matches(if_none_match, etag):
+            f.close()
+            return Response(status_code=304, headers={"ETag": etag})
+    else:
+        etag = etag or head.get("ETag")
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        size = head["ContentLength"]
+        if size > settings.ARTIFACT_CACHE_MAX_OBJECT_BYTES:
+            # Too big to cache: pass the range through to S3
+            byte_range = _parse_range(range, size) if range else None
+            params = {"Bucket": bucket, "Key": key}
+            if byte_range:
+                params["Range"] = f"bytes={byte_range[0]}-{byte_range[1]}"
+            obj = s3_client.get_object(**params)
+            headers = {"Accept-Ranges": "bytes", "Content-Length": str(obj["ContentLength"])}
+            if etag:
+                headers["ETag"] = etag
+            if byte_range:
+                headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{size}"
+            cache.record(False, obj["ContentLength"])
+            return StreamingResponse(
+                _read_s3(obj["Body"]),
+                status_code=206 if byte_range else 200,
+                media_type=media_type,
+                headers=headers,
+            )
+
+        f, _ = cache.fill(
+            key, lambda out: s3_client.download_fileobj(bucket, key, out), head.get("ETag")
+        )
+
+    stat = os.fstat(f.fileno())
+    try:
+        byte_range = _parse_range(range, stat.st_size) if range else None
+    except HTTPException:
+        f.close()
+        raise
+    start, end = byte_range or (0, stat.st_size - 1)
+    cache.record(hit, end - start + 1)
+
+    # FileResponse answers Range itself. It reads through /dev/fd, i.e. the
+    # file opened above, so an eviction meanwhile cannot cut the response short.
+    return FileResponse(
+        f"/dev/fd/{f.fileno()}",
+        stat_result=stat,
+        media_type=media_type,
+        headers={"ETag": etag} if etag else None,
+        background=BackgroundTask(f.close),
+    )
+
+
 # ---------------------------------------------------------
 # 📜 List All Artifacts for a Node
 # ---------------------------------------------------------
 @router.get("/node/{node_id}")
-def list_artifacts(node_id: int, db: Session = Depends(get_db)):
-    artifacts = db.query(models.Artifact).filter(models.Artifact.node_id == node_id).all()
-    if not artifacts:
+def list_artifacts(
+    node_id: int,
+    cursor: str = None,
+    limit: int = None,
+    format: str = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Lists a node's artifacts, oldest first, keyset-paginated on (created_at, id).
+    `format=ndjson` streams all of them instead.
+    """
+    query = select(models.Artifact).where(models.Artifact.node_id == node_id)
+
+    def serialize(a: models.Artifact) -> dict:
+        return {
+            "id": a.id,
+            "file_path": a.file_path,
+            "file_type": a.file_type,
+            "sha256": a.sha256,
+            "size_bytes": a.size_bytes,
+            "created_at": a.created_at,
+        }
+
+    if format == "ndjson":
+        return ndjson_response(query, models.Artifact, serialize, cursor)
+
+    artifacts, next_cursor = keyset_page(db, query, models.Artifact, cursor, limit)
+    if not artifacts and not cursor:
         raise HTTPException(status_code=404, detail="No artifacts found for this node.")
 
     return {
         "node_id": node_id,
-        "artifacts": [
-            {"id": a.id, "file_path": a.file_path, "file_type": a.file_type, "created_at": a.created_at}
-            for a in artifacts
-        ],
+        "artifacts": [serialize(a) for a in artifacts],
+        "next_cursor": next_cursor,
     }
 
 
@@ -108,6 +562,8 @@ def get_artifact(artifact_id: int, db: Session = Depends(get_db)):
         "id": artifact.id,
         "file_path": artifact.file_path,
         "file_type": artifact.file_type,
+        "sha256": artifact.sha256,
+        "size_bytes": artifact.size_bytes,
         "created_at": artifact.created_at,
         "node_id": artifact.node_id,
     }
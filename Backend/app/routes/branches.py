@@ -1,21 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import datetime
 from Backend.app.database import get_db
 from Backend.app import models, schemas
+from Backend.app.orchestration import merge
+from Backend.app.pagination import keyset_page, ndjson_response
 
 router = APIRouter(prefix="/branches", tags=["branches"])
 
 
 # ----------------------------------------------------------
-# 🧱 Create a new branch (user manually spawns it)
+# 🧱 Create a new branch, optionally forked at a base node
 # ----------------------------------------------------------
-@router.post("/", response_model=schemas.BranchRead)
+# Own path: `POST /branches/` belongs to the plain create in routes.projects
+@router.post("/fork", response_model=schemas.BranchRead)
 def create_branch(branch: schemas.BranchCreate, db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == branch.project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    # Forking only records the base node — history is inherited, never copied
+    if branch.base_node_id is not None:
+        base_node = db.query(models.Node).filter(models.Node.id == branch.base_node_id).first()
+        if not base_node or base_node.project_id != branch.project_id:
+            raise HTTPException(status_code=404, detail="Base node not found in this project")
+
     new_branch = models.Branch(
         name=branch.name,
         project_id=branch.project_id,
@@ -25,7 +36,11 @@ def create_branch(branch: schemas.BranchCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_branch)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Branch with this name already exists")
     db.refresh(new_branch)
     return new_branch
 
@@ -34,8 +49,30 @@ def create_branch(branch: schemas.BranchCreate, db: Session = Depends(get_db)):
 # 📜 List all branches for a project
 # ----------------------------------------------------------
 @router.get("/project/{project_id}", response_model=list[schemas.BranchRead])
-def list_project_branches(project_id: int, db: Session = Depends(get_db)):
-    branches = db.query(models.Branch).filter(models.Branch.project_id == project_id).all()
+def list_project_branches(
+    project_id: int,
+    response: Response,
+    cursor: str = None,
+    limit: int = None,
+    format: str = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Keyset-paginated on (created_at, id). The cursor for the next page is
+    returned in the `X-Next-Cursor` header; `format=ndjson` streams all rows.
+    """
+    query = select(models.Branch).where(models.Branch.project_id == project_id)
+    if format == "ndjson":
+        return ndjson_response(
+            query,
+            models.Branch,
+            lambda b: schemas.BranchRead.model_validate(b).model_dump(),
+            cursor,
+        )
+
+    branches, next_cursor = keyset_page(db, query, models.Branch, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return branches
 
 
@@ -51,23 +88,81 @@ def get_branch(branch_id: int, db: Session = Depends(get_db)):
 
 
 # ----------------------------------------------------------
-# 🔄 Merge a branch back into main (simplified logic)
+# 🔄 Merge a branch into its parent branch (or a chosen target)
 # ----------------------------------------------------------
 @router.post("/{branch_id}/merge")
-def merge_branch(branch_id: int, db: Session = Depends(get_db)):
+def merge_branch(
+    branch_id: int,
+    target_branch_id: int = None,
+    force: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Merges a branch's steps into the target branch (default: the branch its
+    base node lives on). Fast-forwards when possible, otherwise replays the
+    new steps onto the target head. Conflicting steps return 409 unless `force`.
+    """
     branch = db.query(models.Branch).filter(models.Branch.id == branch_id).first()
     if not branch:
         raise HTTPException(status_code=404, detail="Branch not found")
+    if branch.status == "merged":
+        raise HTTPException(status_code=400, detail="Branch is already merged")
+
+    if target_branch_id is None:
+        base_node = (
+            db.query(models.Node).filter(models.Node.id == branch.base_node_id).first()
+            if branch.base_node_id is not None
+            else None
+        )
+        if not base_node or base_node.branch_id is None:
+            raise HTTPException(
+                status_code=400, detail="Branch has no base branch; pass target_branch_id"
+            )
+        target_branch_id = base_node.branch_id
+
+    target = db.query(models.Branch).filter(models.Branch.id == target_branch_id).first()
+    if not target:
+        raise HTTPException(status_code=404, detail="Target branch not found")
+    if target.id == branch.id or target.project_id != branch.project_id:
+        raise HTTPException(status_code=400, detail="Invalid merge target")
+
+    try:
+        result = merge.merge_branches(db, branch, target, force=force)
+    except merge.MergeConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Merge conflicts detected", "conflicts": e.conflicts},
+        )
+
+    return {
+        "detail": f"Branch '{branch.name}' successfully merged into '{target.name}'.",
+        **result,
+    }
 
-    # mark branch as merged
-    branch.status = "merged"
-    db.commit()
 
-    # ✨ Later — you can add:
-    # - merge logic to bring node updates into the main branch
-    # - RL or revision history capture here
+# ----------------------------------------------------------
+# ⚡ Execute every node of a branch in the background worker
+# ----------------------------------------------------------
+@router.post("/{branch_id}/execute", status_code=202)
+def execute_branch(
+    branch_id: int,
+    max_concurrency: int = None,
+    force: bool = False,
+    db: Session = Depends(get_db),
+):
+    """
+    Runs only the nodes whose prompt or upstream output changed since their
+    last successful run (and any failed ones). `force=true` re-runs all nodes.
+    """
+    branch = db.query(models.Branch).filter(models.Branch.id == branch_id).first()
+    if not branch:
+        raise HTTPException(status_code=404, detail="Branch not found")
+
+    # Lazy import: the job queue needs Redis, the rest of the API does not
+    from Backend.app.worker.jobs import enqueue_branch_execution
 
-    return {"detail": f"Branch '{branch.name}' successfully merged into main."}
+    job = enqueue_branch_execution(branch_id, max_concurrency, force)
+    return {"detail": f"Branch '{branch.name}' queued for execution.", "job_id": job.id}
 
 
 # ----------------------------------------------------------
@@ -2,45 +2,41 @@
 # 🧠 Lucid Reasoning Engine — Gemini 2.5 Pro Integration
 # ---------------------------------------------------------
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from Backend.app.database import get_db
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from Backend.app.database import get_async_db, AsyncSessionLocal
 from Backend.app import models
 from Backend.app.config import settings
-import google.generativeai as genai
+from Backend.app.context import abuild_context
+from Backend.app.responses import aapply_response
+from Backend.app.search import index_node
+from Backend.utils.llm_router import acall_chat_completion, astream_chat_completion
+import asyncio
+import json
+import time
 
 router = APIRouter(prefix="/engine", tags=["Intelligent Engine"])
 
 
 # ---------------------------------------------------------
-# 🔗 Initialize Gemini Client
+# ✅ Shared Validation + Node Placeholder
 # ---------------------------------------------------------
-genai.configure(api_key=settings.GEMINI_API_KEY)
-
-
-# ---------------------------------------------------------
-# 🧠 Generate a Response for a Prompt and Save as Node
-# ---------------------------------------------------------
-@router.post("/generate")
-async def generate_response(
-    project_id: int,
-    branch_id: int = None,
-    parent_id: int = None,
-    prompt: str = None,
-    db: Session = Depends(get_db),
-):
-    """
-    Takes user prompt → queries Gemini 2.5 → saves as Node (prompt+response).
-    Works like ChatGPT, but all reasoning is versioned in Lucid.
-    """
-
+async def _create_running_node(
+    db: AsyncSession, project_id: int, branch_id: int, parent_id: int, prompt: str
+) -> models.Node:
     # ✅ Validate project
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    project = (
+        await db.execute(select(models.Project).where(models.Project.id == project_id))
+    ).scalar_one_or_none()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found.")
 
     # ✅ Validate branch if provided
     if branch_id:
-        branch = db.query(models.Branch).filter(models.Branch.id == branch_id).first()
+        branch = (
+            await db.execute(select(models.Branch).where(models.Branch.id == branch_id))
+        ).scalar_one_or_none()
         if not branch:
             raise HTTPException(status_code=404, detail="Branch not found.")
 
@@ -54,23 +50,46 @@ async def generate_response(
         status=models.NodeStatus.running,
     )
     db.add(node)
-    db.commit()
-    db.refresh(node)
+    await db.run_sync(lambda session: index_node(session, node, ""))
+    await db.commit()
+    await db.refresh(node)
+    return node
+
+
+# ---------------------------------------------------------
+# 🧠 Generate a Response for a Prompt and Save as Node
+# ---------------------------------------------------------
+@router.post("/generate")
+async def generate_response(
+    project_id: int,
+    branch_id: int = None,
+    parent_id: int = None,
+    prompt: str = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Takes user prompt → queries Gemini 2.5 → saves as Node (prompt+response).
+    Works like ChatGPT, but all reasoning is versioned in Lucid.
+    """
+    node = await _create_running_node(db, project_id, branch_id, parent_id, prompt)
 
     try:
         # ---------------------------------------------------------
-        # 💬 Call Gemini 2.5 Pro
+        # 💬 Call Gemini 2.5 Pro (async router, never blocks the loop)
         # ---------------------------------------------------------
-        model = genai.GenerativeModel("gemini-2.0-pro")  # or "gemini-2.5-pro"
-        response = model.generate_content(prompt)
+        context = await abuild_context(db, parent_id, prompt)
+        result = await acall_chat_completion(context)
+        if "raw" not in result:
+            # Router reports provider failures as text without a raw payload
+            raise RuntimeError(result.get("text", "No response"))
 
-        ai_response = response.text.strip() if hasattr(response, "text") else str(response)
+        ai_response = result["text"]
 
         # ✅ Update Node
-        node.response_ref = ai_response
+        await aapply_response(node, ai_response)
         node.status = models.NodeStatus.completed
-        db.commit()
-        db.refresh(node)
+        await db.run_sync(lambda session: index_node(session, node, ai_response))
+        await db.commit()
 
         return {
             "message": "🤖 Gemini reasoning step completed.",
@@ -81,5 +100,100 @@ async def generate_response(
 
     except Exception as e:
         node.status = models.NodeStatus.failed
-        db.commit()
+        await db.commit()
         raise HTTPException(status_code=500, detail=f"Gemini generation failed: {str(e)}")
+
+
+# ---------------------------------------------------------
+# 🌊 Stream a Response (SSE) and Persist It as It Arrives
+# ---------------------------------------------------------
+# Generation runs in a background task that owns the node, so a client
+# disconnect only stops the event stream — the node still finishes and
+# keeps everything generated so far.
+_generation_tasks: set = set()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _save_stream_progress(node_id: int, text: str, status: models.NodeStatus | None = None):
+    async with AsyncSessionLocal() as db:
+        node = (
+            await db.execute(select(models.Node).where(models.Node.id == node_id))
+        ).scalar_one_or_none()
+        if node:
+            # Only the final save may offload to the blob store: each flush
+            # carries the whole text so far, and a blob per flush would pile up
+            await aapply_response(node, text, partial=status is None)
+            if status:
+                # Index once the text is final, not on every flush
+                node.status = status
+                await db.run_sync(lambda session: index_node(session, node, text))
+            await db.commit()
+
+
+async def _stream_into_node(node_id: int, parent_id: int, prompt: str, queue: asyncio.Queue):
+    chunks = []
+    last_flush = time.monotonic()
+    flushed_len = 0
+    try:
+        # Built here so a failing context build still ends the node and the stream
+        async with AsyncSessionLocal() as db:
+            context = await abuild_context(db, parent_id, prompt)
+            await db.commit()  # newly cached summaries
+
+        async for delta in astream_chat_completion(context):
+            chunks.append(delta)
+            queue.put_nowait(("token", {"text": delta}))
+
+            # Append to the node in batches, not once per token
+            if time.monotonic() - last_flush >= settings.STREAM_FLUSH_INTERVAL_SECONDS:
+                text = "".join(chunks)
+                if len(text) != flushed_len:
+                    await _save_stream_progress(node_id, text)
+                    flushed_len = len(text)
+                last_flush = time.monotonic()
+
+        text = "".join(chunks).strip()
+        await _save_stream_progress(node_id, text, models.NodeStatus.completed)
+        queue.put_nowait(("done", {"node_id": node_id, "status": "completed"}))
+
+    except Exception as e:
+        await _save_stream_progress(node_id, "".join(chunks), models.NodeStatus.failed)
+        queue.put_nowait(("error", {"node_id": node_id, "detail": str(e)}))
+
+
+@router.post("/generate/stream")
+async def generate_response_stream(
+    project_id: int,
+    branch_id: int = None,
+    parent_id: int = None,
+    prompt: str = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Streaming variant of /engine/generate.
+    Emits Server-Sent Events: `start`, one `token` per delta, then `done` or `error`.
+    """
+    node = await _create_running_node(db, project_id, branch_id, parent_id, prompt)
+    node_id = node.id
+
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_stream_into_node(node_id, parent_id, prompt, queue))
+    _generation_tasks.add(task)
+    task.add_done_callback(_generation_tasks.discard)
+
+    async def event_stream():
+        yield _sse("start", {"node_id": node_id})
+        while True:
+            event, data = await queue.get()
+            yield _sse(event, data)
+            if event in ("done", "error"):
+                break
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
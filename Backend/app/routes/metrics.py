@@ -0,0 +1,67 @@
+# ---------------------------------------------------------
+# 📊 Metrics Routes — Runtime Counters for Tuning
+# ---------------------------------------------------------
+from fastapi import APIRouter
+from Backend.app.database import pool_metrics
+from Backend.utils import llm_cache, llm_hedging, llm_resilience
+from Backend.utils.disk_cache import get_artifact_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# ---------------------------------------------------------
+# LLM Response Cache Hit / Miss Counters
+# ---------------------------------------------------------
+@router.get("/llm-cache")
+def llm_cache_metrics():
+    """
+    Per-process counters for the LLM response cache.
+    Scrape every API process to get fleet-wide totals.
+    """
+    return llm_cache.cache_stats()
+
+
+# ---------------------------------------------------------
+# LLM Providers — rate limiter waits, retries, circuit breakers
+# ---------------------------------------------------------
+@router.get("/llm-providers")
+async def llm_provider_metrics():
+    """
+    Per-process call counters and limiter wait times per provider, plus the
+    fleet-wide breaker state ('closed', 'open', 'half_open') from Redis.
+    """
+    return await llm_resilience.provider_stats()
+
+
+# ---------------------------------------------------------
+# LLM Hedged Requests — how often hedges fire and win
+# ---------------------------------------------------------
+@router.get("/llm-hedging")
+def llm_hedging_metrics():
+    """
+    Per-process hedge counters: `fire_rate` (share of requests that sent a
+    second call), `win_rate` (share of hedges the secondary won), hedges
+    skipped by the cost cap, and the current per-provider hedge delay.
+    """
+    return llm_hedging.hedge_stats()
+
+
+# ---------------------------------------------------------
+# DB Connection Pools (API / worker / async API roles)
+# ---------------------------------------------------------
+@router.get("/db-pool")
+def db_pool_metrics():
+    """
+    Live pool state (checked out, overflow) and checkout wait times per role.
+    Rising `wait_ms_max` or any `timeouts` means the pool is undersized.
+    """
+    return pool_metrics()
+
+
+# ---------------------------------------------------------
+# Artifact Download Cache (local on-disk LRU)
+# ---------------------------------------------------------
+@router.get("/artifact-cache")
+def artifact_cache_metrics():
+    """Hit ratio and bytes served from local disk vs fetched from S3 (counters per process, size shared)."""
+    return get_artifact_cache().stats()
@@ -5,6 +5,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from Backend.app.database import get_db
 from Backend.app import models
+from Backend.app import tree
+from Backend.app.tree import get_lineage
+from Backend.app.responses import apply_response_value, get_response, UnknownResponseRef
+from Backend.app.search import index_node
+from Backend.app import similarity
+from Backend.app.context import count_tokens, preview_context
+from Backend.app.pagination import keyset_page, ndjson_response, parse_fields, with_columns
 
 router = APIRouter(prefix="/nodes", tags=["Nodes"])
 
@@ -35,44 +42,79 @@ def create_node(
         if not branch:
             raise HTTPException(status_code=404, detail="Branch not found.")
 
+        # Forked branches continue from their own head, or from the fork point
+        if parent_id is None and branch.base_node_id is not None:
+            parent_id = tree.get_branch_head(db, branch)
+
     node = models.Node(
         project_id=project_id,
         branch_id=branch_id,
         parent_id=parent_id,
         title=title,
         prompt=prompt,
-        response_ref=response_ref,
         status=models.NodeStatus.pending,
     )
+    if response_ref:
+        try:
+            apply_response_value(db, node, response_ref)
+        except UnknownResponseRef as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
     db.add(node)
+    index_node(db, node)
     db.commit()
     db.refresh(node)
     return {"message": "🧠 Node created successfully", "node_id": node.id}
 
 
 # ---------------------------------------------------------
-# Get All Nodes in a Branch
+# Get All Nodes in a Branch (keyset-paginated)
 # ---------------------------------------------------------
+BRANCH_NODE_FIELDS = (
+    "id", "title", "prompt", "response_ref", "status", "created_at", "parent_id", "inherited",
+)
+
+
 @router.get("/branch/{branch_id}")
-def get_nodes_in_branch(branch_id: int, db: Session = Depends(get_db)):
-    nodes = db.query(models.Node).filter(models.Node.branch_id == branch_id).all()
-    if not nodes:
+def get_nodes_in_branch(
+    branch_id: int,
+    include_inherited: bool = True,
+    cursor: str = None,
+    limit: int = None,
+    fields: str = None,
+    format: str = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Lists a branch's nodes, oldest first. Forked branches also include the
+    history they inherit from their base node (flagged `inherited`).
+
+    🔹 `cursor` / `limit` — keyset pagination on (created_at, id); pass the
+       returned `next_cursor` to get the following page
+    🔹 `fields` — comma-separated projection, e.g. `id,title,status` to omit prompts
+    🔹 `format=ndjson` — stream every node as one JSON line (flat memory)
+    """
+    selected = parse_fields(fields, BRANCH_NODE_FIELDS, BRANCH_NODE_FIELDS)
+    query = with_columns(
+        tree.branch_nodes_query(branch_id, include_inherited), models.Node, selected + ("branch_id",)
+    )
+
+    def serialize(n: models.Node) -> dict:
+        row = {f: getattr(n, f) for f in selected if f != "inherited"}
+        if "inherited" in selected:
+            row["inherited"] = n.branch_id != branch_id
+        return row
+
+    if format == "ndjson":
+        return ndjson_response(query, models.Node, serialize, cursor)
+
+    nodes, next_cursor = keyset_page(db, query, models.Node, cursor, limit)
+    if not nodes and not cursor:
         raise HTTPException(status_code=404, detail="No nodes found in this branch.")
     return {
         "branch_id": branch_id,
-        "nodes": [
-            {
-                "id": n.id,
-                "title": n.title,
-                "prompt": n.prompt,
-                "response_ref": n.response_ref,
-                "status": n.status,
-                "created_at": n.created_at,
-                "parent_id": n.parent_id,
-            }
-            for n in nodes
-        ],
+        "nodes": [serialize(n) for n in nodes],
+        "next_cursor": next_cursor,
     }
 
 
@@ -89,6 +131,7 @@ def get_node(node_id: int, db: Session = Depends(get_db)):
         "title": node.title,
         "prompt": node.prompt,
         "response_ref": node.response_ref,
+        "response": get_response(node),
         "status": node.status,
         "created_at": node.created_at,
         "project_id": node.project_id,
@@ -97,6 +140,127 @@ def get_node(node_id: int, db: Session = Depends(get_db)):
     }
 
 
+# ---------------------------------------------------------
+# Get the Root → Node Lineage (prompts + responses)
+# ---------------------------------------------------------
+@router.get("/{node_id}/lineage")
+def get_node_lineage(node_id: int, max_depth: int = None, db: Session = Depends(get_db)):
+    """
+    Returns the full conversation path from the root down to this node,
+    fetched with one recursive query. `max_depth` caps the number of ancestors.
+    """
+    lineage = get_lineage(db, node_id, max_depth)
+    if not lineage:
+        raise HTTPException(status_code=404, detail="Node not found.")
+    return {
+        "node_id": node_id,
+        "depth": len(lineage) - 1,
+        "lineage": [
+            {
+                "id": n.id,
+                "title": n.title,
+                "prompt": n.prompt,
+                "response": get_response(n),
+                "status": n.status,
+                "created_at": n.created_at,
+                "branch_id": n.branch_id,
+                "parent_id": n.parent_id,
+            }
+            for n in lineage
+        ],
+    }
+
+
+# ---------------------------------------------------------
+# Preview the Packed LLM Context for a Node
+# ---------------------------------------------------------
+@router.get("/{node_id}/context")
+def get_node_context(node_id: int, db: Session = Depends(get_db)):
+    """
+    Preview of the prompt this node is sent with: its lineage packed into
+    the token budget (recent steps verbatim, older ones summarized).
+    Read-only — summaries not cached yet are shown as excerpts
+    (`pending_summaries`) and computed on the next execution.
+    """
+    node = db.query(models.Node).filter(models.Node.id == node_id).first()
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found.")
+    context, pending = preview_context(db, node.parent_id, node.prompt)
+    return {
+        "node_id": node_id,
+        "tokens": count_tokens(context),
+        "pending_summaries": pending,
+        "context": context,
+    }
+
+
+# ---------------------------------------------------------
+# Subtree / Ancestry Queries (closure-table index)
+# ---------------------------------------------------------
+def _tree_entry(n: models.Node, depth: int) -> dict:
+    return {
+        "id": n.id,
+        "title": n.title,
+        "status": n.status,
+        "depth": depth,
+        "parent_id": n.parent_id,
+        "branch_id": n.branch_id,
+        "created_at": n.created_at,
+    }
+
+
+@router.get("/{node_id}/descendants")
+def get_node_descendants(
+    node_id: int,
+    max_depth: int = None,
+    limit: int = None,
+    db: Session = Depends(get_db),
+):
+    """All nodes below this one (optionally depth-limited), shallowest first."""
+    rows = tree.get_descendants(db, node_id, max_depth=max_depth, limit=limit)
+    return {"node_id": node_id, "descendants": [_tree_entry(n, d) for n, d in rows]}
+
+
+@router.get("/{node_id}/ancestors")
+def get_node_ancestors(node_id: int, db: Session = Depends(get_db)):
+    """All ancestors of this node, root first."""
+    rows = tree.get_ancestors(db, node_id)
+    return {"node_id": node_id, "ancestors": [_tree_entry(n, d) for n, d in rows]}
+
+
+@router.get("/{node_id}/subtree/count")
+def count_node_subtree(node_id: int, db: Session = Depends(get_db)):
+    """Number of nodes under this fork (excluding the node itself)."""
+    return {"node_id": node_id, "descendant_count": tree.count_descendants(db, node_id)}
+
+
+@router.get("/{ancestor_id}/is-ancestor-of/{descendant_id}")
+def check_ancestry(ancestor_id: int, descendant_id: int, db: Session = Depends(get_db)):
+    return {
+        "ancestor_id": ancestor_id,
+        "descendant_id": descendant_id,
+        "is_ancestor": tree.is_ancestor(db, ancestor_id, descendant_id),
+    }
+
+
+# ---------------------------------------------------------
+# Semantically Similar Nodes (across projects)
+# ---------------------------------------------------------
+@router.get("/{node_id}/similar")
+def get_similar_nodes(node_id: int, k: int = 10, project_id: int = None, db: Session = Depends(get_db)):
+    node = db.query(models.Node).filter(models.Node.id == node_id).first()
+    if not node:
+        raise HTTPException(status_code=404, detail="Node not found.")
+
+    vector = similarity.get_vector_index().vector_of(node_id)
+    if vector is None:
+        text = similarity.node_text(node.title, node.prompt, get_response(node))
+        vector = similarity.get_embedder()([text])[0]
+
+    hits = similarity.similar_to_vector(vector, min(k, 100), project_id, exclude=node_id)
+    return {"node_id": node_id, "similar": similarity.describe_hits(db, hits)}
+
+
 # ---------------------------------------------------------
 # Update Node Status or Response
 # ---------------------------------------------------------
@@ -114,7 +278,11 @@ def update_node(
     if status:
         node.status = status
     if response_ref:
-        node.response_ref = response_ref
+        try:
+            apply_response_value(db, node, response_ref)
+        except UnknownResponseRef as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        index_node(db, node)
 
     db.commit()
     db.refresh(node)
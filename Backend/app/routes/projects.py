@@ -2,9 +2,12 @@
 # 🌿 Branch Routes — Create, List, Get, Delete
 # ---------------------------------------------------------
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from Backend.app.database import get_db
 from Backend.app import models
+from Backend.app.pagination import keyset_page, ndjson_response
 
 router = APIRouter(prefix="/branches", tags=["Branches"])
 
@@ -22,18 +25,14 @@ def create_branch(project_id: int, name: str, db: Session = Depends(get_db)):
     if not project:
         raise HTTPException(status_code=404, detail="Project not found.")
 
-    # Prevent duplicate branch names in same project
-    existing = (
-        db.query(models.Branch)
-        .filter(models.Branch.project_id == project_id, models.Branch.name == name)
-        .first()
-    )
-    if existing:
-        raise HTTPException(status_code=400, detail="Branch with this name already exists.")
-
+    # Duplicate names are rejected by the unique (project_id, name) index
     branch = models.Branch(project_id=project_id, name=name)
     db.add(branch)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Branch with this name already exists.")
     db.refresh(branch)
 
     return {"message": "🌿 Branch created successfully", "branch_id": branch.id}
@@ -43,17 +42,33 @@ def create_branch(project_id: int, name: str, db: Session = Depends(get_db)):
 # List All Branches in a Project
 # ---------------------------------------------------------
 @router.get("/{project_id}")
-def list_branches(project_id: int, db: Session = Depends(get_db)):
-    branches = db.query(models.Branch).filter(models.Branch.project_id == project_id).all()
-    if not branches:
+def list_branches(
+    project_id: int,
+    cursor: str = None,
+    limit: int = None,
+    format: str = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Lists a project's branches, oldest first, keyset-paginated on (created_at, id).
+    `format=ndjson` streams all of them instead.
+    """
+    query = select(models.Branch).where(models.Branch.project_id == project_id)
+
+    def serialize(b: models.Branch) -> dict:
+        return {"id": b.id, "name": b.name, "status": b.status, "created_at": b.created_at}
+
+    if format == "ndjson":
+        return ndjson_response(query, models.Branch, serialize, cursor)
+
+    branches, next_cursor = keyset_page(db, query, models.Branch, cursor, limit)
+    if not branches and not cursor:
         raise HTTPException(status_code=404, detail="No branches found for this project.")
 
     return {
         "project_id": project_id,
-        "branches": [
-            {"id": b.id, "name": b.name, "status": b.status, "created_at": b.created_at}
-            for b in branches
-        ],
+        "branches": [serialize(b) for b in branches],
+        "next_cursor": next_cursor,
     }
 
 
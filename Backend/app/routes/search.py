@@ -0,0 +1,74 @@
+# ---------------------------------------------------------
+# 🔎 Search Routes — Full-Text Search over Nodes
+# ---------------------------------------------------------
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from Backend.app.database import get_db
+from Backend.app import models
+from Backend.app.pagination import page_size
+from Backend.app.search import search_nodes
+from Backend.app.similarity import similar_to_text, describe_hits
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+@router.get("/")
+def search(
+    q: str,
+    project_id: int,
+    branch_id: int = None,
+    cursor: str = None,
+    limit: int = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Ranked full-text search over node titles, prompts and responses,
+    scoped to a project (and optionally one branch).
+
+    🔹 Titles weigh most, then prompts, then responses
+    🔹 `snippet` highlights matches with <mark>…</mark>
+    🔹 `cursor` / `limit` — keyset pagination on (score, node_id)
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty.")
+
+    hits, next_cursor = search_nodes(db, q, project_id, branch_id, cursor, page_size(limit))
+
+    # Node metadata for the page in one query
+    nodes = {
+        n.id: n
+        for n in db.query(
+            models.Node.id, models.Node.title, models.Node.branch_id, models.Node.status, models.Node.created_at
+        )
+        .filter(models.Node.id.in_([h["node_id"] for h in hits]))
+    }
+    results = []
+    for hit in hits:
+        node = nodes.get(hit["node_id"])
+        if node is None:
+            continue
+        results.append({
+            **hit,
+            "title": node.title,
+            "branch_id": node.branch_id,
+            "status": node.status,
+            "created_at": node.created_at,
+        })
+
+    return {"query": q, "project_id": project_id, "results": results, "next_cursor": next_cursor}
+
+
+# ---------------------------------------------------------
+# 🧭 Semantically Similar Steps (e.g. before running a prompt)
+# ---------------------------------------------------------
+@router.get("/similar")
+def search_similar(q: str, k: int = 10, project_id: int = None, db: Session = Depends(get_db)):
+    """
+    Nodes whose text is closest to `q` (cosine similarity of embeddings),
+    across all projects unless `project_id` is given. A high score on a
+    completed node means the work has likely been done already.
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty.")
+    return {"query": q, "results": describe_hits(db, similar_to_text(q, min(k, 100), project_id))}
+
@@ -80,7 +80,30 @@ class ArtifactRead(BaseModel):
     node_id: int
     file_path: str
     file_type: str
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class ArtifactUploadRequest(BaseModel):
+    node_id: int
+    size_bytes: int
+    content_type: Optional[str] = None
+    sha256: Optional[str] = None
+
+
+class ArtifactUploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class ArtifactUploadComplete(BaseModel):
+    node_id: int
+    key: str
+    upload_id: Optional[str] = None
+    parts: List[ArtifactUploadPart] = []
+    content_type: Optional[str] = None
+    sha256: Optional[str] = None
@@ -0,0 +1,284 @@
+# ---------------------------------------------------------
+# 🔎 Full-Text Search over Node Titles, Prompts and Responses
+# ---------------------------------------------------------
+# A `node_search` side table keeps the nodes table slim:
+#   Postgres → weighted tsvector column + GIN index, ts_rank_cd / ts_headline
+#   SQLite   → FTS5 virtual table, bm25 / snippet
+# Rows are written by index_node()/index_nodes() at every place that sets a
+# node's prompt or response, in the same transaction as the node itself.
+# The same calls keep the semantic vector index (app.similarity) current —
+# but only once that transaction commits, and in the RQ worker: a rolled-back
+# write leaves no vector behind, and neither the embedder nor the index write
+# runs inside a request (or on the event loop, via run_sync).
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from rq import get_current_job
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.database import WorkerSessionLocal
+from Backend.app.responses import get_response
+from Backend.app.similarity import index_embeddings, node_text
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def _clip(value: str | None) -> str:
+    return (value or "")[: settings.SEARCH_MAX_DOCUMENT_CHARS]
+
+
+# ---------------------------------------------------------
+# ✍️ Incremental Indexing
+# ---------------------------------------------------------
+PG_UPSERT_SQL = text("""
+    INSERT INTO node_search (node_id, project_id, content, document)
+    VALUES (
+        :node_id, :project_id,
+        concat_ws(E'\\n\\n', :title, :prompt, :response),
+        setweight(to_tsvector(CAST(:language AS regconfig), :title), 'A')
+        || setweight(to_tsvector(CAST(:language AS regconfig), :prompt), 'B')
+        || setweight(to_tsvector(CAST(:language AS regconfig), :response), 'C')
+    )
+    ON CONFLICT (node_id) DO UPDATE
+    SET content = EXCLUDED.content, document = EXCLUDED.document
+""")
+
+FTS_DELETE_SQL = text("DELETE FROM node_search WHERE node_id = :node_id")
+FTS_INSERT_SQL = text("""
+    INSERT INTO node_search (title, prompt, response, node_id, project_id)
+    VALUES (:title, :prompt, :response, :node_id, :project_id)
+""")
+
+
+def index_node(db: Session, node: models.Node, response: str | None = None):
+    """
+    (Re)indexes one node. Pass `response` when the text is already at hand
+    to skip reading it back from storage.
+    """
+    _defer_embeddings(db, [_index_text(db, node, response)])
+
+
+def _index_text(db: Session, node: models.Node, response: str | None) -> dict:
+    if node.id is None:
+        db.flush()
+    if response is None:
+        response = get_response(node)
+    row = {
+        "node_id": node.id,
+        "project_id": node.project_id,
+        "title": _clip(node.title),
+        "prompt": _clip(node.prompt),
+        "response": _clip(response),
+    }
+    if _dialect(db) == "postgresql":
+        db.execute(PG_UPSERT_SQL, {**row, "language": settings.SEARCH_LANGUAGE})
+    else:
+        db.execute(FTS_DELETE_SQL, {"node_id": node.id})
+        db.execute(FTS_INSERT_SQL, row)
+    return row
+
+
+def index_nodes(db: Session, node_ids: list[int], responses: dict[int, str] | None = None):
+    """Bulk variant for executors and merges: one SELECT for the whole batch."""
+    if not node_ids:
+        return
+    responses = responses or {}
+    _defer_embeddings(db, [
+        _index_text(db, node, responses.get(node.id))
+        for node in db.query(models.Node).filter(models.Node.id.in_(node_ids))
+    ])
+
+
+# ---------------------------------------------------------
+# 🧬 Embeddings — written after commit, by the worker
+# ---------------------------------------------------------
+PENDING_EMBEDDINGS = "pending_embeddings"  # Session.info key: node id → row
+_embed_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+
+def _defer_embeddings(db: Session, rows: list[dict]):
+    pending = db.info.setdefault(PENDING_EMBEDDINGS, {})
+    for r in rows:
+        # A later write of the same node in this transaction wins
+        pending[r["node_id"]] = (
+            r["node_id"], r["project_id"], node_text(r["title"], r["prompt"], r["response"])
+        )
+
+
+def _hand_off(rows: list[tuple]):
+    # The worker embeds; without Redis (dev, tests) or when it is down, this thread does
+    if settings.REDIS_URL:
+        try:
+            from Backend.app.worker.jobs import enqueue_embeddings
+
+            enqueue_embeddings(rows)
+            return
+        except Exception as e:
+            print(f"⚠️ Could not queue {len(rows)} embedding(s), indexing here: {e}")
+    index_embeddings(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _embed_committed(session: Session):
+    pending = session.info.pop(PENDING_EMBEDDINGS, None)
+    if not pending:
+        return
+    if get_current_job() is not None:
+        # Already in the background — and an RQ work horse exits without
+        # joining threads, so a handed-off batch could be lost
+        index_embeddings(list(pending.values()))
+    else:
+        # Enqueueing is network I/O too: never on the committing thread
+        _embed_executor.submit(_hand_off, list(pending.values()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back(session: Session):
+    session.info.pop(PENDING_EMBEDDINGS, None)
+
+
+# ---------------------------------------------------------
+# 🧭 Ranked Search with Keyset Pagination on (score, node_id)
+# ---------------------------------------------------------
+def _encode_cursor(score: float, node_id: int) -> str:
+    raw = json.dumps([score, node_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        score, node_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), int(node_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+# Ranking happens on the GIN-matched rows; headlines only for the page
+PG_SEARCH_SQL = """
+    WITH query AS (SELECT websearch_to_tsquery(CAST(:language AS regconfig), :q) AS q),
+    hits AS (
+        SELECT s.node_id, CAST(ts_rank_cd(s.document, query.q) AS FLOAT8) AS score
+        FROM node_search s
+        JOIN query ON s.document @@ query.q
+        JOIN nodes n ON n.id = s.node_id
+        WHERE s.project_id = :project_id {branch_filter}
+    ),
+    page AS (
+        SELECT node_id, score FROM hits
+        WHERE {after}
+        ORDER BY score DESC, node_id
+        LIMIT :limit
+    )
+    SELECT page.node_id, page.score,
+           ts_headline(CAST(:language AS regconfig), s.content, query.q, :headline_options) AS snippet
+    FROM page
+    JOIN node_search s ON s.node_id = page.node_id
+    CROSS JOIN query
+    ORDER BY page.score DESC, page.node_id
+"""
+
+FTS_SEARCH_SQL = """
+    SELECT node_id, score, snippet FROM (
+        SELECT s.node_id AS node_id,
+               -bm25(node_search, 10.0, 4.0, 1.0) AS score,
+               snippet(node_search, -1, :start, :stop, '…', 16) AS snippet
+        FROM node_search s
+        JOIN nodes n ON n.id = s.node_id
+        WHERE node_search MATCH :q AND s.project_id = :project_id {branch_filter}
+    )
+    WHERE {after}
+    ORDER BY score DESC, node_id
+    LIMIT :limit
+"""
+
+
+def _fts_query(q: str) -> str:
+    # Every term quoted: user input can never be parsed as FTS5 syntax
+    terms = [t.replace('"', '""') for t in q.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def search_nodes(
+    db: Session,
+    q: str,
+    project_id: int,
+    branch_id: int | None = None,
+    cursor: str | None = None,
+    limit: int = 20,
+) -> tuple[list[dict], str | None]:
+    """Returns (hits, next_cursor); hits carry node_id, score and a highlighted snippet."""
+    params = {"project_id": project_id, "limit": limit + 1}
+    branch_filter = ""
+    if branch_id is not None:
+        branch_filter = "AND n.branch_id = :branch_id"
+        params["branch_id"] = branch_id
+
+    after = "1 = 1"
+    if cursor:
+        params["after_score"], params["after_id"] = _decode_cursor(cursor)
+        after = "(score < :after_score OR (score = :after_score AND node_id > :after_id))"
+
+    if _dialect(db) == "postgresql":
+        sql = PG_SEARCH_SQL.format(branch_filter=branch_filter, after=after)
+        params.update(
+            q=q,
+            language=settings.SEARCH_LANGUAGE,
+            headline_options=(
+                f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+                "MaxFragments=2, MaxWords=24, MinWords=8"
+            ),
+        )
+    else:
+        sql = FTS_SEARCH_SQL.format(branch_filter=branch_filter, after=after)
+        params.update(q=_fts_query(q), start=HIGHLIGHT_START, stop=HIGHLIGHT_STOP)
+
+    rows = db.execute(text(sql), params).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].score, rows[-1].node_id)
+
+    hits = [{"node_id": r.node_id, "score": r.score, "snippet": r.snippet} for r in rows]
+    return hits, next_cursor
+
+
+# ---------------------------------------------------------
+# 🧹 Reindex Job (initial backfill / after a language change)
+# ---------------------------------------------------------
+def reindex_search(project_id: int | None = None, batch_size: int = 500):
+    """Background job: indexes every node (of one project) in id-ordered batches."""
+    print(f"🔎 Reindexing search for {'project ' + str(project_id) if project_id else 'all projects'}...")
+    db = WorkerSessionLocal()
+    last_id, indexed = 0, 0
+    try:
+        while True:
+            query = db.query(models.Node).filter(models.Node.id > last_id)
+            if project_id is not None:
+                query = query.filter(models.Node.project_id == project_id)
+            batch = query.order_by(models.Node.id).limit(batch_size).all()
+            if not batch:
+                break
+            _defer_embeddings(db, [_index_text(db, node, None) for node in batch])
+            db.commit()
+            db.expunge_all()
+            last_id = batch[-1].id
+            indexed += len(batch)
+
+        print(f"✅ Search index rebuilt: {indexed} nodes.")
+        return {"project_id": project_id, "indexed": indexed}
+
+    except Exception as e:
+        print(f"❌ Search reindex error: {e}")
+        db.rollback()
+        return {"error": str(e)}
+
+    finally:
+        db.close()
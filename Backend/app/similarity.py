@@ -0,0 +1,143 @@
+# ---------------------------------------------------------
+# 🧭 Semantic Similarity over Reasoning Nodes
+# ---------------------------------------------------------
+# Every node's title + prompt + response is embedded into one shared,
+# memory-mapped vector index (all projects), kept current wherever the
+# node is text-indexed (see app.search.index_node). Used to find similar
+# steps — e.g. duplicate work before spending an LLM call on it.
+import threading
+import numpy as np
+from sqlalchemy.orm import Session
+from Backend.app import models
+from Backend.app.config import settings
+from Backend.app.database import WorkerSessionLocal
+from Backend.app.responses import get_response
+from Backend.utils.embeddings import get_embedder
+from Backend.utils.vector_index import VectorIndex
+
+_index: VectorIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index() -> VectorIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex(settings.VECTOR_INDEX_ROOT, settings.EMBEDDING_DIM)
+        return _index
+
+
+def node_text(title: str | None, prompt: str | None, response: str | None) -> str:
+    return "\n\n".join(part for part in (title, prompt, response) if part)
+
+
+def index_embeddings(rows: list[tuple[int, int, str]]):
+    """
+    Embeds and stores (node_id, project_id, text) rows in one batch.
+    Best effort: a failure is logged and never fails the node write.
+    """
+    if not rows or not settings.SIMILARITY_ENABLED:
+        return
+    try:
+        vectors = get_embedder()([text for _, _, text in rows])
+        index = get_vector_index()
+        index.add(
+            [node_id for node_id, _, _ in rows], vectors, [project_id for _, project_id, _ in rows]
+        )
+        if (
+            index.tombstones >= settings.VECTOR_COMPACT_MIN_TOMBSTONES
+            and index.tombstones >= settings.VECTOR_COMPACT_TOMBSTONE_RATIO * index.count
+        ):
+            compact_vector_index()
+    except Exception as e:
+        print(f"⚠️ Vector indexing failed for {len(rows)} node(s): {e}")
+
+
+def similar_to_text(text: str, k: int = 10, project_id: int | None = None) -> list[dict]:
+    vector = get_embedder()([text])[0]
+    return similar_to_vector(vector, k, project_id)
+
+
+def similar_to_vector(
+    vector: np.ndarray, k: int = 10, project_id: int | None = None, exclude: int | None = None
+) -> list[dict]:
+    extra = 1 if exclude is not None else 0
+    hits = get_vector_index().search(
+        vector[None, :], k + extra, group=project_id, nprobe=settings.VECTOR_SEARCH_NPROBE
+    )[0]
+    return [
+        {"node_id": node_id, "score": round(score, 4)}
+        for node_id, score in hits
+        if node_id != exclude
+    ][:k]
+
+
+def describe_hits(db: Session, hits: list[dict]) -> list[dict]:
+    """Adds project, title and status to hits (one query); drops deleted nodes."""
+    nodes = {
+        n.id: n
+        for n in db.query(
+            models.Node.id, models.Node.project_id, models.Node.title, models.Node.status
+        ).filter(models.Node.id.in_([h["node_id"] for h in hits]))
+    }
+    return [
+        {**h, "project_id": nodes[h["node_id"]].project_id, "title": nodes[h["node_id"]].title,
+         "status": nodes[h["node_id"]].status}
+        for h in hits
+        if h["node_id"] in nodes
+    ]
+
+
+# ---------------------------------------------------------
+# 🧹 Background Jobs — full rebuild, compaction and IVF training
+# ---------------------------------------------------------
+def rebuild_vector_index(batch_size: int = 1000):
+    """Embeds every node in id-ordered batches (initial fill or embedder change)."""
+    print("🧭 Rebuilding vector index...")
+    db = WorkerSessionLocal()
+    last_id, indexed = 0, 0
+    try:
+        while True:
+            batch = (
+                db.query(models.Node)
+                .filter(models.Node.id > last_id)
+                .order_by(models.Node.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                break
+            index_embeddings([
+                (n.id, n.project_id, node_text(n.title, n.prompt, get_response(n)))
+                for n in batch
+            ])
+            db.expunge_all()
+            last_id = batch[-1].id
+            indexed += len(batch)
+
+        compact_vector_index()  # every node was re-added: drop the replaced rows
+        print(f"✅ Vector index rebuilt: {indexed} nodes.")
+        return {"indexed": indexed}
+
+    finally:
+        db.close()
+
+
+def compact_vector_index():
+    """Rewrites the index without the tombstones that replaced vectors leave behind."""
+    index = get_vector_index()
+    removed = index.compact()
+    if removed:
+        print(f"🧹 Vector index compacted: {removed} tombstones dropped, {index.count} rows left.")
+    return {"removed": removed, "rows": index.count}
+
+
+def train_vector_index(nlist: int = 1024):
+    """Trains the IVF coarse quantizer so queries probe a few lists instead of every row."""
+    index = get_vector_index()
+    if index.count == 0:
+        return {"nlist": 0, "rows": 0}
+    nlist = min(nlist, max(1, index.count // 39))  # ≥ ~39 training points per list
+    index.train_ivf(nlist)
+    print(f"✅ Vector index IVF trained: {nlist} lists over {index.count} rows.")
+    return {"nlist": nlist, "rows": index.count}
@@ -0,0 +1,206 @@
+# ---------------------------------------------------------
+# 🌳 Reasoning Tree Queries — Lineage, Subtrees, Ancestry
+# ---------------------------------------------------------
+from sqlalchemy import select, literal, Integer, func, text, or_, bindparam
+from sqlalchemy.orm import Session, aliased
+from Backend.app import models
+
+
+# ---------------------------------------------------------
+# Root → Node Path in One Recursive CTE
+# ---------------------------------------------------------
+def lineage_query(node_id: int, max_depth: int | None = None):
+    """
+    Builds a recursive CTE walking from `node_id` up through its parents.
+    Works on Postgres and SQLite. `max_depth` limits how many ancestors
+    are followed (0 = the node only).
+    """
+    lineage = (
+        select(
+            models.Node.id.label("id"),
+            models.Node.parent_id.label("parent_id"),
+            literal(0, type_=Integer).label("depth"),
+        )
+        .where(models.Node.id == node_id)
+        .cte("lineage", recursive=True)
+    )
+
+    step = select(
+        models.Node.id, models.Node.parent_id, lineage.c.depth + 1
+    ).join(lineage, models.Node.id == lineage.c.parent_id)
+    if max_depth is not None:
+        step = step.where(lineage.c.depth < max_depth)
+
+    lineage = lineage.union_all(step)
+
+    return (
+        select(models.Node, lineage.c.depth)
+        .join(lineage, models.Node.id == lineage.c.id)
+        .order_by(lineage.c.depth.desc())
+    )
+
+
+def get_lineage(db: Session, node_id: int, max_depth: int | None = None) -> list[models.Node]:
+    """Returns the nodes on the path root → node (inclusive), in a single round trip."""
+    return [node for node, _depth in db.execute(lineage_query(node_id, max_depth)).all()]
+
+
+# ---------------------------------------------------------
+# Closure-Table Queries (indexed, no recursion)
+# ---------------------------------------------------------
+def get_descendants(
+    db: Session,
+    node_id: int,
+    max_depth: int | None = None,
+    limit: int | None = None,
+):
+    """Returns (node, depth) pairs for every node below `node_id`, shallowest first."""
+    closure = models.NodeClosure
+    query = (
+        select(models.Node, closure.depth)
+        .join(closure, closure.descendant_id == models.Node.id)
+        .where(closure.ancestor_id == node_id, closure.depth > 0)
+        .order_by(closure.depth, models.Node.id)
+    )
+    if max_depth is not None:
+        query = query.where(closure.depth <= max_depth)
+    if limit is not None:
+        query = query.limit(limit)
+    return db.execute(query).all()
+
+
+def ancestors_query(node_id: int):
+    closure = models.NodeClosure
+    return (
+        select(models.Node, closure.depth)
+        .join(closure, closure.ancestor_id == models.Node.id)
+        .where(closure.descendant_id == node_id, closure.depth > 0)
+        .order_by(closure.depth.desc())
+    )
+
+
+def get_ancestors(db: Session, node_id: int):
+    """Returns (node, depth) pairs for every ancestor of `node_id`, root first."""
+    return db.execute(ancestors_query(node_id)).all()
+
+
+def count_descendants(db: Session, node_id: int) -> int:
+    closure = models.NodeClosure
+    return db.execute(
+        select(func.count())
+        .select_from(closure)
+        .where(closure.ancestor_id == node_id, closure.depth > 0)
+    ).scalar_one()
+
+
+def is_ancestor(db: Session, ancestor_id: int, descendant_id: int) -> bool:
+    """True if `ancestor_id` lies on the path from the root to `descendant_id` (strictly above it)."""
+    closure = models.NodeClosure
+    return db.execute(
+        select(closure.depth).where(
+            closure.ancestor_id == ancestor_id,
+            closure.descendant_id == descendant_id,
+            closure.depth > 0,
+        )
+    ).first() is not None
+
+
+def lowest_common_ancestor_query(a: int, b: int):
+    left = aliased(models.NodeClosure)
+    right = aliased(models.NodeClosure)
+    return (
+        select(left.ancestor_id)
+        .join(right, right.ancestor_id == left.ancestor_id)
+        .where(left.descendant_id == a, right.descendant_id == b)
+        .order_by(left.depth)
+        .limit(1)
+    )
+
+
+def lowest_common_ancestor(db: Session, a: int, b: int) -> int | None:
+    """
+    Deepest node that is an ancestor of (or equal to) both `a` and `b`.
+    Two indexed closure lookups joined on ancestor — no parent walking.
+    """
+    return db.execute(lowest_common_ancestor_query(a, b)).scalar_one_or_none()
+
+
+# ---------------------------------------------------------
+# Backfill — rebuild the closure table from parent_id
+# ---------------------------------------------------------
+REBUILD_CLOSURE_SQL = text("""
+    INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+        SELECT id, id, 0 FROM nodes
+        UNION ALL
+        SELECT walk.ancestor_id, nodes.id, walk.depth + 1
+        FROM walk JOIN nodes ON nodes.parent_id = walk.descendant_id
+    )
+    SELECT ancestor_id, descendant_id, depth FROM walk
+""")
+
+
+# Closure rows for nodes written with bulk INSERTs (which skip mapper events):
+# pairs inside the new set come from walking up their parent_id chain, and
+# pairs above it are joined from the existing closure of the attach point.
+INDEX_BULK_NODES_SQL = text("""
+    INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE up(descendant_id, ancestor_id, depth) AS (
+        SELECT id, id, 0 FROM nodes WHERE id IN :ids
+        UNION ALL
+        SELECT up.descendant_id, nodes.parent_id, up.depth + 1
+        FROM up JOIN nodes ON nodes.id = up.ancestor_id
+        WHERE nodes.id IN :ids AND nodes.parent_id IS NOT NULL
+    )
+    SELECT up.ancestor_id, up.descendant_id, up.depth FROM up
+    WHERE up.ancestor_id IN :ids
+    UNION ALL
+    SELECT node_closure.ancestor_id, up.descendant_id, up.depth + node_closure.depth
+    FROM up JOIN node_closure ON node_closure.descendant_id = up.ancestor_id
+    WHERE up.ancestor_id NOT IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+
+def index_bulk_nodes(db: Session, node_ids: list[int]):
+    """Adds closure rows for a set of bulk-inserted nodes in one statement."""
+    if node_ids:
+        db.execute(INDEX_BULK_NODES_SQL, {"ids": list(node_ids)})
+
+
+def rebuild_closure(db: Session):
+    """Recomputes the ancestry index for all nodes (repair; migration 0002 backfills)."""
+    db.execute(models.NodeClosure.__table__.delete())
+    db.execute(REBUILD_CLOSURE_SQL)
+    db.commit()
+
+
+# ---------------------------------------------------------
+# Copy-on-Write Branches — inherited history via the index
+# ---------------------------------------------------------
+def branch_nodes_query(branch_id: int, include_inherited: bool = True):
+    """
+    Selects a branch's own nodes plus, for forks, every ancestor of its
+    `base_node_id` (inclusive) — resolved in one query, no rows copied.
+    Forking therefore costs O(1) regardless of how long the base history is.
+    """
+    own = models.Node.branch_id == branch_id
+    if not include_inherited:
+        return select(models.Node).where(own)
+
+    inherited = (
+        select(models.NodeClosure.ancestor_id)
+        .join(models.Branch, models.Branch.base_node_id == models.NodeClosure.descendant_id)
+        .where(models.Branch.id == branch_id)
+    )
+    return select(models.Node).where(or_(own, models.Node.id.in_(inherited)))
+
+
+def get_branch_head(db: Session, branch: models.Branch) -> int | None:
+    """Latest node of a branch, falling back to its fork point."""
+    head = db.execute(
+        select(models.Node.id)
+        .where(models.Node.branch_id == branch.id)
+        .order_by(models.Node.created_at.desc(), models.Node.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+    return head if head is not None else branch.base_node_id
@@ -6,8 +6,91 @@ import os
 redis_conn = Redis.from_url(settings.REDIS_URL)
 q = Queue(connection=redis_conn)
 
+# Queue consumed by Backend.app.background_worker
+lucid_queue = Queue("lucid_queue", connection=redis_conn)
+
 def enqueue_planner(db_dsn, project_id, goal_text):
     # simple enqueue; job function must be importable by RQ worker process
     # you can implement a wrapper that reconstitutes DB session and calls planner.generate_plan_sync
     job = q.enqueue("app.worker.job_functions.run_planner_job", db_dsn, project_id, goal_text)
     return job
+
+def enqueue_branch_execution(branch_id, max_concurrency=None, force=False):
+    # runs the whole branch DAG inside the worker (see orchestration.branch_executor)
+    job = lucid_queue.enqueue(
+        "Backend.app.orchestration.branch_executor.execute_branch",
+        branch_id,
+        max_concurrency,
+        force,
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_project_pack(project_id):
+    # background repack of a project's outputs into a delta-compressed packfile
+    job = lucid_queue.enqueue(
+        "Backend.app.orchestration.packer.pack_project",
+        project_id,
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_artifact_verification(artifact_id, declared_sha256=None):
+    # checksum + content-addressed promotion of a presigned (direct) upload
+    job = lucid_queue.enqueue(
+        "Backend.app.orchestration.artifact_verifier.verify_artifact",
+        artifact_id,
+        declared_sha256,
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_response_backfill(batch_size=500):
+    # one-off: move legacy response_ref values onto the inline/blob policy
+    job = lucid_queue.enqueue(
+        "Backend.app.responses.backfill_responses",
+        batch_size,
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_search_reindex(project_id=None):
+    # full (re)build of the node_search index, e.g. right after migration 0006
+    job = lucid_queue.enqueue(
+        "Backend.app.search.reindex_search",
+        project_id,
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_embeddings(rows):
+    # (node_id, project_id, text) rows of a committed write → vector index
+    job = lucid_queue.enqueue(
+        "Backend.app.similarity.index_embeddings",
+        rows,
+        job_timeout=600,
+    )
+    return job
+
+def enqueue_vector_index_compaction():
+    # rewrite the vector index without tombstoned (replaced) rows
+    job = lucid_queue.enqueue(
+        "Backend.app.similarity.compact_vector_index",
+        job_timeout=3600,
+    )
+    return job
+
+def enqueue_vector_index_rebuild(train_nlist=None):
+    # re-embed every node; optionally (re)train the IVF quantizer afterwards
+    job = lucid_queue.enqueue(
+        "Backend.app.similarity.rebuild_vector_index",
+        job_timeout=7200,
+    )
+    if train_nlist:
+        lucid_queue.enqueue(
+            "Backend.app.similarity.train_vector_index",
+            train_nlist,
+            depends_on=job,
+            job_timeout=3600,
+        )
+    return job
@@ -0,0 +1,151 @@
+"""
+Local fake LLM provider for rate-limit and failover testing.
+
+Speaks just enough of the Gemini (`…/models/<model>:generateContent`,
+`:streamGenerateContent?alt=sse`) and OpenAI (`…/chat/completions`, with
+`"stream": true`) APIs for llm_router, and misbehaves on demand: its own
+token bucket answers 429 + Retry-After when exceeded, a share of requests
+can be failed with 429 or 503 at random, and a share can stall before
+answering (tail latency). GET /stats returns counts.
+
+    python -m Backend.benchmarks.fake_llm_provider --port 8099 --rps 5 --error-rate 0.2
+
+then point the backend at it:
+
+    GEMINI_BASE_URL=http://127.0.0.1:8099/v1beta OPENAI_BASE_URL=http://127.0.0.1:8099/v1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeProvider(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, rps: float = 0.0, burst: int = 5, error_rate: float = 0.0,
+                 server_error_rate: float = 0.0, retry_after: float = 1.0, latency_ms: float = 20.0,
+                 stall_rate: float = 0.0, stall_ms: float = 20_000.0, seed: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.rps, self.burst = rps, burst
+        self.error_rate, self.server_error_rate = error_rate, server_error_rate
+        self.retry_after, self.latency_ms = retry_after, latency_ms
+        self.stall_rate, self.stall_ms = stall_rate, stall_ms
+        self.rng = random.Random(seed)
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self._tokens, self._ts = float(burst), time.monotonic()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def delay(self) -> float:
+        with self.lock:
+            if self.rng.random() < self.stall_rate:
+                self.counts["stalled"] += 1
+                return self.stall_ms / 1000
+            return self.latency_ms / 1000 * self.rng.uniform(0.5, 1.5)
+
+    def decide(self) -> int:
+        """Status for the next request: bucket first, then random faults."""
+        with self.lock:
+            self.counts["requests"] += 1
+            if self.rps > 0:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._ts) * self.rps)
+                self._ts = now
+                if self._tokens < 1:
+                    self.counts["429_rate"] += 1
+                    return 429
+                self._tokens -= 1
+            roll = self.rng.random()
+            if roll < self.error_rate:
+                self.counts["429_injected"] += 1
+                return 429
+            if roll < self.error_rate + self.server_error_rate:
+                self.counts["503_injected"] += 1
+                return 503
+            self.counts["ok"] += 1
+            return 200
+
+    def start(self) -> "FakeProvider":
+        threading.Thread(target=self.serve_forever, name="fake-llm-provider", daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (e.g. a cancelled hedge loser)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            with self.server.lock:
+                self._send(200, json.dumps(dict(self.server.counts)).encode())
+        else:
+            self._send(404, b"{}")
+
+    def do_POST(self):
+        server: FakeProvider = self.server
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(server.delay())
+
+        status = server.decide()
+        if status == 429:
+            return self._send(429, b'{"error": {"code": 429, "message": "Resource exhausted"}}',
+                              headers={"Retry-After": f"{server.retry_after:g}"})
+        if status == 503:
+            return self._send(503, b'{"error": {"code": 503, "message": "Overloaded"}}')
+
+        text = f"fake answer #{server.counts['ok']}"
+        gemini = ":generateContent" in self.path or ":streamGenerateContent" in self.path
+        if gemini:
+            chunk = {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+        elif payload.get("stream"):
+            chunk = {"choices": [{"delta": {"content": text}}]}
+        else:
+            chunk = {"choices": [{"message": {"content": text}}]}
+
+        if ":streamGenerateContent" in self.path or payload.get("stream"):
+            body = f"data: {json.dumps(chunk)}\n\n" + ("" if gemini else "data: [DONE]\n\n")
+            return self._send(200, body.encode(), "text/event-stream")
+        self._send(200, json.dumps(chunk).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--rps", type=float, default=0.0, help="own rate limit (0 = none)")
+    parser.add_argument("--burst", type=int, default=5)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of random 429s")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="share of random 503s")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of stalled requests")
+    parser.add_argument("--stall-ms", type=float, default=20_000.0)
+    args = parser.parse_args()
+    server = FakeProvider(args.port, args.rps, args.burst, args.error_rate, args.server_error_rate,
+                          args.retry_after, args.latency_ms, args.stall_rate, args.stall_ms)
+    print(f"🧪 Fake LLM provider on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
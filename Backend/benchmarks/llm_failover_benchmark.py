@@ -0,0 +1,98 @@
+"""
+LLM provider protection benchmark against local fake providers.
+
+Starts a flaky fake Gemini (own rate limit plus random 429s with Retry-After)
+and a healthy fake OpenAI, then drives the real router with concurrent
+requests in two phases:
+
+  1. throttled  → the shared token bucket and backoff keep Gemini under its limit
+  2. outage     → Gemini fails every call: the breaker opens and requests
+                  fail over to OpenAI without waiting on Gemini
+
+    python -m Backend.benchmarks.llm_failover_benchmark --requests 200 --concurrency 16
+
+Leave --redis-url empty to use the in-process limiter/breaker.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+from Backend.benchmarks.fake_llm_provider import FakeProvider
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _phase(router, name: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, outcomes = [], Counter()
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await router.acall_chat_completion(f"{name} request {i}", use_cache=False)
+            latencies.append((time.perf_counter() - started) * 1000)
+            raw = result.get("raw")
+            if raw is None:
+                outcomes["error"] += 1
+            else:
+                outcomes["gemini" if "candidates" in raw else "openai"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"\n📊 {name}: {requests} requests in {elapsed:.1f}s — served by {dict(outcomes)}")
+    print(f"   latency p50 {statistics.median(latencies):.0f} ms   p95 {_percentile(latencies, 0.95):.0f} ms")
+
+
+def run(requests: int, concurrency: int, gemini_rps: float, error_rate: float, redis_url: str):
+    gemini = FakeProvider(0, rps=gemini_rps, burst=5, error_rate=error_rate, retry_after=1.0).start()
+    openai = FakeProvider(0).start()
+
+    # Settings are read at import time: configure before loading the router
+    os.environ.update(
+        GEMINI_API_KEY="fake-gemini-key",
+        OPENAI_API_KEY="fake-openai-key",
+        GEMINI_BASE_URL=f"{gemini.url}/v1beta",
+        OPENAI_BASE_URL=f"{openai.url}/v1",
+        GEMINI_RATE_LIMIT_RPS=str(gemini_rps),
+        GEMINI_RATE_LIMIT_BURST="5",
+        OPENAI_RATE_LIMIT_RPS="200",
+        REDIS_URL=redis_url,
+        LLM_BREAKER_OPEN_SECONDS="60",
+    )
+    from Backend.utils import llm_resilience, llm_router
+
+    async def main():
+        await _phase(llm_router, "throttled", requests, concurrency)
+        print(f"   fake Gemini saw {dict(gemini.counts)}")
+        gemini.error_rate = 1.0
+        await _phase(llm_router, "outage", requests, concurrency)
+        print(f"   fake Gemini saw {dict(gemini.counts)}")
+        stats = await llm_resilience.provider_stats()
+        for provider, values in stats.items():
+            print(f"\n🛡️ {provider}: " + ", ".join(f"{k}={v}" for k, v in values.items()))
+        await llm_router.close_llm_clients()
+
+    asyncio.run(main())
+    gemini.shutdown()
+    openai.shutdown()
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gemini-rps", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="random 429s from fake Gemini")
+    parser.add_argument("--redis-url", default="")
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.gemini_rps, args.error_rate, args.redis_url)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,92 @@
+"""
+Hedged-request benchmark against local fake providers.
+
+A fake Gemini answers in ~`--latency-ms` but stalls on a share of requests
+(`--stall-rate`, `--stall-ms`); a fake OpenAI answers in ~`--secondary-latency-ms`.
+The same workload runs without and then with hedging, and reports latency
+percentiles, how often hedges fired and won, and their estimated extra cost.
+
+    python -m Backend.benchmarks.llm_hedging_benchmark --requests 300 --stall-rate 0.02
+
+Stalls must be rarer than 1 - LLM_HEDGE_PERCENTILE, otherwise the adaptive
+threshold itself lands on the stalls and hedges fire too late to help.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from Backend.benchmarks.fake_llm_provider import FakeProvider
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _workload(router, hedge: bool, requests: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await router.acall_chat_completion(f"request {i}", use_cache=False, hedge=hedge)
+            assert "raw" in result, result["text"]
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies
+
+
+def run(requests: int, concurrency: int, latency_ms: float, secondary_latency_ms: float,
+        stall_rate: float, stall_ms: float):
+    gemini = FakeProvider(0, latency_ms=latency_ms, stall_rate=stall_rate, stall_ms=stall_ms).start()
+    openai = FakeProvider(0, latency_ms=secondary_latency_ms).start()
+
+    # Settings are read at import time: configure before loading the router
+    os.environ.update(
+        GEMINI_API_KEY="fake-gemini-key",
+        OPENAI_API_KEY="fake-openai-key",
+        GEMINI_BASE_URL=f"{gemini.url}/v1beta",
+        OPENAI_BASE_URL=f"{openai.url}/v1",
+        GEMINI_RATE_LIMIT_RPS="0",
+        OPENAI_RATE_LIMIT_RPS="0",
+        REDIS_URL="",
+    )
+    from Backend.utils import llm_hedging, llm_router
+
+    async def main():
+        for hedge in (False, True):
+            latencies = await _workload(llm_router, hedge, requests, concurrency)
+            print(
+                f"{'⏱️ hedged  ' if hedge else '🐢 unhedged'}  p50 {statistics.median(latencies):6.0f} ms   "
+                f"p95 {_percentile(latencies, 0.95):6.0f} ms   p99 {_percentile(latencies, 0.99):6.0f} ms   "
+                f"max {max(latencies):6.0f} ms"
+            )
+        stats = llm_hedging.hedge_stats()
+        extra = stats["hedges_fired"] * llm_hedging.estimate_cost("openai", f"request {requests}")
+        print("📊 " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+        print(f"💸 estimated hedge overhead ${extra:.4f} over {requests} requests")
+        await llm_router.close_llm_clients()
+
+    asyncio.run(main())
+    gemini.shutdown()
+    openai.shutdown()
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=400.0)
+    parser.add_argument("--secondary-latency-ms", type=float, default=500.0)
+    parser.add_argument("--stall-rate", type=float, default=0.02)
+    parser.add_argument("--stall-ms", type=float, default=8000.0)
+    args = parser.parse_args()
+    run(args.requests, args.concurrency, args.latency_ms, args.secondary_latency_ms,
+        args.stall_rate, args.stall_ms)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,116 @@
+"""
+Packfile benchmark on a synthetic branching conversation corpus.
+
+Builds a tree of node outputs where every child is its parent's text with a
+few edited lines plus a new paragraph (siblings therefore share most of their
+content), packs it, and reports compression ratio and random-read latency.
+
+    python -m Backend.benchmarks.pack_benchmark --depth 6 --fanout 3
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import zlib
+from Backend.utils.packfile import write_pack, PackReader
+
+WORDS = (
+    "node branch merge prompt response context model token latency cache "
+    "schema index query plan step debug error fix migration retry worker "
+    "queue storage artifact delta pack commit graph ancestor summary"
+).split()
+
+
+def _line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))) + "\n"
+
+
+def build_corpus(depth: int, fanout: int, root_lines: int, edits: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    entries = []
+    next_id = 1
+
+    root = [_line(rng) for _ in range(root_lines)]
+    frontier = [(next_id, root)]
+    entries.append({"id": next_id, "parent_id": None, "data": "".join(root).encode()})
+    next_id += 1
+
+    for _ in range(depth):
+        children = []
+        for parent_id, lines in frontier:
+            for _ in range(fanout):
+                text = list(lines)
+                for _ in range(edits):
+                    pos = rng.randrange(len(text))
+                    text[pos] = _line(rng)
+                text += [_line(rng) for _ in range(3)]
+                entries.append({"id": next_id, "parent_id": parent_id, "data": "".join(text).encode()})
+                children.append((next_id, text))
+                next_id += 1
+        frontier = children
+    return entries
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(depth: int, fanout: int, root_lines: int, edits: int, reads: int, seed: int):
+    entries = build_corpus(depth, fanout, root_lines, edits, seed)
+    raw = sum(len(e["data"]) for e in entries)
+    per_object = sum(len(zlib.compress(e["data"], 6)) for e in entries)
+
+    with tempfile.TemporaryDirectory() as pack_dir:
+        started = time.perf_counter()
+        stats = write_pack(pack_dir, entries)
+        pack_seconds = time.perf_counter() - started
+
+        ids = [e["id"] for e in entries]
+        expected = {e["id"]: e["data"] for e in entries}
+        rng = random.Random(seed + 1)
+        sample = [rng.choice(ids) for _ in range(reads)]
+
+        # Cold: no resolved-object cache, every read walks its full delta chain
+        cold_reader = PackReader(stats["index_path"], cache_size=1)
+        cold = []
+        for node_id in sample:
+            t = time.perf_counter()
+            data = cold_reader.read(node_id)
+            cold.append((time.perf_counter() - t) * 1000)
+            assert data == expected[node_id]
+        cold_reader.close()
+
+        warm_reader = PackReader(stats["index_path"])
+        warm = []
+        for node_id in sample:
+            t = time.perf_counter()
+            warm_reader.read(node_id)
+            warm.append((time.perf_counter() - t) * 1000)
+        warm_reader.close()
+
+    print(f"nodes                 {len(entries)}")
+    print(f"delta objects         {stats['deltas']}")
+    print(f"raw bytes             {raw:,}")
+    print(f"zlib per object       {per_object:,}  ({raw / per_object:.1f}x)")
+    print(f"packed bytes          {stats['packed_bytes']:,}  ({raw / stats['packed_bytes']:.1f}x)")
+    print(f"pack vs per-object    {per_object / stats['packed_bytes']:.1f}x smaller")
+    print(f"pack build            {pack_seconds * 1000:.0f} ms")
+    for label, samples in (("cold read", cold), ("warm read", warm)):
+        print(
+            f"{label:<21} mean {statistics.mean(samples):.3f} ms  "
+            f"p50 {_percentile(samples, 0.5):.3f} ms  p95 {_percentile(samples, 0.95):.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--root-lines", type=int, default=60)
+    parser.add_argument("--edits", type=int, default=3)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.depth, args.fanout, args.root_lines, args.edits, args.reads, args.seed)
@@ -0,0 +1,102 @@
+"""
+Vector index benchmark on a synthetic clustered corpus.
+
+Builds a memory-mapped index of `n` unit vectors drawn around random topic
+centres (like steps of many conversations on related subjects), then reports
+exact (brute-force) and IVF query latency and IVF recall@k against the
+exact results.
+
+    python -m Backend.benchmarks.vector_benchmark --n 1000000 --dim 256
+"""
+import argparse
+import statistics
+import tempfile
+import time
+import numpy as np
+from Backend.utils.vector_index import VectorIndex
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+
+def build_corpus(index: VectorIndex, n: int, dim: int, topics: int, noise: float, seed: int, batch: int):
+    rng = np.random.default_rng(seed)
+    centres = _unit(rng.standard_normal((topics, dim)))
+    for start in range(0, n, batch):
+        size = min(batch, n - start)
+        topic = rng.integers(0, topics, size)
+        vectors = _unit(centres[topic] + noise * rng.standard_normal((size, dim)).astype(np.float32))
+        index.add(np.arange(start, start + size), vectors, topic % 64)
+    return centres
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _timed(fn, queries, k, **kwargs):
+    times, results = [], []
+    for q in queries:
+        started = time.perf_counter()
+        results.append(fn(q[None, :], k, **kwargs)[0])
+        times.append((time.perf_counter() - started) * 1000)
+    return times, results
+
+
+def run(n: int, dim: int, topics: int, noise: float, queries: int, k: int, nlist: int, nprobe: int, seed: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, dim)
+
+        started = time.perf_counter()
+        build_corpus(index, n, dim, topics, noise, seed, batch=100_000)
+        build_s = time.perf_counter() - started
+
+        rng = np.random.default_rng(seed + 1)
+        sample = np.asarray(index.vectors[rng.choice(n, size=queries, replace=False)])
+        query_vectors = _unit(sample + noise * rng.standard_normal(sample.shape).astype(np.float32))
+
+        exact_ms, exact = _timed(index.search_exact, query_vectors, k)
+
+        started = time.perf_counter()
+        batched = index.search_exact(query_vectors, k)
+        batch_ms = (time.perf_counter() - started) * 1000
+        assert [r[0][0] for r in batched] == [r[0][0] for r in exact]
+
+        started = time.perf_counter()
+        index.train_ivf(nlist)
+        train_s = time.perf_counter() - started
+
+        index.search(query_vectors[:1], k, nprobe=nprobe)  # builds posting lists
+        ivf_ms, approx = _timed(index.search, query_vectors, k, nprobe=nprobe)
+
+        recall = statistics.mean(
+            len({i for i, _ in a} & {i for i, _ in e}) / k for a, e in zip(approx, exact)
+        )
+
+        print(f"📐 {n:,} vectors × {dim} dims ({n * dim * 4 / 2**20:,.0f} MiB float32), "
+              f"{topics} topics, built in {build_s:.1f}s")
+        print(f"🔍 exact       p50 {statistics.median(exact_ms):7.2f} ms   p95 {_percentile(exact_ms, 0.95):7.2f} ms   "
+              f"(batch of {queries}: {batch_ms / queries:.2f} ms/query)")
+        print(f"🧭 IVF {nlist}/{nprobe:<4} p50 {statistics.median(ivf_ms):7.2f} ms   p95 {_percentile(ivf_ms, 0.95):7.2f} ms   "
+              f"recall@{k} {recall:.3f}   (trained in {train_s:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--noise", type=float, default=0.08)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.n, args.dim, args.topics, args.noise, args.queries, args.k, args.nlist, args.nprobe, args.seed)
+
+
+if __name__ == "__main__":
+    main()
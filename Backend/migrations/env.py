@@ -0,0 +1,45 @@
+# ---------------------------------------------------------
+# 🧬 Alembic Environment — runs against the app's engine
+# ---------------------------------------------------------
+from alembic import context
+from sqlalchemy import text
+from Backend.app.database import Base, engine
+from Backend.app import models  # noqa: F401 — registers tables on Base.metadata
+
+config = context.config
+target_metadata = Base.metadata
+
+# Serializes concurrent upgrades when several API processes boot at once
+MIGRATION_LOCK_ID = 72_517_001
+
+
+def run_migrations(connection):
+    context.configure(connection=connection, target_metadata=target_metadata)
+    is_postgres = connection.dialect.name == "postgresql"
+    if is_postgres:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+    try:
+        with context.begin_transaction():
+            context.run_migrations()
+    finally:
+        if is_postgres:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+
+def run_migrations_online():
+    # init_db passes its own connection; the CLI falls back to the app engine
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    with engine.connect() as connection:
+        run_migrations(connection)
+        connection.commit()
+
+
+if context.is_offline_mode():
+    context.configure(url=engine.url.render_as_string(hide_password=False), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+else:
+    run_migrations_online()
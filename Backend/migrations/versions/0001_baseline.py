@@ -0,0 +1,83 @@
+"""Baseline schema: projects, branches, nodes, artifacts
+
+Databases created earlier by `create_all` already have these tables,
+so each one is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+NODE_STATUS = sa.Enum("pending", "running", "completed", "failed", name="nodestatus")
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "projects" not in existing:
+        op.create_table(
+            "projects",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("description", sa.Text, nullable=True),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+    if "branches" not in existing:
+        op.create_table(
+            "branches",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("project_id", sa.Integer, sa.ForeignKey("projects.id", ondelete="CASCADE")),
+            # FK to nodes is added below, once nodes exists
+            sa.Column("base_node_id", sa.Integer, nullable=True),
+            sa.Column("status", sa.String(50)),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+    if "nodes" not in existing:
+        op.create_table(
+            "nodes",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("project_id", sa.Integer, sa.ForeignKey("projects.id", ondelete="CASCADE")),
+            sa.Column("branch_id", sa.Integer, sa.ForeignKey("branches.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("parent_id", sa.Integer, sa.ForeignKey("nodes.id", ondelete="SET NULL"), nullable=True),
+            sa.Column("title", sa.String(255)),
+            sa.Column("prompt", sa.Text),
+            sa.Column("response_ref", sa.Text),
+            sa.Column("status", NODE_STATUS),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+    if "branches" not in existing and op.get_bind().dialect.name != "sqlite":
+        op.create_foreign_key(
+            "branches_base_node_id_fkey", "branches", "nodes",
+            ["base_node_id"], ["id"], ondelete="SET NULL",
+        )
+
+    if "artifacts" not in existing:
+        op.create_table(
+            "artifacts",
+            sa.Column("id", sa.Integer, primary_key=True, index=True),
+            sa.Column("node_id", sa.Integer, sa.ForeignKey("nodes.id", ondelete="CASCADE")),
+            sa.Column("file_path", sa.String(512)),
+            sa.Column("file_type", sa.String(50)),
+            sa.Column("created_at", sa.DateTime),
+        )
+
+
+def downgrade():
+    op.drop_table("artifacts")
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint("branches_base_node_id_fkey", "branches", type_="foreignkey")
+    op.drop_table("nodes")
+    op.drop_table("branches")
+    op.drop_table("projects")
+    NODE_STATUS.drop(op.get_bind(), checkfirst=True)
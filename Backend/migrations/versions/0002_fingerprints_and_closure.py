@@ -0,0 +1,55 @@
+"""Node fingerprints and the node_closure ancestry index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    node_columns = {c["name"] for c in inspector.get_columns("nodes")}
+
+    with op.batch_alter_table("nodes") as batch:
+        if "fingerprint" not in node_columns:
+            batch.add_column(sa.Column("fingerprint", sa.String(64), nullable=True))
+        if "output_fingerprint" not in node_columns:
+            batch.add_column(sa.Column("output_fingerprint", sa.String(64), nullable=True))
+
+    if "node_closure" not in inspector.get_table_names():
+        op.create_table(
+            "node_closure",
+            sa.Column("ancestor_id", sa.Integer, sa.ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("descendant_id", sa.Integer, sa.ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("depth", sa.Integer, nullable=False),
+        )
+        op.create_index(
+            "ix_node_closure_descendant_depth", "node_closure", ["descendant_id", "depth"]
+        )
+
+        # Backfill the index for every existing node
+        op.execute("""
+            INSERT INTO node_closure (ancestor_id, descendant_id, depth)
+            WITH RECURSIVE walk(ancestor_id, descendant_id, depth) AS (
+                SELECT id, id, 0 FROM nodes
+                UNION ALL
+                SELECT walk.ancestor_id, nodes.id, walk.depth + 1
+                FROM walk JOIN nodes ON nodes.parent_id = walk.descendant_id
+            )
+            SELECT ancestor_id, descendant_id, depth FROM walk
+        """)
+
+
+def downgrade():
+    op.drop_index("ix_node_closure_descendant_depth", table_name="node_closure")
+    op.drop_table("node_closure")
+    with op.batch_alter_table("nodes") as batch:
+        batch.drop_column("output_fingerprint")
+        batch.drop_column("fingerprint")
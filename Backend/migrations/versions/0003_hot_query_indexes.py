@@ -0,0 +1,54 @@
+"""Composite indexes for the hot list/filter queries + unique branch names
+
+Every route filters nodes by branch/parent/project, branches by project and
+artifacts by node, then orders by (created_at, id) for keyset pagination.
+The unique index replaces the racy check-then-insert for branch names.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_nodes_branch_created", "nodes", ["branch_id", "created_at", "id"]),
+    ("ix_nodes_project_created", "nodes", ["project_id", "created_at", "id"]),
+    ("ix_nodes_parent_id", "nodes", ["parent_id"]),
+    ("ix_branches_project_created", "branches", ["project_id", "created_at", "id"]),
+    ("ix_artifacts_node_created", "artifacts", ["node_id", "created_at", "id"]),
+]
+
+
+def upgrade():
+    # Existing duplicates (e.g. repeated "ai-plan" branches) get an id suffix
+    op.execute("""
+        UPDATE branches SET name = name || '-' || CAST(id AS VARCHAR(20))
+        WHERE id NOT IN (SELECT MIN(id) FROM branches GROUP BY project_id, name)
+    """)
+
+    inspector = sa.inspect(op.get_bind())
+    existing = {
+        ix["name"] for table in ("nodes", "branches", "artifacts")
+        for ix in inspector.get_indexes(table)
+    }
+
+    for name, table, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+    if "uq_branches_project_name" not in existing:
+        op.create_index(
+            "uq_branches_project_name", "branches", ["project_id", "name"], unique=True
+        )
+
+
+def downgrade():
+    op.drop_index("uq_branches_project_name", table_name="branches")
+    for name, table, _columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,38 @@
+"""Artifact SHA-256 checksums and sizes
+
+Uploads are stored under content-addressed keys; the checksum index lets a
+re-upload of known bytes skip the transfer.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("artifacts")}
+    indexes = {ix["name"] for ix in inspector.get_indexes("artifacts")}
+
+    with op.batch_alter_table("artifacts") as batch:
+        if "sha256" not in columns:
+            batch.add_column(sa.Column("sha256", sa.String(64), nullable=True))
+        if "size_bytes" not in columns:
+            batch.add_column(sa.Column("size_bytes", sa.BigInteger, nullable=True))
+
+    if "ix_artifacts_sha256" not in indexes:
+        op.create_index("ix_artifacts_sha256", "artifacts", ["sha256"])
+
+
+def downgrade():
+    op.drop_index("ix_artifacts_sha256", table_name="artifacts")
+    with op.batch_alter_table("artifacts") as batch:
+        batch.drop_column("size_bytes")
+        batch.drop_column("sha256")
@@ -0,0 +1,28 @@
+"""Inline (compressed) storage for small node responses
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("nodes")}
+
+    # Existing rows are normalized by the backfill_responses job
+    if "response_inline" not in columns:
+        with op.batch_alter_table("nodes") as batch:
+            batch.add_column(sa.Column("response_inline", sa.LargeBinary, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("nodes") as batch:
+        batch.drop_column("response_inline")
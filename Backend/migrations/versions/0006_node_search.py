@@ -0,0 +1,46 @@
+"""node_search full-text index (tsvector + GIN on Postgres, FTS5 on SQLite)
+
+Existing nodes are indexed by the reindex_search job.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if "node_search" in sa.inspect(bind).get_table_names():
+        return
+
+    if bind.dialect.name == "postgresql":
+        op.execute("""
+            CREATE TABLE node_search (
+                node_id INTEGER PRIMARY KEY REFERENCES nodes(id) ON DELETE CASCADE,
+                project_id INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                document TSVECTOR NOT NULL
+            )
+        """)
+        op.execute("CREATE INDEX ix_node_search_document ON node_search USING GIN (document)")
+        op.execute("CREATE INDEX ix_node_search_project ON node_search (project_id)")
+    else:
+        # Rows of deleted nodes are filtered by the search's join on nodes
+        op.execute("""
+            CREATE VIRTUAL TABLE node_search USING fts5(
+                title, prompt, response,
+                node_id UNINDEXED, project_id UNINDEXED,
+                tokenize = 'porter unicode61'
+            )
+        """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS node_search")
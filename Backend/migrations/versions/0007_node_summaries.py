@@ -0,0 +1,28 @@
+"""Cached per-node summaries for token-budgeted context packing
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    columns = {c["name"] for c in inspector.get_columns("nodes")}
+
+    # Filled lazily the first time a step is summarized into a descendant's context
+    if "summary" not in columns:
+        with op.batch_alter_table("nodes") as batch:
+            batch.add_column(sa.Column("summary", sa.Text, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("nodes") as batch:
+        batch.drop_column("summary")
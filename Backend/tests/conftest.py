@@ -0,0 +1,85 @@
+# ---------------------------------------------------------
+# 🧪 Test Setup — a throwaway SQLite database
+# ---------------------------------------------------------
+# Settings are read at import time, so the URL is set before any
+# Backend module is imported (an existing .env does not override it).
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="lucid-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["REDIS_URL"] = ""
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def db():
+    """Session on a database migrated to head, exactly as init_db does at startup."""
+    from Backend.app.database import SessionLocal, init_db
+
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# ---------------------------------------------------------
+# 🪣 In-Memory S3 (moto) for the artifact routes
+# ---------------------------------------------------------
+BUCKET = "lucid-tests"
+
+
+@pytest.fixture
+def s3(monkeypatch, tmp_path):
+    """A moto-backed S3 client, also used by the artifact routes and a fresh download cache."""
+    moto = pytest.importorskip("moto")
+    from Backend.app.config import settings
+    from Backend.app.routes import artifacts
+    from Backend.utils import disk_cache, storage
+
+    with moto.mock_aws():
+        monkeypatch.setattr(settings, "S3_ENDPOINT", None)  # a local .env may point at MinIO
+        monkeypatch.setattr(settings, "S3_PUBLIC_ENDPOINT", None)
+        monkeypatch.setattr(settings, "S3_BUCKET", BUCKET)
+        monkeypatch.setattr(settings, "S3_ACCESS_KEY", "test")
+        monkeypatch.setattr(settings, "S3_SECRET_KEY", "test")
+        monkeypatch.setattr(settings, "ARTIFACT_PART_SIZE_BYTES", 5 * 1024 * 1024)
+        monkeypatch.setattr(settings, "ARTIFACT_CACHE_DIR", str(tmp_path / "artifact_cache"))
+        monkeypatch.setattr(disk_cache, "_artifact_cache", None)
+        monkeypatch.setattr(storage, "_clients", {})
+        monkeypatch.setattr(storage, "_checked_buckets", set())
+        client = storage.get_s3_client()
+        monkeypatch.setattr(artifacts, "s3_client", client)
+        monkeypatch.setattr(artifacts, "presign_client", storage.get_presign_client())
+        storage.ensure_bucket()
+        yield client
+
+
+@pytest.fixture
+def api(s3):
+    """Test client for the artifact routes."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from Backend.app.routes import artifacts
+
+    app = FastAPI()
+    app.include_router(artifacts.router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def node_id(db):
+    """A fresh node to attach artifacts to."""
+    from Backend.app import models
+
+    project = models.Project(name=f"artifacts-{os.urandom(4).hex()}")
+    db.add(project)
+    db.commit()
+    node = models.Node(project_id=project.id, prompt="upload here")
+    db.add(node)
+    db.commit()
+    return node.id
@@ -0,0 +1,48 @@
+# ---------------------------------------------------------
+# ⬇️ Artifact Downloads — local read-through cache, ETag and Range
+# ---------------------------------------------------------
+# Cache hits and misses must answer with the same bytes and validator.
+import pytest
+
+pytest.importorskip("moto")
+
+from Backend.app import models  # noqa: E402
+from Backend.app.config import settings  # noqa: E402
+
+DATA = b"0123456789" * 1000
+
+
+@pytest.fixture
+def artifact_id(s3, node_id, db):
+    # No sha256 yet (e.g. still being verified): the ETag comes from S3
+    s3.put_object(Bucket=settings.S3_BUCKET, Key="artifacts/raw/report.bin", Body=DATA)
+    artifact = models.Artifact(node_id=node_id, file_path="artifacts/raw/report.bin")
+    db.add(artifact)
+    db.commit()
+    return artifact.id
+
+
+def test_hit_and_miss_send_the_same_etag(api, artifact_id):
+    miss = api.get(f"/artifacts/{artifact_id}/content")
+    hit = api.get(f"/artifacts/{artifact_id}/content")
+
+    assert miss.status_code == hit.status_code == 200
+    assert miss.content == hit.content == DATA
+    assert miss.headers["etag"] and hit.headers["etag"] == miss.headers["etag"]
+
+    revalidated = api.get(
+        f"/artifacts/{artifact_id}/content", headers={"If-None-Match": hit.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+
+def test_cached_file_answers_ranges(api, artifact_id):
+    api.get(f"/artifacts/{artifact_id}/content")  # fill the cache
+
+    partial = api.get(f"/artifacts/{artifact_id}/content", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == DATA[10:20]
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(DATA)}"
+
+    unsatisfiable = api.get(f"/artifacts/{artifact_id}/content", headers={"Range": "bytes=999999-"})
+    assert unsatisfiable.status_code == 416
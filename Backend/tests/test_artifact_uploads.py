@@ -0,0 +1,174 @@
+# ---------------------------------------------------------
+# 📦 Artifact Uploads — streamed, direct (presigned) and verified
+# ---------------------------------------------------------
+# Runs the upload routes and the verification job against moto's in-memory
+# S3, so multipart part sizes, aborts and promotions behave as on MinIO.
+import asyncio
+import hashlib
+import sys
+import types
+import pytest
+
+moto = pytest.importorskip("moto")
+
+from Backend.app import models  # noqa: E402
+from Backend.app.config import settings  # noqa: E402
+from Backend.app.orchestration.artifact_verifier import artifact_key, verify_artifact, STAGING_PREFIX  # noqa: E402
+from Backend.utils.s3_multipart import multipart_upload, MIN_PART_SIZE  # noqa: E402
+
+
+@pytest.fixture
+def verify_inline(monkeypatch):
+    """Runs the verification job in-process instead of enqueueing it on Redis."""
+    jobs = types.ModuleType("Backend.app.worker.jobs")
+
+    def enqueue_artifact_verification(artifact_id, declared_sha256=None):
+        verify_artifact(artifact_id, declared_sha256)
+        return types.SimpleNamespace(id="inline")
+
+    jobs.enqueue_artifact_verification = enqueue_artifact_verification
+    monkeypatch.setitem(sys.modules, "Backend.app.worker.jobs", jobs)
+
+
+def keys(s3, prefix: str = "artifacts/") -> list[str]:
+    listing = s3.list_objects_v2(Bucket=settings.S3_BUCKET, Prefix=prefix)
+    return [o["Key"] for o in listing.get("Contents", [])]
+
+
+def test_upload_is_content_addressed_and_deduplicated(api, s3, node_id):
+    data = b"lucid artifact bytes"
+    digest = hashlib.sha256(data).hexdigest()
+
+    first = api.post(f"/artifacts/upload?node_id={node_id}", files={"file": ("a.txt", data)})
+    second = api.post(f"/artifacts/upload?node_id={node_id}", files={"file": ("b.txt", data)})
+
+    assert first.status_code == 201 and second.status_code == 201
+    assert first.json()["sha256"] == digest and not first.json()["deduplicated"]
+    assert second.json()["deduplicated"]
+    assert keys(s3) == [artifact_key(digest)]
+
+
+def test_upload_rejects_mismatched_checksum(api, s3, node_id):
+    response = api.post(
+        f"/artifacts/upload?node_id={node_id}&sha256={'0' * 64}", files={"file": ("a.txt", b"data")}
+    )
+    assert response.status_code == 400
+    assert keys(s3) == []
+
+
+def test_upload_over_limit_is_refused_from_content_length(api, s3, node_id, monkeypatch):
+    monkeypatch.setattr(settings, "ARTIFACT_MAX_UPLOAD_BYTES", 1024)
+    response = api.post(
+        f"/artifacts/upload?node_id={node_id}", files={"file": ("big.bin", b"x" * 200_000)}
+    )
+    assert response.status_code == 413
+    assert keys(s3) == []
+
+
+def test_short_reads_still_fill_every_part(s3):
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 1000)
+    stream = iter(data[i:i + 1024 * 1024] for i in range(0, len(data), 1024 * 1024))
+
+    async def read(_n):
+        return next(stream, b"")  # never more than 1 MB, whatever is asked
+
+    result = asyncio.run(
+        multipart_upload(s3, settings.S3_BUCKET, "artifacts/short-reads", read, MIN_PART_SIZE, 2, len(data))
+    )
+    assert result["parts"] == 3
+    assert result["sha256"] == hashlib.sha256(data).hexdigest()
+    assert s3.get_object(Bucket=settings.S3_BUCKET, Key="artifacts/short-reads")["Body"].read() == data
+
+
+def _upload_parts(s3, presigned: dict, data: bytes) -> list[dict]:
+    # What a client does with the presigned part URLs
+    size = presigned["part_size"]
+    return [
+        {
+            "part_number": part["part_number"],
+            "etag": s3.upload_part(
+                Bucket=settings.S3_BUCKET,
+                Key=presigned["key"],
+                UploadId=presigned["upload_id"],
+                PartNumber=part["part_number"],
+                Body=data[(part["part_number"] - 1) * size:part["part_number"] * size],
+            )["ETag"],
+        }
+        for part in presigned["parts"]
+    ]
+
+
+def test_presigned_multipart_upload_is_verified_and_promoted(api, s3, node_id, verify_inline, db):
+    data = b"p" * (MIN_PART_SIZE + 4096)
+    digest = hashlib.sha256(data).hexdigest()
+    presigned = api.post(
+        "/artifacts/presign/upload", json={"node_id": node_id, "size_bytes": len(data)}
+    ).json()
+    assert presigned["method"] == "PUT" and len(presigned["parts"]) == 2
+
+    response = api.post("/artifacts/presign/complete", json={
+        "node_id": node_id,
+        "key": presigned["key"],
+        "upload_id": presigned["upload_id"],
+        "parts": _upload_parts(s3, presigned, data),
+        "sha256": digest,
+    })
+
+    assert response.status_code == 202
+    artifact = db.get(models.Artifact, response.json()["artifact_id"])
+    db.refresh(artifact)
+    assert artifact.file_path == artifact_key(digest) and artifact.sha256 == digest
+    assert keys(s3) == [artifact_key(digest)]
+
+
+def test_presigned_single_part_upload_uses_a_size_limited_form(api, s3, node_id, verify_inline, db):
+    data = b"small direct upload"
+    presigned = api.post(
+        "/artifacts/presign/upload", json={"node_id": node_id, "size_bytes": len(data)}
+    ).json()
+    assert presigned["method"] == "POST"
+    assert "policy" in {name.lower() for name in presigned["fields"]}
+
+    s3.put_object(Bucket=settings.S3_BUCKET, Key=presigned["key"], Body=data)  # the form POST
+    response = api.post(
+        "/artifacts/presign/complete", json={"node_id": node_id, "key": presigned["key"]}
+    )
+
+    assert response.status_code == 202
+    artifact = db.get(models.Artifact, response.json()["artifact_id"])
+    db.refresh(artifact)
+    assert artifact.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_verifier_rejects_a_mismatched_declared_checksum(api, s3, node_id, verify_inline, db):
+    data = b"tampered"
+    presigned = api.post(
+        "/artifacts/presign/upload", json={"node_id": node_id, "size_bytes": len(data)}
+    ).json()
+    s3.put_object(Bucket=settings.S3_BUCKET, Key=presigned["key"], Body=data)
+
+    response = api.post("/artifacts/presign/complete", json={
+        "node_id": node_id, "key": presigned["key"], "sha256": "0" * 64,
+    })
+
+    assert response.status_code == 202
+    db.expire_all()
+    assert db.get(models.Artifact, response.json()["artifact_id"]) is None
+    assert keys(s3) == []
+
+
+def test_oversized_multipart_upload_is_aborted_before_completion(api, s3, node_id, monkeypatch):
+    data = b"o" * (MIN_PART_SIZE + 1)
+    presigned = api.post(
+        "/artifacts/presign/upload", json={"node_id": node_id, "size_bytes": len(data)}
+    ).json()
+    parts = _upload_parts(s3, presigned, data)
+
+    monkeypatch.setattr(settings, "ARTIFACT_MAX_UPLOAD_BYTES", MIN_PART_SIZE)
+    response = api.post("/artifacts/presign/complete", json={
+        "node_id": node_id, "key": presigned["key"], "upload_id": presigned["upload_id"], "parts": parts,
+    })
+
+    assert response.status_code == 413
+    assert s3.list_multipart_uploads(Bucket=settings.S3_BUCKET).get("Uploads", []) == []
+    assert keys(s3, STAGING_PREFIX) == []
@@ -0,0 +1,165 @@
+# ---------------------------------------------------------
+# 🛡️ LLM Provider Protection — breaker, rate limit and retries
+# ---------------------------------------------------------
+# Drives the real router (Gemini → OpenAI) against a fake provider
+# transport, with the in-process breaker and token bucket (no Redis).
+import asyncio
+import time
+import httpx
+import pytest
+from Backend.app.config import settings
+from Backend.utils import llm_resilience, llm_router
+
+
+class FakeProviders:
+    """httpx transport answering for both providers from scripted status codes."""
+
+    def __init__(self):
+        self.script = {"gemini": [], "openai": []}  # pending (status, headers); then 200
+        self.calls = {"gemini": 0, "openai": 0}
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        provider = "gemini" if "generativelanguage" in request.url.host else "openai"
+        self.calls[provider] += 1
+        script = self.script[provider]
+        status, headers = script.pop(0) if script else (200, {})
+        if status != 200:
+            return httpx.Response(status, headers=headers, text=f"{provider} says {status}")
+        if provider == "gemini":
+            return httpx.Response(200, json={"candidates": [{"content": {"parts": [{"text": "from gemini"}]}}]})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "from openai"}}]})
+
+    def fail(self, provider: str, status: int, times: int = 1, headers: dict | None = None):
+        self.script[provider] += [(status, headers or {})] * times
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    fake = FakeProviders()
+    transport = httpx.MockTransport(fake.handle)
+    monkeypatch.setattr(llm_router, "_build_client", lambda provider: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(llm_router, "_clients", llm_router.weakref.WeakKeyDictionary())
+    monkeypatch.setenv("GEMINI_API_KEY", "gemini-test-key")
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "openai-test-key")
+
+    # Fresh breaker, buckets and counters; fast retries; OpenAI unlimited
+    monkeypatch.setattr(llm_resilience, "_local_breakers", {})
+    monkeypatch.setattr(llm_resilience, "_local_buckets", {})
+    monkeypatch.setattr(llm_resilience, "_stats", {})
+    monkeypatch.setattr(settings, "LLM_HEDGING_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 60.0)
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_RPS", 0)
+    monkeypatch.setattr(settings, "OPENAI_RATE_LIMIT_RPS", 0)
+    return fake
+
+
+def ask(prompt: str = "hello") -> str:
+    return asyncio.run(llm_router.acall_chat_completion(prompt, use_cache=False))["text"]
+
+
+def stats(provider: str) -> dict:
+    return llm_resilience._provider_stats(provider)
+
+
+def breaker(provider: str) -> str:
+    return asyncio.run(llm_resilience.breaker_state(provider))
+
+
+# ---------------------------------------------------------
+# 🔌 Circuit Breaker
+# ---------------------------------------------------------
+def test_retryable_errors_are_retried_before_failing_over(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 5)
+    providers.fail("gemini", 503, times=2)
+
+    assert ask() == "from gemini"
+    assert providers.calls == {"gemini": 3, "openai": 0}
+    assert stats("gemini")["retries"] == 2 and stats("gemini")["server_errors"] == 2
+    assert breaker("gemini") == "closed"  # a success clears the failures
+
+
+def test_breaker_opens_and_short_circuits_to_the_fallback(providers):
+    providers.fail("gemini", 500, times=2)
+
+    assert ask() == "from openai"
+    assert breaker("gemini") == "closed"
+    assert ask() == "from openai"
+    assert breaker("gemini") == "open"
+
+    assert ask() == "from openai"  # Gemini is not even called while open
+    assert providers.calls == {"gemini": 2, "openai": 3}
+    assert stats("gemini")["breaker_opens"] == 1
+    assert stats("gemini")["short_circuited"] == 1
+
+
+def test_half_open_probe_closes_on_success_and_reopens_on_failure(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 0.05)
+    providers.fail("gemini", 502, times=3)
+    ask(), ask()
+    assert breaker("gemini") == "open"
+
+    time.sleep(0.06)
+    assert breaker("gemini") == "half_open"
+    assert ask() == "from openai"  # the probe fails: reopened at once
+    assert breaker("gemini") == "open"
+    assert stats("gemini")["breaker_opens"] == 2
+
+    time.sleep(0.06)
+    assert ask() == "from gemini"  # the next probe succeeds
+    assert breaker("gemini") == "closed"
+    assert providers.calls["gemini"] == 4
+
+
+def test_client_errors_do_not_count_against_health(providers):
+    providers.fail("gemini", 400, times=5)
+
+    for _ in range(5):
+        assert ask() == "from openai"
+    assert breaker("gemini") == "closed"
+    assert providers.calls["gemini"] == 5
+    assert stats("gemini")["retries"] == 0 and stats("gemini")["breaker_opens"] == 0
+
+
+# ---------------------------------------------------------
+# 🪣 Rate Limiting
+# ---------------------------------------------------------
+def test_exhausted_bucket_fails_over_instead_of_waiting(providers, monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_RPS", 0.1)
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_BURST", 2)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_MAX_WAIT_SECONDS", 1.0)
+
+    assert [ask() for _ in range(3)] == ["from gemini", "from gemini", "from openai"]
+    assert providers.calls == {"gemini": 2, "openai": 1}
+    assert stats("gemini")["limiter_rejections"] == 1
+    assert breaker("gemini") == "closed"  # throttling ourselves is not a provider failure
+
+
+def test_bucket_paces_calls_within_the_allowed_wait(providers, monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_RPS", 20.0)
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_BURST", 1)
+
+    started = time.monotonic()
+    assert ask() == "from gemini" and ask() == "from gemini"
+
+    assert time.monotonic() - started >= 0.04
+    assert providers.calls["gemini"] == 2
+    assert stats("gemini")["limiter_waits"] == 1 and stats("gemini")["wait_ms_max"] >= 40
+
+
+def test_retry_after_blocks_the_bucket_before_the_retry(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "GEMINI_RATE_LIMIT_RPS", 100.0)
+    providers.fail("gemini", 429, headers={"Retry-After": "0.1"})
+
+    started = time.monotonic()
+    assert ask() == "from gemini"
+
+    assert time.monotonic() - started >= 0.1
+    assert providers.calls == {"gemini": 2, "openai": 0}
+    assert stats("gemini")["throttled_429"] == 1 and stats("gemini")["retries"] == 1
+    bucket = next(iter(llm_resilience._local_buckets.values()))
+    assert bucket[2] > 0  # blocked for every caller of this key, not just the retry
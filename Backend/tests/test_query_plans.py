@@ -0,0 +1,65 @@
+# ---------------------------------------------------------
+# 🔎 Query Plans — the hot queries must stay on their indexes
+# ---------------------------------------------------------
+# Runs EXPLAIN QUERY PLAN on the statements the routes issue and fails if
+# SQLite would answer one by scanning a table instead of using the index
+# migration 0003 (or 0002, for the closure table) created for it.
+from datetime import datetime
+from sqlalchemy import select
+from Backend.app import models
+from Backend.app.pagination import _after, encode_cursor
+from Backend.app.tree import ancestors_query, branch_nodes_query, lowest_common_ancestor_query
+
+
+def query_plan(db, statement) -> str:
+    compiled = statement.compile(dialect=db.get_bind().dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def assert_uses_index(plan: str, table: str, index: str):
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan, plan
+    assert f"SCAN {table}" not in plan, plan
+
+
+CURSOR = encode_cursor(datetime(2026, 1, 1), 42)
+
+
+def test_branch_nodes_use_branch_index(db):
+    plan = query_plan(db, branch_nodes_query(1, include_inherited=False))
+    assert_uses_index(plan, "nodes", "ix_nodes_branch_created")
+
+
+def test_inherited_branch_nodes_use_closure_index(db):
+    plan = query_plan(db, branch_nodes_query(1))
+    assert_uses_index(plan, "nodes", "ix_nodes_branch_created")
+    assert_uses_index(plan, "node_closure", "ix_node_closure_descendant_depth")
+
+
+def test_branch_keyset_page_uses_project_index(db):
+    query = select(models.Branch).where(models.Branch.project_id == 1)
+    for cursor in (None, CURSOR):
+        plan = query_plan(db, _after(query, models.Branch, cursor).limit(101))
+        assert_uses_index(plan, "branches", "ix_branches_project_created")
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+def test_artifact_keyset_page_uses_node_index(db):
+    query = select(models.Artifact).where(models.Artifact.node_id == 1)
+    for cursor in (None, CURSOR):
+        plan = query_plan(db, _after(query, models.Artifact, cursor).limit(101))
+        assert_uses_index(plan, "artifacts", "ix_artifacts_node_created")
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+def test_ancestors_use_closure_descendant_index(db):
+    plan = query_plan(db, ancestors_query(1))
+    assert_uses_index(plan, "node_closure", "ix_node_closure_descendant_depth")
+
+
+def test_lowest_common_ancestor_uses_closure_indexes(db):
+    plan = query_plan(db, lowest_common_ancestor_query(1, 2))
+    assert "ix_node_closure_descendant_depth" in plan, plan
+    # Both closure aliases are searched (descendant index / primary key), never scanned
+    assert "SCAN" not in plan, plan
@@ -0,0 +1,49 @@
+# ---------------------------------------------------------
+# 🧭 Vector Index — replacements, compaction and other processes' views
+# ---------------------------------------------------------
+import numpy as np
+from Backend.utils.vector_index import VectorIndex
+
+DIM = 8
+
+
+def unit(rng, n):
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_compaction_drops_tombstones_and_keeps_results(tmp_path):
+    rng = np.random.default_rng(0)
+    index = VectorIndex(str(tmp_path), DIM)
+    index.add(range(100), unit(rng, 100), [i % 3 for i in range(100)])
+    replacements = unit(rng, 40)
+    index.add(range(40), replacements, [i % 3 for i in range(40)])
+    assert (index.count, index.tombstones) == (140, 40)
+
+    query = replacements[7]
+    before = index.search_exact(query, 5, group=1)
+    reader = VectorIndex(str(tmp_path), DIM)  # e.g. another API worker
+
+    assert index.compact() == 40
+    assert (index.count, index.tombstones) == (100, 0)
+    assert index.search_exact(query, 5, group=1) == before
+    assert np.allclose(index.vector_of(7), replacements[7])
+
+    # The other process switches over on its next refresh
+    assert reader.search_exact(query, 5, group=1) == before
+    assert reader.count == 100
+
+
+def test_compacted_index_accepts_new_rows(tmp_path):
+    rng = np.random.default_rng(1)
+    index = VectorIndex(str(tmp_path), DIM)
+    index.add([1, 2, 3], unit(rng, 3))
+    index.add([2], unit(rng, 1))
+    index.compact()
+
+    vector = unit(rng, 1)
+    index.add([4], vector)
+    reopened = VectorIndex(str(tmp_path), DIM)
+    assert reopened.count == 4
+    assert reopened.search_exact(vector[0], 1)[0][0][0] == 4
+    assert sorted(reopened._rows()) == [1, 2, 3, 4]
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+import zlib
+from Backend.app.config import settings
+
+
+# ───────────────────────────────────────────────
+# 🧱 Content-Addressed Blob Store
+# ───────────────────────────────────────────────
+# Objects are keyed by the SHA-256 of their (uncompressed) content and stored
+# zlib-compressed, so identical outputs from re-runs and forks are kept once.
+BLOB_REF_PREFIX = "sha256:"
+
+
+def is_blob_ref(ref: str | None) -> bool:
+    return bool(ref) and ref.startswith(BLOB_REF_PREFIX)
+
+
+def _fanout(digest: str) -> str:
+    # ab/cd/abcd… keeps directory (or key prefix) sizes bounded
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+class FilesystemBlobBackend:
+    """Blobs under a local (or shared network) directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, _fanout(digest))
+
+    def exists(self, digest: str) -> bool:
+        return os.path.isfile(self._path(digest))
+
+    def read(self, digest: str) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    def write(self, digest: str, data: bytes):
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent writers never expose a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def delete(self, digest: str):
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobBackend:
+    """Blobs in the S3/MinIO bucket, shared by every worker host."""
+
+    def __init__(self, bucket: str, prefix: str = "blobs"):
+        from Backend.utils.storage import get_s3_client, ensure_bucket
+
+        self.client = get_s3_client()
+        self.bucket = ensure_bucket(bucket)
+        self.prefix = prefix
+
+    def _key(self, digest: str) -> str:
+        return f"{self.prefix}/{_fanout(digest)}"
+
+    def exists(self, digest: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(digest))
+            return True
+        except Exception:
+            return False
+
+    def read(self, digest: str) -> bytes:
+        obj = self.client.get_object(Bucket=self.bucket, Key=self._key(digest))
+        return obj["Body"].read()
+
+    def write(self, digest: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(digest), Body=data)
+
+    def delete(self, digest: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(digest))
+
+
+class BlobStore:
+    def __init__(self, backend, compression_level: int = 6):
+        self.backend = backend
+        self.compression_level = compression_level
+
+    def put(self, data: bytes) -> str:
+        """Stores `data` once and returns its reference (`sha256:<hex>`)."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.backend.exists(digest):
+            self.backend.write(digest, zlib.compress(data, self.compression_level))
+        return BLOB_REF_PREFIX + digest
+
+    def exists(self, ref: str) -> bool:
+        return self.backend.exists(ref[len(BLOB_REF_PREFIX):] if is_blob_ref(ref) else ref)
+
+    def get(self, ref: str) -> bytes:
+        digest = ref[len(BLOB_REF_PREFIX):] if is_blob_ref(ref) else ref
+        return zlib.decompress(self.backend.read(digest))
+
+    def delete(self, ref: str):
+        """Releases a blob; the caller checks that nothing references it any more."""
+        self.backend.delete(ref[len(BLOB_REF_PREFIX):] if is_blob_ref(ref) else ref)
+
+    def put_text(self, text: str) -> str:
+        return self.put(text.encode("utf-8"))
+
+    def get_text(self, ref: str) -> str:
+        return self.get(ref).decode("utf-8")
+
+
+_blob_store: BlobStore | None = None
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store selected by BLOB_BACKEND ('filesystem' or 's3')."""
+    global _blob_store
+    if _blob_store is None:
+        if settings.BLOB_BACKEND == "s3":
+            backend = S3BlobBackend(settings.S3_BUCKET)
+        else:
+            backend = FilesystemBlobBackend(settings.BLOB_ROOT)
+        _blob_store = BlobStore(backend, settings.BLOB_COMPRESSION_LEVEL)
+    return _blob_store
@@ -0,0 +1,217 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from Backend.app.config import settings
+
+
+# ───────────────────────────────────────────────
+# 💽 Size-Bounded On-Disk LRU (read-through cache of S3 objects)
+# ───────────────────────────────────────────────
+# Hot objects are kept as plain files so they can be served straight from
+# local disk. Several API workers share the directory, so nothing about its
+# contents is kept in memory: the size comes from the directory itself, the
+# LRU order from file mtimes, and evictions are serialized across processes
+# by an flock on LOCK_FILE. Callers get open file objects — a file evicted
+# (unlinked) while a response still streams it stays readable until closed.
+# A short metadata string (e.g. the origin's ETag) can be kept next to each
+# file in a META_SUFFIX sidecar, so hits answer with the same validator.
+LOCK_FILE = ".lock"
+TMP_PREFIX = ".tmp-"
+META_SUFFIX = ".meta"
+STALE_TMP_SECONDS = 3600  # leftovers of crashed downloads
+
+
+class DiskLRUCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._fill_locks: dict[str, threading.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_from_cache = 0
+        self.bytes_from_origin = 0
+
+        os.makedirs(root, exist_ok=True)
+        with self._dir_lock():
+            self._evict()
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    @contextmanager
+    def _dir_lock(self):
+        """Exclusive lock over the directory, shared by every process using it."""
+        with open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """(mtime, name, size) of every cached file, least recently used first."""
+        files, sidecars = [], []
+        now = time.time()
+        for entry in os.scandir(self.root):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name == LOCK_FILE or not entry.is_file():
+                continue
+            if entry.name.startswith(TMP_PREFIX):
+                # Another process may be mid-download: only old leftovers go
+                if now - stat.st_mtime > STALE_TMP_SECONDS:
+                    self._remove(entry.name)
+                continue
+            if entry.name.endswith(META_SUFFIX):
+                sidecars.append((entry.name, stat.st_mtime))
+                continue
+            files.append((stat.st_mtime, entry.name, stat.st_size))
+
+        names = {name for _mtime, name, _size in files}
+        for sidecar, mtime in sidecars:
+            # Left behind by a crash mid-eviction
+            if sidecar[: -len(META_SUFFIX)] not in names and now - mtime > STALE_TMP_SECONDS:
+                self._remove(sidecar)
+        return sorted(files)
+
+    def _remove(self, name: str):
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def _read_meta(self, name: str) -> str | None:
+        try:
+            with open(self._path(name + META_SUFFIX), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, name: str, meta: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=TMP_PREFIX)
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            out.write(meta)
+        os.replace(tmp_path, self._path(name + META_SUFFIX))
+
+    def open(self, key: str):
+        """
+        (open binary file, metadata) of a cached object, marked most recently
+        used — or None. Metadata is None if none was stored (or it was just evicted).
+        """
+        name = self._name(key)
+        path = self._path(name)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted just now; the open file is still complete
+        return f, self._read_meta(name)
+
+    def fill(self, key: str, download, meta: str | None = None):
+        """
+        Returns (open file, metadata) of the cached object for `key`, calling
+        `download(fileobj)` to fetch it on a miss and storing `meta` with it.
+        Concurrent misses for the same key in this process download it only once.
+        """
+        name = self._name(key)
+        with self._lock:
+            fill_lock = self._fill_locks.setdefault(name, threading.Lock())
+
+        with fill_lock:
+            cached = self.open(key)
+            if cached is not None:
+                return cached
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=TMP_PREFIX)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    download(out)
+                # Metadata first: a visible file always has its sidecar
+                if meta is not None:
+                    self._write_meta(name, meta)
+                # Opened before it becomes visible, so eviction can never take it from us
+                f = open(tmp_path, "rb")
+                os.replace(tmp_path, self._path(name))
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                with self._lock:
+                    self._fill_locks.pop(name, None)
+
+            with self._dir_lock():
+                self._evict(keep=name)
+            return f, meta
+
+    def _evict(self, keep: str | None = None):
+        # Caller holds the directory lock
+        files = self._scan()
+        total = sum(size for _mtime, _name, size in files)
+        for _mtime, name, size in files:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            self._remove(name)
+            self._remove(name + META_SUFFIX)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def record(self, hit: bool, bytes_served: int):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.bytes_from_cache += bytes_served
+            else:
+                self.misses += 1
+                self.bytes_from_origin += bytes_served
+
+    def stats(self) -> dict:
+        """Counters are this process's; entries and size are the shared directory's."""
+        files = self._scan()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes_from_cache": self.bytes_from_cache,
+                "bytes_from_origin": self.bytes_from_origin,
+                "evictions": self.evictions,
+                "entries": len(files),
+                "size_bytes": sum(size for _mtime, _name, size in files),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_artifact_cache: DiskLRUCache | None = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> DiskLRUCache:
+    """Process-wide read-through cache for artifact downloads."""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = DiskLRUCache(
+                settings.ARTIFACT_CACHE_DIR, settings.ARTIFACT_CACHE_MAX_BYTES
+            )
+        return _artifact_cache
@@ -0,0 +1,62 @@
+import hashlib
+import importlib
+import re
+from collections import Counter
+import numpy as np
+from Backend.app.config import settings
+
+
+# ───────────────────────────────────────────────
+# 🧬 Embedding Functions
+# ───────────────────────────────────────────────
+# An embedder is any callable `texts -> float32 array (n, dim)` with
+# L2-normalized rows, so cosine similarity is a plain dot product.
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline default: word unigrams + bigrams hashed into
+    `dim` signed buckets (the hashing trick), log-scaled term counts.
+    No model download and identical vectors on every host.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _bucket(self, feature: str) -> tuple[int, float]:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dim, 1.0 if value >> 63 else -1.0
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN_RE.findall((text or "").lower())
+            features = Counter(tokens)
+            features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for feature, count in features.items():
+                index, sign = self._bucket(feature)
+                out[row, index] += sign * (1.0 + np.log(count))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+_embedder = None
+
+
+def get_embedder():
+    """
+    Process-wide embedder: EMBEDDING_FUNCTION ('package.module:factory',
+    called with the dimension) or the hashing embedder by default.
+    """
+    global _embedder
+    if _embedder is None:
+        if settings.EMBEDDING_FUNCTION:
+            module_name, _, attr = settings.EMBEDDING_FUNCTION.partition(":")
+            factory = getattr(importlib.import_module(module_name), attr)
+            _embedder = factory(settings.EMBEDDING_DIM)
+        else:
+            _embedder = HashingEmbedder(settings.EMBEDDING_DIM)
+    return _embedder
@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from Backend.app.config import settings
+from Backend.utils.redis_connection import get_async_redis_connection
+
+
+# ───────────────────────────────────────────────
+# 🗝️ Cache Keys
+# ───────────────────────────────────────────────
+CACHE_PREFIX = "llm:cache:"
+LOCK_PREFIX = "llm:lock:"
+
+
+def make_cache_key(prompt: str, system: str, model: str, temperature: float) -> str:
+    """Stable digest of everything that determines a deterministic completion."""
+    material = json.dumps(
+        {"prompt": prompt, "system": system, "model": model, "temperature": temperature},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# ───────────────────────────────────────────────
+# 🧮 Tier 1 — In-Process LRU with TTL
+# ───────────────────────────────────────────────
+class LRUCache:
+    """
+    Thread-safe LRU used as the first cache tier.
+    Shared by the API loop and the router's sync bridge loop.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_memory_cache = LRUCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS)
+
+
+# ───────────────────────────────────────────────
+# 📊 Hit / Miss Counters
+# ───────────────────────────────────────────────
+_stats = {
+    "memory_hits": 0,
+    "redis_hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "bypassed": 0,
+    "stores": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats() -> dict:
+    """Snapshot of cache counters for this process (exposed via /metrics)."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["memory_hits"] + stats["redis_hits"] + stats["misses"]
+    stats["hit_ratio"] = (
+        round((stats["memory_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+    )
+    stats["memory_entries"] = len(_memory_cache)
+    stats["enabled"] = settings.LLM_CACHE_ENABLED
+    return stats
+
+
+def count_bypass():
+    _count("bypassed")
+
+
+# ───────────────────────────────────────────────
+# 🧠 Tier 2 — Shared Redis
+# ───────────────────────────────────────────────
+# Compare-and-delete so a slow leader never releases someone else's lock.
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def _redis_get(redis_conn, key: str):
+    try:
+        raw = await redis_conn.get(CACHE_PREFIX + key)
+    except Exception as e:
+        print(f"⚠️ LLM cache Redis read failed: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def _redis_set(redis_conn, key: str, value: dict):
+    encoded = json.dumps(value)
+    if len(encoded) > settings.LLM_CACHE_MAX_VALUE_BYTES:
+        return
+    try:
+        await redis_conn.set(CACHE_PREFIX + key, encoded, ex=int(settings.LLM_CACHE_TTL_SECONDS))
+    except Exception as e:
+        print(f"⚠️ LLM cache Redis write failed: {e}")
+
+
+async def _lookup(redis_conn, key: str):
+    value = _memory_cache.get(key)
+    if value is not None:
+        _count("memory_hits")
+        return value
+    if redis_conn is not None:
+        value = await _redis_get(redis_conn, key)
+        if value is not None:
+            _count("redis_hits")
+            _memory_cache.set(key, value)
+            return value
+    return None
+
+
+async def _store(redis_conn, key: str, value: dict):
+    _count("stores")
+    _memory_cache.set(key, value)
+    if redis_conn is not None:
+        await _redis_set(redis_conn, key, value)
+
+
+# ───────────────────────────────────────────────
+# 🚦 Singleflight — coalesce identical in-flight requests
+# ───────────────────────────────────────────────
+# In-process: one future per key per loop. Cross-process: a Redis lock;
+# followers poll for the leader's cached result instead of calling upstream.
+_inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+
+async def _wait_for_leader(redis_conn, key: str):
+    deadline = time.monotonic() + settings.LLM_CACHE_LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        await asyncio.sleep(settings.LLM_CACHE_POLL_INTERVAL_SECONDS)
+        value = await _redis_get(redis_conn, key)
+        if value is not None:
+            return value
+        try:
+            if not await redis_conn.exists(LOCK_PREFIX + key):
+                # Leader finished without a cacheable result (or died)
+                return None
+        except Exception:
+            return None
+    return None
+
+
+async def _fetch_once(redis_conn, key: str, fetch, cacheable):
+    if redis_conn is None:
+        result = await fetch()
+        if cacheable(result):
+            await _store(redis_conn, key, result)
+        return result
+
+    token = uuid.uuid4().hex
+    try:
+        is_leader = await redis_conn.set(
+            LOCK_PREFIX + key, token, nx=True, px=int(settings.LLM_CACHE_LOCK_TTL_SECONDS * 1000)
+        )
+    except Exception as e:
+        print(f"⚠️ LLM cache lock unavailable: {e}")
+        is_leader = True
+        token = None
+
+    if not is_leader:
+        value = await _wait_for_leader(redis_conn, key)
+        if value is not None:
+            _count("coalesced")
+            _memory_cache.set(key, value)
+            return value
+        return await fetch()
+
+    try:
+        result = await fetch()
+        if cacheable(result):
+            await _store(redis_conn, key, result)
+        return result
+    finally:
+        if token is not None:
+            try:
+                await redis_conn.eval(_RELEASE_LOCK, 1, LOCK_PREFIX + key, token)
+            except Exception:
+                pass
+
+
+async def cached_completion(key: str, fetch, cacheable):
+    """
+    Returns the cached completion for `key`, or runs `fetch()` exactly once
+    across concurrent callers and caches the result if `cacheable(result)`.
+    """
+    redis_conn = get_async_redis_connection()
+
+    value = await _lookup(redis_conn, key)
+    if value is not None:
+        return value
+
+    loop = asyncio.get_running_loop()
+    inflight = _inflight.setdefault(loop, {})
+    while True:
+        pending = inflight.get(key)
+        if pending is None:
+            break
+        try:
+            result = await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled() or asyncio.current_task().cancelling():
+                raise
+            # The leader's caller went away, not ours: retry, possibly as the new leader
+            continue
+        _count("coalesced")
+        return result
+
+    _count("misses")
+    future = loop.create_future()
+    inflight[key] = future
+    try:
+        result = await _fetch_once(redis_conn, key, fetch, cacheable)
+        future.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody else may be waiting; mark the exception as retrieved
+        future.exception()
+        raise
+    finally:
+        if inflight.get(key) is future:
+            inflight.pop(key, None)
+
+
+def clear_memory_cache():
+    _memory_cache.clear()
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from Backend.app.config import settings
+
+
+# ───────────────────────────────────────────────
+# ⏱️ Hedged Requests — cut tail latency across providers
+# ───────────────────────────────────────────────
+# If the primary provider has not answered within its recent p95 latency,
+# the same request also goes to the secondary; the first successful answer
+# wins and the other call is cancelled. A hedge is only fired when the
+# estimated cost of both calls fits the per-request cap.
+PROVIDER_COSTS = {
+    "gemini": lambda: settings.GEMINI_COST_PER_1K_TOKENS,
+    "openai": lambda: settings.OPENAI_COST_PER_1K_TOKENS,
+}
+MAX_OUTPUT_TOKENS = {"gemini": 1024, "openai": 800}  # as requested by llm_router
+CHARS_PER_TOKEN = 4
+
+_latencies: dict[str, deque] = {}
+_stats = {
+    "requests": 0,
+    "hedges_fired": 0,
+    "secondary_wins": 0,
+    "primary_wins": 0,
+    "skipped_cost_cap": 0,
+    "both_failed": 0,
+}
+_lock = threading.Lock()
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+# ───────────────────────────────────────────────
+# 📈 Adaptive Threshold (recent latency percentile per provider)
+# ───────────────────────────────────────────────
+def observe(provider: str, seconds: float):
+    """Records a call's latency (a cancelled hedge loser counts as a lower bound)."""
+    with _lock:
+        window = _latencies.get(provider)
+        if window is None or window.maxlen != settings.LLM_HEDGE_WINDOW:
+            window = _latencies[provider] = deque(window or (), maxlen=settings.LLM_HEDGE_WINDOW)
+        window.append(seconds)
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on `provider` before hedging: its recent percentile, clamped."""
+    with _lock:
+        samples = sorted(_latencies.get(provider, ()))
+    if len(samples) < settings.LLM_HEDGE_MIN_SAMPLES:
+        delay = settings.LLM_HEDGE_INITIAL_DELAY_SECONDS
+    else:
+        delay = samples[min(len(samples) - 1, int(len(samples) * settings.LLM_HEDGE_PERCENTILE))]
+    return min(settings.LLM_HEDGE_MAX_DELAY_SECONDS, max(settings.LLM_HEDGE_MIN_DELAY_SECONDS, delay))
+
+
+# ───────────────────────────────────────────────
+# 💸 Cost Estimate (prompt + full output at a blended per-1k price)
+# ───────────────────────────────────────────────
+def estimate_cost(provider: str, prompt: str) -> float:
+    tokens = len(prompt) / CHARS_PER_TOKEN + MAX_OUTPUT_TOKENS[provider]
+    return tokens / 1000 * PROVIDER_COSTS[provider]()
+
+
+# ───────────────────────────────────────────────
+# 🏁 Race
+# ───────────────────────────────────────────────
+async def race(primary: tuple, secondary: tuple, prompt: str, max_cost: float | None = None) -> dict:
+    """
+    `primary`/`secondary` are (provider, call) with `call()` → result dict,
+    raising on failure. A fast primary failure falls through to the
+    secondary as a plain failover; if both fail the last error is raised.
+    """
+    (primary_name, primary_call), (secondary_name, secondary_call) = primary, secondary
+    _count("requests")
+    started = time.monotonic()
+    delay = hedge_delay(primary_name)
+    first, second = asyncio.create_task(primary_call()), None
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            if first.exception() is None:
+                return first.result()
+            return await secondary_call()
+
+        cap = settings.LLM_HEDGE_MAX_COST_USD if max_cost is None else max_cost
+        if estimate_cost(primary_name, prompt) + estimate_cost(secondary_name, prompt) > cap:
+            _count("skipped_cost_cap")
+            try:
+                return await first
+            except Exception:
+                return await secondary_call()
+
+        _count("hedges_fired")
+        print(f"⏱️ {primary_name} slower than {delay:.1f}s — hedging with {secondary_name}.")
+        second = asyncio.create_task(secondary_call())
+        pending, error = {first, second}, None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    _count("primary_wins" if task is first else "secondary_wins")
+                    if task is second and first in pending:
+                        # Censored sample: the primary took at least this long
+                        observe(primary_name, time.monotonic() - started)
+                    return task.result()
+                error = task.exception()
+        _count("both_failed")
+        raise error
+
+    finally:
+        # The loser (or everything, if our caller was cancelled)
+        for task in (first, second):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def hedge_stats() -> dict:
+    """Hedge counters and current thresholds for this process (exposed via /metrics)."""
+    with _lock:
+        stats = dict(_stats)
+        providers = list(_latencies)
+    fired = stats["hedges_fired"]
+    stats["fire_rate"] = round(fired / stats["requests"], 4) if stats["requests"] else 0.0
+    stats["win_rate"] = round(stats["secondary_wins"] / fired, 4) if fired else 0.0
+    stats["enabled"] = settings.LLM_HEDGING_ENABLED
+    stats["delay_seconds"] = {provider: round(hedge_delay(provider), 3) for provider in providers}
+    return stats
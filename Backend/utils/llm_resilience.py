@@ -0,0 +1,442 @@
+import asyncio
+import email.utils
+import hashlib
+import random
+import threading
+import time
+import httpx
+from Backend.app.config import settings
+from Backend.utils.redis_connection import get_async_redis_connection
+
+
+# ───────────────────────────────────────────────
+# 🛡️ LLM Provider Protection
+# ───────────────────────────────────────────────
+# Every upstream call goes through call_provider():
+#   1. circuit breaker  → while a provider is unhealthy, fail over at once
+#   2. token bucket     → per provider + API key, shared through Redis by all
+#                         API processes and RQ workers
+#   3. retries          → jittered exponential backoff, honoring Retry-After
+# State lives in Redis when configured (fleet-wide), else in-process.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+RATE_LIMITS = {
+    "gemini": lambda: (settings.GEMINI_RATE_LIMIT_RPS, settings.GEMINI_RATE_LIMIT_BURST),
+    "openai": lambda: (settings.OPENAI_RATE_LIMIT_RPS, settings.OPENAI_RATE_LIMIT_BURST),
+}
+
+
+class RateLimitExceeded(Exception):
+    """The provider's bucket would make the caller wait longer than allowed."""
+
+    def __init__(self, provider: str, wait_seconds: float):
+        super().__init__(f"{provider} rate limit: next slot in {wait_seconds:.1f}s")
+        self.provider = provider
+        self.wait_seconds = wait_seconds
+
+
+class CircuitOpen(Exception):
+    def __init__(self, provider: str):
+        super().__init__(f"{provider} circuit open")
+        self.provider = provider
+
+
+def _key_id(api_key: str) -> str:
+    # API keys never reach Redis, only a short digest
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+# ───────────────────────────────────────────────
+# 📊 Per-Provider Counters (this process)
+# ───────────────────────────────────────────────
+_COUNTERS = (
+    "requests", "successes", "retries", "throttled_429", "server_errors", "timeouts",
+    "slow_calls", "limiter_waits", "limiter_rejections", "short_circuited", "breaker_opens",
+)
+_stats: dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _provider_stats(provider: str) -> dict:
+    stats = _stats.get(provider)
+    if stats is None:
+        stats = _stats[provider] = {**{name: 0 for name in _COUNTERS}, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+    return stats
+
+
+def count(provider: str, name: str, n: int = 1):
+    with _stats_lock:
+        _provider_stats(provider)[name] += n
+
+
+def _record_wait(provider: str, waited: float):
+    ms = waited * 1000
+    with _stats_lock:
+        stats = _provider_stats(provider)
+        stats["limiter_waits"] += 1
+        stats["wait_ms_total"] += ms
+        stats["wait_ms_max"] = max(stats["wait_ms_max"], ms)
+
+
+# ───────────────────────────────────────────────
+# 🪣 Token Bucket (Redis script, in-process fallback)
+# ───────────────────────────────────────────────
+# Returns 0 when a token was taken, else the milliseconds until one is free.
+# A Retry-After from the provider blocks the bucket for everyone.
+_TAKE_TOKEN = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local blocked = tonumber(redis.call('GET', KEYS[2]) or '0')
+if blocked > now then return blocked - now end
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', string.format('%d', now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+_BLOCK = """
+local t = redis.call('TIME')
+local until_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000) + tonumber(ARGV[1])
+if until_ms > tonumber(redis.call('GET', KEYS[1]) or '0') then
+    redis.call('SET', KEYS[1], string.format('%d', until_ms), 'PX', ARGV[1])
+end
+return until_ms
+"""
+
+_local_buckets: dict[str, list] = {}  # bucket key → [tokens, ts, blocked_until]
+_local_lock = threading.Lock()
+
+
+def _take_local(key: str, rate: float, burst: int) -> float:
+    with _local_lock:
+        now = time.monotonic()
+        tokens, ts, blocked = _local_buckets.setdefault(key, [float(burst), now, 0.0])
+        if blocked > now:
+            return blocked - now
+        tokens = min(burst, tokens + (now - ts) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        _local_buckets[key] = [tokens, now, blocked]
+        return wait
+
+
+async def _take(provider: str, api_key: str, rate: float, burst: int) -> float:
+    key = f"llm:rl:{provider}:{_key_id(api_key)}"
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            return int(await redis_conn.eval(_TAKE_TOKEN, 2, key, key + ":block", rate, burst)) / 1000
+        except Exception as e:
+            print(f"⚠️ LLM rate limiter Redis unavailable, limiting per process: {e}")
+    return _take_local(key, rate, burst)
+
+
+async def acquire(provider: str, api_key: str):
+    """
+    Waits for a token of the provider's bucket. Raises RateLimitExceeded
+    instead of waiting past LLM_RATE_LIMIT_MAX_WAIT_SECONDS (callers fail over).
+    """
+    rate, burst = RATE_LIMITS[provider]()
+    if rate <= 0:
+        return
+    waited = 0.0
+    while True:
+        wait = await _take(provider, api_key, rate, burst)
+        if wait <= 0:
+            if waited:
+                _record_wait(provider, waited)
+            return
+        if waited + wait > settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS:
+            count(provider, "limiter_rejections")
+            raise RateLimitExceeded(provider, wait)
+        # Jitter so callers released together do not collide on the next token
+        wait *= random.uniform(1.0, 1.2)
+        await asyncio.sleep(wait)
+        waited += wait
+        if await breaker_state(provider) == "open":
+            # Opened while we queued: fail over now rather than wait for a dead provider
+            count(provider, "short_circuited")
+            raise CircuitOpen(provider)
+
+
+async def block(provider: str, api_key: str, seconds: float):
+    """Pauses the bucket for every process (the provider sent Retry-After)."""
+    key = f"llm:rl:{provider}:{_key_id(api_key)}"
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            await redis_conn.eval(_BLOCK, 1, key + ":block", max(1, int(seconds * 1000)))
+            return
+        except Exception as e:
+            print(f"⚠️ LLM rate limiter Redis unavailable: {e}")
+    with _local_lock:
+        rate, burst = RATE_LIMITS[provider]()
+        state = _local_buckets.setdefault(key, [float(burst), time.monotonic(), 0.0])
+        state[2] = max(state[2], time.monotonic() + seconds)
+
+
+# ───────────────────────────────────────────────
+# 🔌 Circuit Breaker (closed → open → half-open probe)
+# ───────────────────────────────────────────────
+# LLM_BREAKER_FAILURE_THRESHOLD failures within the window open the circuit
+# for LLM_BREAKER_OPEN_SECONDS. Afterwards one caller probes the provider:
+# success closes the circuit, failure reopens it straight away.
+_ALLOW = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+if redis.call('EXISTS', KEYS[2]) == 0 then return 1 end
+if redis.call('SET', KEYS[3], 1, 'NX', 'PX', ARGV[1]) then return 2 end
+return 0
+"""
+
+_FAILURE = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return 0 end
+if redis.call('EXISTS', KEYS[3]) == 1 then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    redis.call('DEL', KEYS[4])
+    return 1
+end
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+if failures >= tonumber(ARGV[1]) then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[3])
+    redis.call('SET', KEYS[3], 1, 'PX', 86400000)
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+def _breaker_keys(provider: str) -> list[str]:
+    prefix = f"llm:cb:{provider}:"
+    return [prefix + "failures", prefix + "open", prefix + "trial", prefix + "probe"]
+
+
+class _LocalBreaker:
+    def __init__(self):
+        self.failures: list[float] = []
+        self.open_until = 0.0
+        self.trial = False
+        self.probe_until = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if self.open_until > now:
+                return False
+            if not self.trial:
+                return True
+            if self.probe_until <= now:
+                self.probe_until = now + settings.LLM_BREAKER_OPEN_SECONDS
+                return True
+            return False
+
+    def failure(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            if self.open_until > now:
+                return False  # late failure of a call started before the circuit opened
+            if not self.trial:
+                self.failures = [t for t in self.failures if t > now - settings.LLM_BREAKER_WINDOW_SECONDS]
+                self.failures.append(now)
+                if len(self.failures) < settings.LLM_BREAKER_FAILURE_THRESHOLD:
+                    return False
+            self.open_until = now + settings.LLM_BREAKER_OPEN_SECONDS
+            self.trial, self.failures, self.probe_until = True, [], 0.0
+            return True
+
+    def success(self):
+        with self.lock:
+            self.failures, self.trial, self.probe_until = [], False, 0.0
+
+    def state(self) -> str:
+        if self.open_until > time.monotonic():
+            return "open"
+        return "half_open" if self.trial else "closed"
+
+
+_local_breakers: dict[str, _LocalBreaker] = {}
+
+
+def _local_breaker(provider: str) -> _LocalBreaker:
+    with _local_lock:
+        return _local_breakers.setdefault(provider, _LocalBreaker())
+
+
+async def breaker_allows(provider: str) -> bool:
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            keys = _breaker_keys(provider)
+            probe_ms = int(settings.LLM_BREAKER_OPEN_SECONDS * 1000)
+            return int(await redis_conn.eval(_ALLOW, 3, keys[1], keys[2], keys[3], probe_ms)) > 0
+        except Exception as e:
+            print(f"⚠️ LLM circuit breaker Redis unavailable: {e}")
+    return _local_breaker(provider).allow()
+
+
+async def record_failure(provider: str) -> bool:
+    """Counts a failure; True if this opened (or reopened) the circuit."""
+    opened = None
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            opened = bool(await redis_conn.eval(
+                _FAILURE, 4, *_breaker_keys(provider),
+                settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                int(settings.LLM_BREAKER_WINDOW_SECONDS * 1000),
+                int(settings.LLM_BREAKER_OPEN_SECONDS * 1000),
+            ))
+        except Exception as e:
+            print(f"⚠️ LLM circuit breaker Redis unavailable: {e}")
+    if opened is None:
+        opened = _local_breaker(provider).failure()
+    if opened:
+        count(provider, "breaker_opens")
+        print(f"🔌 {provider} circuit opened for {settings.LLM_BREAKER_OPEN_SECONDS:.0f}s — failing over.")
+    return opened
+
+
+async def record_success(provider: str):
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            keys = _breaker_keys(provider)
+            await redis_conn.delete(keys[0], keys[2], keys[3])
+            return
+        except Exception as e:
+            print(f"⚠️ LLM circuit breaker Redis unavailable: {e}")
+    _local_breaker(provider).success()
+
+
+async def breaker_state(provider: str) -> str:
+    redis_conn = get_async_redis_connection()
+    if redis_conn is not None:
+        try:
+            keys = _breaker_keys(provider)
+            if await redis_conn.exists(keys[1]):
+                return "open"
+            return "half_open" if await redis_conn.exists(keys[2]) else "closed"
+        except Exception:
+            pass
+    return _local_breaker(provider).state()
+
+
+# ───────────────────────────────────────────────
+# 🔁 Backoff + Guarded Provider Call
+# ───────────────────────────────────────────────
+def parse_retry_after(value: str | None) -> float | None:
+    """Retry-After as delay-seconds or an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Full-jitter exponential backoff; a Retry-After sets the floor."""
+    cap = min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+    delay = random.uniform(0, cap)
+    if retry_after is not None:
+        delay = retry_after + random.uniform(0, settings.LLM_BACKOFF_BASE_SECONDS)
+    return delay
+
+
+async def call_provider(provider: str, api_key: str, send) -> dict:
+    """
+    Runs `send()` (→ httpx.Response) under the breaker, the rate limiter and
+    the retry policy; returns the JSON body. Raises CircuitOpen,
+    RateLimitExceeded or the last httpx error so the router can fail over.
+    Non-retryable responses (e.g. 400/401) are raised at once and do not
+    count against the provider's health.
+    """
+    if not await breaker_allows(provider):
+        count(provider, "short_circuited")
+        raise CircuitOpen(provider)
+
+    attempts = max(1, settings.LLM_RETRY_MAX_ATTEMPTS)
+    for attempt in range(attempts):
+        await acquire(provider, api_key)
+        count(provider, "requests")
+        started = time.monotonic()
+        retry_after = None
+        try:
+            response = await send()
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            if status not in RETRYABLE_STATUS:
+                raise
+            failure, reason = e, f"HTTP {status}"
+            if status == 429:
+                count(provider, "throttled_429")
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                if retry_after:
+                    await block(provider, api_key, retry_after)
+            else:
+                count(provider, "server_errors")
+        except httpx.TimeoutException as e:
+            count(provider, "timeouts")
+            failure, reason = e, "timeout"
+        except httpx.TransportError as e:
+            failure, reason = e, type(e).__name__
+        else:
+            count(provider, "successes")
+            if time.monotonic() - started > settings.LLM_BREAKER_SLOW_CALL_SECONDS:
+                # Answered, but slowly enough to count against its health
+                count(provider, "slow_calls")
+                await record_failure(provider)
+            else:
+                await record_success(provider)
+            return response.json()
+
+        if await record_failure(provider) or attempt + 1 >= attempts:
+            raise failure
+        delay = backoff_delay(attempt, retry_after)
+        if delay > settings.LLM_BACKOFF_MAX_SECONDS:
+            raise failure  # asked to wait too long: fail over instead
+        count(provider, "retries")
+        # The reason, not str(failure): Gemini request URLs carry the API key
+        print(f"🔁 {provider} attempt {attempt + 1} failed ({reason}); retrying in {delay:.2f}s")
+        await asyncio.sleep(delay)
+        if await breaker_state(provider) == "open":
+            count(provider, "short_circuited")
+            raise CircuitOpen(provider)
+
+
+async def provider_stats() -> dict:
+    """Counters, limiter wait times and breaker state per provider (exposed via /metrics)."""
+    with _stats_lock:
+        snapshot = {provider: dict(stats) for provider, stats in _stats.items()}
+    out = {}
+    for provider in RATE_LIMITS:
+        stats = snapshot.get(provider) or {**{name: 0 for name in _COUNTERS}, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+        waits = stats["limiter_waits"]
+        stats["wait_ms_avg"] = round(stats["wait_ms_total"] / waits, 2) if waits else 0.0
+        stats["wait_ms_total"] = round(stats["wait_ms_total"], 2)
+        stats["wait_ms_max"] = round(stats["wait_ms_max"], 2)
+        stats["breaker"] = await breaker_state(provider)
+        stats["rate_limit_rps"], stats["rate_limit_burst"] = RATE_LIMITS[provider]()
+        out[provider] = stats
+    return out
@@ -1,34 +1,234 @@
 import os
+import asyncio
+import time
+import threading
+import weakref
 import httpx
 import json
 from datetime import datetime
 from Backend.app.config import settings
+from Backend.utils import llm_cache, llm_hedging, llm_resilience
 
 
 # ───────────────────────────────────────────────
-# 🌐 LLM Provider API Endpoints
+# 🌐 LLM Provider API Endpoints (base URLs configurable for local fakes)
 # ───────────────────────────────────────────────
-OPENAI_CHAT_COMPLETIONS = "https://api.openai.com/v1/chat/completions"
+OPENAI_CHAT_COMPLETIONS = f"{settings.OPENAI_BASE_URL.rstrip('/')}/chat/completions"
 GEMINI_CHAT_COMPLETIONS = (
-    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent"
+    f"{settings.GEMINI_BASE_URL.rstrip('/')}/models/gemini-2.5-pro:generateContent"
 )
+GEMINI_STREAM_COMPLETIONS = (
+    f"{settings.GEMINI_BASE_URL.rstrip('/')}/models/gemini-2.5-pro:streamGenerateContent"
+)
+
+
+# ───────────────────────────────────────────────
+# 🔌 Pooled Keep-Alive HTTP Clients (one per provider, per event loop)
+# ───────────────────────────────────────────────
+# httpx.AsyncClient is bound to the loop it first runs on, so clients are
+# cached per running loop: the API loop and the sync bridge loop below each
+# get their own long-lived pool and reuse TCP/TLS connections across calls.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+PROVIDER_TIMEOUTS = {
+    "gemini": lambda: settings.GEMINI_TIMEOUT_SECONDS,
+    "openai": lambda: settings.OPENAI_TIMEOUT_SECONDS,
+}
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    read_timeout = PROVIDER_TIMEOUTS[provider]()
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(read_timeout, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+    )
+
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """
+    Returns the pooled AsyncClient for a provider on the running event loop,
+    creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    clients = _clients.setdefault(loop, {})
+    client = clients.get(provider)
+    if client is None or client.is_closed:
+        client = _build_client(provider)
+        clients[provider] = client
+    return client
+
+
+async def close_llm_clients():
+    """Closes the pooled clients owned by the running event loop (app shutdown)."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+# ───────────────────────────────────────────────
+# 🔁 Sync Bridge — one background loop for sync callers
+# ───────────────────────────────────────────────
+# Sync code (RQ jobs, planner) must not spin up a fresh loop per call,
+# otherwise the pooled clients above would be thrown away every time.
+_sync_loop: asyncio.AbstractEventLoop | None = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None or _sync_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="llm-router-loop", daemon=True
+            )
+            thread.start()
+            _sync_loop = loop
+    return _sync_loop
+
+
+def run_sync(coro):
+    """Runs a coroutine on the router's background loop and waits for the result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
 
 
 # ───────────────────────────────────────────────
 # 🧠 Main Chat Completion Router
 # ───────────────────────────────────────────────
-def call_chat_completion(
+def _is_cacheable(result: dict) -> bool:
+    # Error strings and mock output carry no (or mock) 'raw' payload
+    raw = result.get("raw")
+    return bool(raw) and raw.get("provider") != "mock"
+
+
+async def acall_chat_completion(
     prompt: str,
     system: str = "You are a helpful assistant.",
     temperature: float = 0.0,
     model: str = "gpt-4o-mini",
+    use_cache: bool = True,
+    hedge: bool | None = None,
+    max_cost: float | None = None,
 ):
     """
-    Universal LLM router for Lucid Core backend.
+    Universal async LLM router for Lucid Core backend.
 
     🔹 Priority: Gemini → OpenAI → Mock
     🔹 Normalized output schema: {'text': <string>, 'raw': <dict>}
-    🔹 Includes detailed logging for debugging
+    🔹 Reuses pooled HTTP/2 keep-alive connections per provider
+    🔹 Deterministic calls (temperature 0) are cached and coalesced;
+       pass use_cache=False to force a fresh upstream call
+    🔹 hedge=True (default: LLM_HEDGING_ENABLED) also asks OpenAI when Gemini
+       is slower than its recent p95, if both calls fit `max_cost` USD
+       (default: LLM_HEDGE_MAX_COST_USD)
+    """
+    hedge = settings.LLM_HEDGING_ENABLED if hedge is None else hedge
+    if not (use_cache and settings.LLM_CACHE_ENABLED and temperature == 0.0):
+        llm_cache.count_bypass()
+        return await _acall_providers(prompt, system, temperature, model, hedge, max_cost)
+
+    key = llm_cache.make_cache_key(prompt, system, model, temperature)
+    return await llm_cache.cached_completion(
+        key,
+        lambda: _acall_providers(prompt, system, temperature, model, hedge, max_cost),
+        _is_cacheable,
+    )
+
+
+PROVIDER_LABELS = {"gemini": "Gemini", "openai": "OpenAI"}
+
+
+def _send_gemini(prompt: str, temperature: float, gemini_key: str):
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": temperature,
+            "maxOutputTokens": 1024,
+        },
+    }
+    url = f"{GEMINI_CHAT_COMPLETIONS}?key={gemini_key}"
+    return lambda: get_async_client("gemini").post(url, json=payload)
+
+
+def _parse_gemini(j: dict) -> str:
+    # --- Gemini JSON can vary, handle both shapes safely ---
+    try:
+        return j["candidates"][0]["content"]["parts"][0]["text"]
+    except KeyError:
+        # fallback parsing (sometimes it's under 'output' or 'text')
+        return j.get("output", None) or j.get("text", "[Gemini: No text field found]")
+
+
+def _send_openai(prompt: str, system: str, temperature: float, model: str, openai_key: str):
+    headers = {"Authorization": f"Bearer {openai_key}"}
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": temperature,
+        "max_tokens": 800,
+    }
+    return lambda: get_async_client("openai").post(
+        OPENAI_CHAT_COMPLETIONS, json=payload, headers=headers
+    )
+
+
+def _parse_openai(j: dict) -> str:
+    return j["choices"][0]["message"]["content"]
+
+
+class ProviderFailed(Exception):
+    """A provider call failed; the message is the router's error string."""
+
+
+def _error_text(label: str, error: Exception) -> str:
+    """The router's error strings (no 'raw' payload) for a provider failure."""
+    if isinstance(error, httpx.TimeoutException):
+        return f"[{label} Timeout] Request took too long."
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"[{label} HTTP Error] {error.response.text[:200]}"
+    if isinstance(error, llm_resilience.CircuitOpen):
+        return f"[{label} Unavailable] Circuit open after repeated failures."
+    if isinstance(error, llm_resilience.RateLimitExceeded):
+        return f"[{label} Rate Limited] {error}"
+    return f"[{label} Exception] {str(error)}"
+
+
+async def _attempt(provider: str, api_key: str, send, parse) -> dict:
+    label = PROVIDER_LABELS[provider]
+    started = time.monotonic()
+    try:
+        j = await llm_resilience.call_provider(provider, api_key, send)
+        text = parse(j).strip()
+    except Exception as e:
+        error = _error_text(label, e)
+        print(f"❌ {error[:240]}")
+        raise ProviderFailed(error) from e
+    llm_hedging.observe(provider, time.monotonic() - started)
+    print(f"✅ {label} response received successfully.")
+    return {"text": text, "raw": j}
+
+
+async def _acall_providers(
+    prompt: str,
+    system: str,
+    temperature: float,
+    model: str,
+    hedge: bool = False,
+    max_cost: float | None = None,
+):
+    """
+    Runs the provider chain (Gemini → OpenAI → Mock) without caching.
+    Each provider is guarded by llm_resilience (breaker, shared rate limit,
+    retries); when one fails or its circuit is open the next is tried at once.
+    With `hedge`, a slow primary is raced against the secondary (llm_hedging).
     """
 
     # ──────────────── 1️⃣ Load environment keys ────────────────
@@ -40,87 +240,35 @@ def call_chat_completion(
     print(f"   ➤ Model preference → Gemini → OpenAI")
     print(f"   ➤ Prompt preview → {prompt[:120]}{'...' if len(prompt) > 120 else ''}")
 
-    # ──────────────────────────────────────────────────────────────
-    # 🟢 GEMINI 2.5 PRO PATH (Primary)
-    # ──────────────────────────────────────────────────────────────
+    # ──────────────── 2️⃣ Provider chain ────────────────
+    # 🟢 Gemini 2.5 Pro (primary) → 🟡 OpenAI GPT (fallback)
+    chain = []
     if gemini_key:
-        print("⚙️ Using Gemini 2.5 Pro as primary model.")
-        try:
-            payload = {
-                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
-                "generationConfig": {
-                    "temperature": temperature,
-                    "maxOutputTokens": 1024,
-                },
-            }
-
-            url = f"{GEMINI_CHAT_COMPLETIONS}?key={gemini_key}"
-            r = httpx.post(url, json=payload, timeout=30.0)
-            r.raise_for_status()
-            j = r.json()
-
-            # --- Gemini JSON can vary, handle both shapes safely ---
-            text = ""
-            try:
-                text = j["candidates"][0]["content"]["parts"][0]["text"]
-            except KeyError:
-                # fallback parsing (sometimes it's under 'output' or 'text')
-                text = j.get("output", None) or j.get("text", "[Gemini: No text field found]")
-
-            text = text.strip()
-            print("✅ Gemini response received successfully.")
-            return {"text": text, "raw": j}
-
-        except httpx.TimeoutException:
-            print("⏱️ Gemini request timed out after 30 seconds.")
-            return {"text": "[Gemini Timeout] Request took too long."}
-
-        except httpx.HTTPStatusError as e:
-            print(f"❌ Gemini HTTP Error → {e.response.status_code} {e.response.text[:200]}")
-            return {"text": f"[Gemini HTTP Error] {e.response.text[:200]}"}
-
-        except Exception as e:
-            print(f"❌ Gemini Parsing Error: {str(e)}")
-            # Continue to fallback
-
-    # ──────────────────────────────────────────────────────────────
-    # 🟡 OPENAI GPT PATH (Fallback)
-    # ──────────────────────────────────────────────────────────────
+        chain.append(("gemini", gemini_key, _send_gemini(prompt, temperature, gemini_key), _parse_gemini))
     if openai_key:
-        print("⚙️ Falling back to OpenAI GPT (gpt-4o-mini).")
-        try:
-            headers = {"Authorization": f"Bearer {openai_key}"}
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": temperature,
-                "max_tokens": 800,
-            }
-
-            r = httpx.post(
-                OPENAI_CHAT_COMPLETIONS, json=payload, headers=headers, timeout=30.0
-            )
-            r.raise_for_status()
-            j = r.json()
+        chain.append((
+            "openai", openai_key,
+            _send_openai(prompt, system, temperature, model, openai_key), _parse_openai,
+        ))
 
-            text = j["choices"][0]["message"]["content"].strip()
-            print("✅ OpenAI response received successfully.")
-            return {"text": text, "raw": j}
-
-        except httpx.TimeoutException:
-            print("⏱️ OpenAI request timed out.")
-            return {"text": "[OpenAI Timeout] Request took too long."}
+    calls = [(entry[0], lambda entry=entry: _attempt(*entry)) for entry in chain]
+    if hedge and len(calls) > 1:
+        try:
+            return await llm_hedging.race(calls[0], calls[1], prompt, max_cost)
+        except ProviderFailed as e:
+            return {"text": str(e)}
 
-        except httpx.HTTPStatusError as e:
-            print(f"❌ OpenAI HTTP Error → {e.response.status_code} {e.response.text[:200]}")
-            return {"text": f"[OpenAI HTTP Error] {e.response.text[:200]}"}
+    error = None
+    for provider, call in calls:
+        if error is not None:
+            print(f"⚙️ Falling back to {PROVIDER_LABELS[provider]}.")
+        try:
+            return await call()
+        except ProviderFailed as e:
+            error = str(e)
 
-        except Exception as e:
-            print(f"❌ OpenAI Error: {str(e)}")
-            return {"text": f"[OpenAI Exception] {str(e)}"}
+    if error is not None:
+        return {"text": error}
 
     # ──────────────────────────────────────────────────────────────
     # 🔴 MOCK MODE (No Keys Available)
@@ -130,3 +278,145 @@ def call_chat_completion(
         "text": f"[MOCK RESPONSE] for prompt: {prompt[:200]}",
         "raw": {"provider": "mock"},
     }
+
+
+def call_chat_completion(
+    prompt: str,
+    system: str = "You are a helpful assistant.",
+    temperature: float = 0.0,
+    model: str = "gpt-4o-mini",
+    use_cache: bool = True,
+    hedge: bool | None = None,
+    max_cost: float | None = None,
+):
+    """
+    Sync wrapper around acall_chat_completion for workers and sync routes.
+    Runs on the shared background loop so pooled connections are reused.
+    """
+    return run_sync(
+        acall_chat_completion(
+            prompt, system=system, temperature=temperature, model=model,
+            use_cache=use_cache, hedge=hedge, max_cost=max_cost,
+        )
+    )
+
+
+# ───────────────────────────────────────────────
+# 🌊 Streaming Chat Completion (token deltas as they arrive)
+# ───────────────────────────────────────────────
+async def _iter_sse_data(response: httpx.Response):
+    """Yields decoded JSON payloads from an SSE response body."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            continue
+        yield json.loads(data)
+
+
+async def _stream_gemini(prompt: str, temperature: float, gemini_key: str):
+    payload = {
+        "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+        "generationConfig": {
+            "temperature": temperature,
+            "maxOutputTokens": 1024,
+        },
+    }
+    url = f"{GEMINI_STREAM_COMPLETIONS}?alt=sse&key={gemini_key}"
+    async with get_async_client("gemini").stream("POST", url, json=payload) as r:
+        r.raise_for_status()
+        async for j in _iter_sse_data(r):
+            for candidate in j.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+
+
+async def _stream_openai(prompt: str, system: str, temperature: float, model: str, openai_key: str):
+    headers = {"Authorization": f"Bearer {openai_key}"}
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": temperature,
+        "max_tokens": 800,
+        "stream": True,
+    }
+    async with get_async_client("openai").stream(
+        "POST", OPENAI_CHAT_COMPLETIONS, json=payload, headers=headers
+    ) as r:
+        r.raise_for_status()
+        async for j in _iter_sse_data(r):
+            for choice in j.get("choices", []):
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    yield delta
+
+
+async def astream_chat_completion(
+    prompt: str,
+    system: str = "You are a helpful assistant.",
+    temperature: float = 0.0,
+    model: str = "gpt-4o-mini",
+):
+    """
+    Streams text deltas from the first available provider (Gemini → OpenAI → Mock).
+
+    Falls back to the next provider only if the current one fails before
+    emitting anything; a failure mid-stream is raised to the caller so the
+    partial output can be kept and the node marked failed.
+    """
+    gemini_key = os.getenv("GEMINI_API_KEY")
+    openai_key = settings.OPENAI_API_KEY
+
+    providers = []
+    if gemini_key:
+        providers.append(
+            ("gemini", gemini_key, lambda: _stream_gemini(prompt, temperature, gemini_key))
+        )
+    if openai_key:
+        providers.append(
+            ("openai", openai_key, lambda: _stream_openai(prompt, system, temperature, model, openai_key))
+        )
+
+    if not providers:
+        print("⚠️ No valid API keys detected — streaming mock response.")
+        for word in f"[MOCK RESPONSE] for prompt: {prompt[:200]}".split(" "):
+            yield word + " "
+        return
+
+    for idx, (provider, api_key, open_stream) in enumerate(providers):
+        name = PROVIDER_LABELS[provider]
+        last = idx == len(providers) - 1
+        emitted = False
+        try:
+            # Same protection as non-streaming calls, but no retries:
+            # the next provider is the retry
+            if not await llm_resilience.breaker_allows(provider):
+                llm_resilience.count(provider, "short_circuited")
+                raise llm_resilience.CircuitOpen(provider)
+            await llm_resilience.acquire(provider, api_key)
+            llm_resilience.count(provider, "requests")
+        except Exception as e:
+            print(f"❌ {name} skipped: {str(e)}")
+            if last:
+                raise
+            continue
+
+        try:
+            print(f"🌊 Streaming from {name}...")
+            async for delta in open_stream():
+                emitted = True
+                yield delta
+            llm_resilience.count(provider, "successes")
+            await llm_resilience.record_success(provider)
+            return
+        except Exception as e:
+            print(f"❌ {name} streaming error: {str(e)}")
+            if not emitted:
+                await llm_resilience.record_failure(provider)
+            if emitted or last:
+                raise
@@ -0,0 +1,355 @@
+import difflib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+# ───────────────────────────────────────────────
+# 📦 Git-Style Packfiles for Node Outputs
+# ───────────────────────────────────────────────
+# A pack holds every output of a project. Each object is either stored in
+# full or as a delta against another object (its parent's or a sibling's
+# output), then zlib-compressed. A JSON index maps node id → object offset
+# (and the object's ref → node id) for random access without scanning the pack.
+PACK_MAGIC = b"LPACK1\n"
+OBJ_FULL = 0
+OBJ_DELTA = 1
+
+OP_COPY = 1
+OP_INSERT = 2
+
+MAX_DELTA_DEPTH = 50        # bounds read cost of a delta chain
+SIBLING_WINDOW = 4          # earlier siblings tried as delta bases
+MIN_DELTA_SAVINGS = 0.8     # keep a delta only if ≤ 80% of the full object
+BASE_CACHE_ENTRIES = 256    # recent objects kept in memory as delta bases
+
+
+# ───────────────────────────────────────────────
+# 🔢 Varints
+# ───────────────────────────────────────────────
+def _write_varint(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, pos: int) -> tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+# ───────────────────────────────────────────────
+# 🧬 Line-Based Delta Encoding
+# ───────────────────────────────────────────────
+def make_delta(base: bytes, target: bytes) -> bytes:
+    """
+    Encodes `target` as copy/insert instructions against `base`:
+    COPY(offset, size) reuses a byte range of the base, INSERT(data) adds new bytes.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+
+    offsets = [0]
+    for line in base_lines:
+        offsets.append(offsets[-1] + len(line))
+
+    out = bytearray()
+    _write_varint(out, len(base))
+    _write_varint(out, len(target))
+
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            out.append(OP_COPY)
+            _write_varint(out, offsets[i1])
+            _write_varint(out, offsets[i2] - offsets[i1])
+        elif j2 > j1:
+            data = b"".join(target_lines[j1:j2])
+            out.append(OP_INSERT)
+            _write_varint(out, len(data))
+            out += data
+    return bytes(out)
+
+
+def apply_delta(base: bytes, delta: bytes) -> bytes:
+    base_size, pos = _read_varint(delta, 0)
+    target_size, pos = _read_varint(delta, pos)
+    if base_size != len(base):
+        raise ValueError("Delta base size mismatch")
+
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op == OP_COPY:
+            offset, pos = _read_varint(delta, pos)
+            size, pos = _read_varint(delta, pos)
+            out += base[offset:offset + size]
+        elif op == OP_INSERT:
+            size, pos = _read_varint(delta, pos)
+            out += delta[pos:pos + size]
+            pos += size
+        else:
+            raise ValueError(f"Unknown delta opcode {op}")
+
+    if len(out) != target_size:
+        raise ValueError("Delta target size mismatch")
+    return bytes(out)
+
+
+# ───────────────────────────────────────────────
+# ✍️ Pack Writer
+# ───────────────────────────────────────────────
+def write_pack(pack_dir: str, entries, compression_level: int = 6) -> dict:
+    """
+    Builds a pack + index from `entries` (an iterable of dicts with `id`,
+    `parent_id`, `data` and an optional `ref`, e.g. the content digest),
+    given in creation order so parents come before their children.
+    Entries are consumed one at a time: only the last BASE_CACHE_ENTRIES
+    objects stay in memory as delta bases, older ones are stored in full.
+    Returns stats (object counts, raw vs packed bytes, pack/index paths).
+    """
+    os.makedirs(pack_dir, exist_ok=True)
+
+    bases: OrderedDict = OrderedDict()  # node id → data, LRU
+    depth = {}
+    siblings: dict = {}
+    index = {}
+    objects = 0
+    raw_bytes = 0
+    delta_count = 0
+
+    fd, tmp_pack = tempfile.mkstemp(dir=pack_dir, prefix=".tmp-pack-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(PACK_MAGIC)
+        offset = len(PACK_MAGIC)
+
+        for entry in entries:
+            node_id, parent_id, data = entry["id"], entry.get("parent_id"), entry["data"]
+            objects += 1
+            raw_bytes += len(data)
+
+            full = zlib.compress(data, compression_level)
+            best_base, best = None, full
+
+            # Candidate bases: the parent, then the most recent siblings
+            candidates = [parent_id] if parent_id in depth else []
+            candidates += list(reversed(siblings.get(parent_id, [])))[:SIBLING_WINDOW]
+            for base_id in candidates:
+                if depth[base_id] >= MAX_DELTA_DEPTH or base_id not in bases:
+                    continue
+                bases.move_to_end(base_id)
+                packed = zlib.compress(make_delta(bases[base_id], data), compression_level)
+                if len(packed) < len(best):
+                    best_base, best = base_id, packed
+
+            if best_base is not None and len(best) > MIN_DELTA_SAVINGS * len(full):
+                best_base, best = None, full
+
+            header = bytearray([OBJ_DELTA if best_base is not None else OBJ_FULL])
+            if best_base is not None:
+                _write_varint(header, best_base)
+                delta_count += 1
+
+            f.write(header)
+            f.write(best)
+            index[str(node_id)] = [offset, len(header) + len(best), best_base, entry.get("ref")]
+            offset += len(header) + len(best)
+
+            bases[node_id] = data
+            while len(bases) > BASE_CACHE_ENTRIES:
+                bases.popitem(last=False)
+            depth[node_id] = depth[best_base] + 1 if best_base is not None else 0
+            siblings.setdefault(parent_id, []).append(node_id)
+
+    pack_name = f"pack-{objects}-{os.path.basename(tmp_pack)[len('.tmp-pack-'):]}"
+    pack_path = os.path.join(pack_dir, pack_name + ".pack")
+    idx_path = os.path.join(pack_dir, pack_name + ".idx")
+
+    fd, tmp_idx = tempfile.mkstemp(dir=pack_dir, prefix=".tmp-idx-")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"pack": pack_name + ".pack", "objects": index}, f)
+
+    # Pack first, then index: readers only ever see complete pairs
+    os.replace(tmp_pack, pack_path)
+    os.replace(tmp_idx, idx_path)
+
+    return {
+        "pack_path": pack_path,
+        "index_path": idx_path,
+        "objects": objects,
+        "deltas": delta_count,
+        "raw_bytes": raw_bytes,
+        "packed_bytes": offset,
+    }
+
+
+# ───────────────────────────────────────────────
+# 📖 Pack Reader (random access by node id)
+# ───────────────────────────────────────────────
+class PackReader:
+    def __init__(self, index_path: str, cache_size: int = 64):
+        self.index_path = index_path
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.objects = {int(k): v for k, v in index["objects"].items()}
+        self._by_ref = {v[3]: node_id for node_id, v in self.objects.items() if v[3] is not None}
+
+        pack_path = os.path.join(os.path.dirname(index_path), index["pack"])
+        self._file = open(pack_path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # Resolved objects, so sibling reads share their common delta bases
+        self._cache: OrderedDict = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()  # shared by request threads
+        self._borrowers = 0
+        self._retired = False
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self.objects
+
+    def ref(self, node_id: int):
+        """The `ref` the object was packed under (None if unknown)."""
+        return self.objects[node_id][3]
+
+    def find(self, ref: str) -> int | None:
+        """A node id whose object was packed under `ref`."""
+        return self._by_ref.get(ref)
+
+    def _raw(self, node_id: int) -> tuple[int | None, bytes]:
+        offset, length, base_id, _ref = self.objects[node_id]
+        record = self._map[offset:offset + length]
+        pos = 1
+        if record[0] == OBJ_DELTA:
+            _, pos = _read_varint(record, 1)
+        return base_id, zlib.decompress(record[pos:])
+
+    def read(self, node_id: int) -> bytes:
+        with self._lock:
+            return self._read(node_id)
+
+    def _read(self, node_id: int) -> bytes:
+        # Walk down the delta chain until a full object or a cached one…
+        chain = []
+        current = node_id
+        while current in self.objects:
+            if current in self._cache:
+                data = self._cache[current]
+                break
+            base_id, payload = self._raw(current)
+            if base_id is None:
+                data = payload
+                self._remember(current, data)
+                break
+            chain.append((current, payload))
+            current = base_id
+        else:
+            raise KeyError(node_id)
+
+        # …then apply the deltas back up to the requested object
+        for resolved_id, delta in reversed(chain):
+            data = apply_delta(data, delta)
+            self._remember(resolved_id, data)
+        return data
+
+    def _remember(self, node_id: int, data: bytes):
+        self._cache[node_id] = data
+        self._cache.move_to_end(node_id)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+_readers: dict[str, PackReader] = {}  # pack dir → reader of its latest index
+_readers_lock = threading.Lock()
+
+
+def _release(reader: PackReader):
+    # Caller holds _readers_lock; a replaced reader closes with its last borrower
+    reader._borrowers -= 1
+    if reader._retired and reader._borrowers == 0:
+        reader.close()
+
+
+@contextmanager
+def get_reader(pack_dir: str):
+    """
+    Borrows the shared reader of the newest pack in `pack_dir` (None when
+    there is no pack). After a repack the old reader is replaced and closed
+    once its last borrower is done, so its mmap and fd are never leaked.
+    """
+    index_path = latest_index(pack_dir)
+    with _readers_lock:
+        reader = _readers.get(pack_dir)
+        if index_path is None:
+            reader = None
+        elif reader is None or reader.index_path != index_path:
+            new_reader = PackReader(index_path)
+            if reader is not None:
+                reader._retired = True
+                if reader._borrowers == 0:
+                    reader.close()
+            reader = _readers[pack_dir] = new_reader
+        if reader is not None:
+            reader._borrowers += 1
+    try:
+        yield reader
+    finally:
+        if reader is not None:
+            with _readers_lock:
+                _release(reader)
+
+
+def latest_index(pack_dir: str) -> str | None:
+    """Most recently written index in a project's pack directory."""
+    if not os.path.isdir(pack_dir):
+        return None
+    latest, latest_mtime = None, None
+    for name in os.listdir(pack_dir):
+        if not name.endswith(".idx"):
+            continue
+        path = os.path.join(pack_dir, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            continue  # pruned by a concurrent repack
+        if latest_mtime is None or mtime > latest_mtime:
+            latest, latest_mtime = path, mtime
+    return latest
+
+
+def prune_packs(pack_dir: str, keep_index: str):
+    """Removes every pack/index pair except the one referenced by `keep_index`."""
+    keep = os.path.splitext(os.path.basename(keep_index))[0]
+    for name in os.listdir(pack_dir):
+        stem, ext = os.path.splitext(name)
+        if ext in (".pack", ".idx") and stem != keep:
+            os.remove(os.path.join(pack_dir, name))
+
+
+def remove_pack(index_path: str):
+    """Deletes one pack/index pair (e.g. a pack that failed verification)."""
+    stem = os.path.splitext(index_path)[0]
+    for path in (stem + ".idx", stem + ".pack"):
+        if os.path.exists(path):
+            os.remove(path)
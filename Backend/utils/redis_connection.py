@@ -1,5 +1,24 @@
+import asyncio
+import weakref
 import redis
+import redis.asyncio as aioredis
 from Backend.app.config import settings
 
 def get_redis_connection():
     return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+# Async clients are bound to the loop that created their connections,
+# so keep one per running event loop (API loop, LLM router sync loop).
+_async_connections: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = weakref.WeakKeyDictionary()
+
+def get_async_redis_connection():
+    """Returns a shared asyncio Redis client for the running loop, or None if Redis is not configured."""
+    if not settings.REDIS_URL:
+        return None
+    loop = asyncio.get_running_loop()
+    conn = _async_connections.get(loop)
+    if conn is None:
+        conn = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        _async_connections[loop] = conn
+    return conn
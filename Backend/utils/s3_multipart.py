@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+from starlette.concurrency import run_in_threadpool
+
+
+# ───────────────────────────────────────────────
+# 📤 Streaming Multipart Uploads to S3 / MinIO
+# ───────────────────────────────────────────────
+# The body is read part by part and each part is sent by a worker thread, so
+# the event loop never blocks on boto3 and memory is bounded by
+# part_size × concurrency regardless of file size. A SHA-256 of the whole
+# stream is computed on the way through.
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 minimum for every part but the last
+
+
+class UploadTooLarge(Exception):
+    """The stream exceeded the configured per-upload size limit."""
+
+
+async def object_exists(client, bucket: str, key: str) -> bool:
+    try:
+        await run_in_threadpool(client.head_object, Bucket=bucket, Key=key)
+        return True
+    except Exception:
+        return False
+
+
+async def multipart_upload(
+    client,
+    bucket: str,
+    key: str,
+    read,
+    part_size: int,
+    concurrency: int,
+    max_bytes: int,
+    content_type: str | None = None,
+) -> dict:
+    """
+    Streams `read(n)` (an async reader, e.g. UploadFile.read) to `bucket/key`.
+
+    🔹 Bodies smaller than one part go up with a single PUT
+    🔹 Larger ones use a multipart upload with up to `concurrency` parts in flight
+    🔹 Exceeding `max_bytes` (or any error) aborts the upload, so no orphaned
+       parts are left behind, and re-raises — UploadTooLarge for the limit
+
+    Returns {"sha256", "size", "parts"}.
+    """
+    part_size = max(part_size, MIN_PART_SIZE)
+    extra = {"ContentType": content_type} if content_type else {}
+    digest = hashlib.sha256()
+    size = 0
+
+    async def next_chunk() -> bytes:
+        # read() may return less than asked: keep reading until the part is
+        # full (or the stream ends), since only the last part may be < 5 MB
+        nonlocal size
+        pieces, filled = [], 0
+        while filled < part_size:
+            piece = await read(part_size - filled)
+            if not piece:
+                break
+            pieces.append(piece)
+            filled += len(piece)
+            if size + filled > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes.")
+        chunk = pieces[0] if len(pieces) == 1 else b"".join(pieces)
+        size += filled
+        # hashlib releases the GIL on large buffers
+        await run_in_threadpool(digest.update, chunk)
+        return chunk
+
+    first = await next_chunk()
+    second = await next_chunk() if len(first) == part_size else b""
+
+    # Single PUT for small bodies
+    if not second:
+        await run_in_threadpool(
+            client.put_object, Bucket=bucket, Key=key, Body=first, **extra
+        )
+        return {"sha256": digest.hexdigest(), "size": size, "parts": 1}
+
+    upload = await run_in_threadpool(
+        client.create_multipart_upload, Bucket=bucket, Key=key, **extra
+    )
+    upload_id = upload["UploadId"]
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def send(number: int, body: bytes) -> dict:
+        try:
+            response = await run_in_threadpool(
+                client.upload_part,
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=number,
+                Body=body,
+            )
+            return {"PartNumber": number, "ETag": response["ETag"]}
+        finally:
+            semaphore.release()
+
+    try:
+        number, chunk = 1, first
+        while chunk:
+            # Acquire before reading the next part: bounds buffered memory
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(send(number, chunk)))
+            number += 1
+            chunk = second if number == 2 else await next_chunk()
+
+        parts = await asyncio.gather(*tasks)
+
+        await run_in_threadpool(
+            client.complete_multipart_upload,
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda p: p["PartNumber"])},
+        )
+        return {"sha256": digest.hexdigest(), "size": size, "parts": len(parts)}
+
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await run_in_threadpool(
+            client.abort_multipart_upload, Bucket=bucket, Key=key, UploadId=upload_id
+        )
+        raise
+
+
+async def promote(client, bucket: str, source_key: str, target_key: str):
+    """Server-side copy (no bytes through this process), then drop the source."""
+    await run_in_threadpool(
+        client.copy, {"Bucket": bucket, "Key": source_key}, bucket, target_key
+    )
+    await run_in_threadpool(client.delete_object, Bucket=bucket, Key=source_key)
@@ -1,35 +1,89 @@
+import threading
 import boto3
 from botocore.client import Config
 from Backend.app.config import settings
-import io
 
-def get_s3_client():
-    return boto3.client(
-        "s3",
-        endpoint_url=settings.S3_ENDPOINT,
-        aws_access_key_id=settings.S3_ACCESS_KEY,
-        aws_secret_access_key=settings.S3_SECRET_KEY,
-        config=Config(signature_version="s3v4"),
-        region_name="us-east-1",
+
+# ───────────────────────────────────────────────
+# 🔗 Process-Wide S3 / MinIO Clients
+# ───────────────────────────────────────────────
+# boto3 clients are thread-safe and keep a pool of keep-alive connections, so
+# one client per process replaces a fresh client (and TLS handshake) per call.
+_clients: dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def _client_config() -> Config:
+    return Config(
+        signature_version="s3v4",
+        max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": settings.S3_MAX_ATTEMPTS, "mode": "standard"},
+        connect_timeout=settings.S3_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=settings.S3_READ_TIMEOUT_SECONDS,
     )
 
+
+def _client(name: str, endpoint: str | None):
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = boto3.client(
+                "s3",
+                endpoint_url=endpoint,
+                aws_access_key_id=settings.S3_ACCESS_KEY,
+                aws_secret_access_key=settings.S3_SECRET_KEY,
+                config=_client_config(),
+                region_name=settings.S3_REGION,
+            )
+        return _clients[name]
+
+
+def get_s3_client():
+    """The shared client for all S3/MinIO traffic in this process."""
+    return _client("internal", settings.S3_ENDPOINT)
+
+
+def get_presign_client():
+    """Signs URLs for clients (local computation) with the public endpoint."""
+    return _client("presign", settings.S3_PUBLIC_ENDPOINT or settings.S3_ENDPOINT)
+
+
+# ───────────────────────────────────────────────
+# 🪣 One-Time Bucket Check
+# ───────────────────────────────────────────────
+_checked_buckets: set[str] = set()
+_bucket_lock = threading.Lock()
+
+
+def ensure_bucket(bucket: str | None = None) -> str:
+    """Creates the bucket if missing — at most once per process and bucket."""
+    bucket = bucket or settings.S3_BUCKET
+    if bucket in _checked_buckets:
+        return bucket
+    with _bucket_lock:
+        if bucket not in _checked_buckets:
+            s3 = get_s3_client()
+            try:
+                s3.head_bucket(Bucket=bucket)
+            except Exception:
+                try:
+                    s3.create_bucket(Bucket=bucket)
+                except Exception:
+                    pass  # created concurrently by another process
+            _checked_buckets.add(bucket)
+    return bucket
+
+
+# ───────────────────────────────────────────────
+# 📝 Text Helpers
+# ───────────────────────────────────────────────
 def upload_text(key: str, text: str):
-    s3 = get_s3_client()
-    bucket = settings.S3_BUCKET
-    # ensure bucket exists (idempotent)
-    try:
-        s3.head_bucket(Bucket=bucket)
-    except Exception:
-        # create bucket
-        try:
-            s3.create_bucket(Bucket=bucket)
-        except Exception:
-            pass
-    s3.put_object(Bucket=bucket, Key=key, Body=text.encode("utf-8"))
+    get_s3_client().put_object(
+        Bucket=ensure_bucket(), Key=key, Body=text.encode("utf-8"),
+        ContentType="text/plain; charset=utf-8",
+    )
     return key
 
+
 def download_text(key: str):
-    s3 = get_s3_client()
-    bucket = settings.S3_BUCKET
-    obj = s3.get_object(Bucket=bucket, Key=key)
+    obj = get_s3_client().get_object(Bucket=settings.S3_BUCKET, Key=key)
     return obj["Body"].read().decode("utf-8")
@@ -0,0 +1,347 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+
+# ───────────────────────────────────────────────
+# 🧭 Memory-Mapped Vector Index (cosine top-k)
+# ───────────────────────────────────────────────
+# Layout of an index directory:
+#   meta.json     dim / count / capacity / tombstones (+ nlist when IVF is trained)
+#   vectors.f32   (capacity, dim) float32 rows, L2-normalized
+#   ids.i64       node id per row (-1 = tombstone of a replaced vector)
+#   groups.i64    project id per row, for scoped searches
+#   lists.i32     IVF list per row, centroids.npy — only once trained
+# Files grow in place (truncate + remap), so appends never copy the matrix
+# and readers in other processes keep working on their existing mapping.
+# Appends are not msync'ed: the mapping is shared, so other processes see the
+# rows through the page cache, and the kernel writes them back on its own
+# (after a host crash, similarity.rebuild_vector_index restores the index).
+# compact() drops tombstones by writing the live rows to the files of a new
+# generation (vectors.<n>.f32, …) that meta.json switches to atomically.
+GROWTH_FACTOR = 2
+MIN_CAPACITY = 1024
+IVF_TAIL_ROWS = 20_000  # rows added since the posting lists were built, scanned exactly
+
+
+class VectorIndex:
+    def __init__(self, root: str, dim: int, block_rows: int = 131072):
+        self.root = root
+        self.dim = dim
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._meta_mtime = None
+        self._row_of: dict | None = None
+        self._postings = None
+        os.makedirs(root, exist_ok=True)
+        self._open()
+
+    # ── files ────────────────────────────────────
+    def _file(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _data_file(self, name: str, generation: int | None = None) -> str:
+        # Generation 0 keeps the original names
+        generation = self.meta.get("generation", 0) if generation is None else generation
+        if not generation:
+            return self._file(name)
+        stem, ext = os.path.splitext(name)
+        return self._file(f"{stem}.{generation}{ext}")
+
+    def _read_meta(self) -> dict:
+        path = self._file("meta.json")
+        if not os.path.exists(path):
+            return {"dim": self.dim, "count": 0, "capacity": 0, "nlist": 0}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self):
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-meta-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._file("meta.json"))
+        self._meta_mtime = os.stat(self._file("meta.json")).st_mtime_ns
+
+    def _map(self, name: str, dtype, shape):
+        path = self._data_file(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not os.path.exists(path) or os.path.getsize(path) < size:
+            with open(path, "ab") as f:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _open(self):
+        previous = getattr(self, "meta", {})
+        previous_layout = (previous.get("ivf_version"), previous.get("generation"))
+        # Stat before reading: a change in between is picked up by the next refresh()
+        path = self._file("meta.json")
+        self._meta_mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        self.meta = self._read_meta()
+        if self.meta["dim"] != self.dim:
+            raise ValueError(f"Index at {self.root} has dim {self.meta['dim']}, expected {self.dim}")
+        capacity = max(self.meta["capacity"], MIN_CAPACITY)
+        self.meta["capacity"] = capacity
+        self.vectors = self._map("vectors.f32", np.float32, (capacity, self.dim))
+        self.ids = self._map("ids.i64", np.int64, (capacity,))
+        self.groups = self._map("groups.i64", np.int64, (capacity,))
+        self.lists = self._map("lists.i32", np.int32, (capacity,)) if self.meta.get("nlist") else None
+        self.centroids = np.load(self._file("centroids.npy")) if self.meta.get("nlist") else None
+        self._row_of = None
+        # Posting lists stay valid across appends: only a retrain or a compaction replaces them
+        if (self.meta.get("ivf_version"), self.meta.get("generation")) != previous_layout:
+            self._postings = None
+
+    def refresh(self):
+        """Picks up rows appended by other processes."""
+        path = self._file("meta.json")
+        mtime = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+        if mtime != self._meta_mtime:
+            self._open()
+
+    @contextmanager
+    def _writer(self):
+        # One writer at a time across API processes and RQ workers
+        with self._lock, open(self._file("index.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def tombstones(self) -> int:
+        return self.meta.get("tombstones", 0)
+
+    # ── writes ───────────────────────────────────
+    def _ensure_capacity(self, needed: int):
+        capacity = self.meta["capacity"]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= GROWTH_FACTOR
+        self.meta["capacity"] = capacity
+        self.vectors = self._map("vectors.f32", np.float32, (capacity, self.dim))
+        self.ids = self._map("ids.i64", np.int64, (capacity,))
+        self.groups = self._map("groups.i64", np.int64, (capacity,))
+        if self.lists is not None:
+            self.lists = self._map("lists.i32", np.int32, (capacity,))
+
+    def add(self, ids, vectors: np.ndarray, groups=None):
+        """Appends (or replaces) vectors for `ids`; replaced rows become tombstones."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        groups = np.zeros(len(ids), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+
+        with self._writer():
+            row_of = self._rows()
+            replaced = 0
+            for node_id in ids.tolist():
+                old = row_of.pop(node_id, None)
+                if old is not None:
+                    self.ids[old] = -1
+                    replaced += 1
+
+            start = self.count
+            end = start + len(ids)
+            self._ensure_capacity(end)
+            self.vectors[start:end] = vectors
+            self.groups[start:end] = groups
+            if self.lists is not None:
+                self.lists[start:end] = np.argmax(vectors @ self.centroids.T, axis=1)
+            # ids last: a row only becomes visible once its vector is written
+            self.ids[start:end] = ids
+            for offset, node_id in enumerate(ids.tolist()):
+                row_of[node_id] = start + offset
+
+            self.meta["count"] = end
+            self.meta["tombstones"] = self.tombstones + replaced
+            self._write_meta()
+
+    def compact(self) -> int:
+        """
+        Drops tombstoned rows. Live rows are copied (in order) to the files of
+        a new generation, flushed, and switched to by rewriting meta.json —
+        readers keep their current mapping until they refresh. Returns the
+        number of rows removed.
+        """
+        with self._writer():
+            count = self.count
+            live = np.flatnonzero(np.asarray(self.ids[:count]) >= 0)
+            removed = count - len(live)
+            if removed == 0:
+                return 0
+
+            old_generation = self.meta.get("generation", 0)
+            generation = old_generation + 1
+            capacity = self.meta["capacity"]
+            columns = [
+                ("vectors.f32", np.float32, (capacity, self.dim), self.vectors),
+                ("ids.i64", np.int64, (capacity,), self.ids),
+                ("groups.i64", np.int64, (capacity,), self.groups),
+            ]
+            if self.lists is not None:
+                columns.append(("lists.i32", np.int32, (capacity,), self.lists))
+
+            for name, dtype, shape, source in columns:
+                target = np.memmap(self._data_file(name, generation), dtype=dtype, mode="w+", shape=shape)
+                for start in range(0, len(live), self.block_rows):
+                    rows = live[start:start + self.block_rows]
+                    target[start:start + len(rows)] = source[rows]
+                target.flush()
+                del target
+
+            self.meta.update(count=len(live), tombstones=0, generation=generation)
+            self._write_meta()
+            self._open()
+            for name, *_ in columns:
+                path = self._data_file(name, old_generation)
+                if os.path.exists(path):
+                    os.remove(path)  # open mappings elsewhere stay valid
+            return removed
+
+    def _rows(self) -> dict:
+        if self._row_of is None:
+            live = self.ids[: self.count]
+            self._row_of = {int(i): r for r, i in enumerate(live.tolist()) if i >= 0}
+        return self._row_of
+
+    def vector_of(self, node_id: int) -> np.ndarray | None:
+        self.refresh()
+        row = self._rows().get(node_id)
+        return None if row is None else np.array(self.vectors[row])
+
+    # ── exact search ─────────────────────────────
+    def _mask(self, start: int, end: int, group) -> np.ndarray:
+        invalid = self.ids[start:end] < 0
+        if group is not None:
+            invalid |= self.groups[start:end] != group
+        return invalid
+
+    @staticmethod
+    def _merge(best_s, best_r, scores, rows, k):
+        # scores/rows: (q, m) candidates → keep the k best per query
+        all_s = np.concatenate([best_s, scores], axis=1)
+        all_r = np.concatenate([best_r, rows], axis=1)
+        if all_s.shape[1] > k:
+            top = np.argpartition(-all_s, k - 1, axis=1)[:, :k]
+            all_s = np.take_along_axis(all_s, top, axis=1)
+            all_r = np.take_along_axis(all_r, top, axis=1)
+        return all_s, all_r
+
+    def search_exact(self, queries: np.ndarray, k: int, group=None):
+        """Brute-force cosine top-k, one matrix product per block of rows."""
+        self.refresh()
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        q = len(queries)
+        best_s = np.full((q, 0), -np.inf, dtype=np.float32)
+        best_r = np.zeros((q, 0), dtype=np.int64)
+
+        for start in range(0, self.count, self.block_rows):
+            end = min(start + self.block_rows, self.count)
+            scores = queries @ self.vectors[start:end].T  # (q, block)
+            scores[:, self._mask(start, end, group)] = -np.inf
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                block_s = np.take_along_axis(scores, top, axis=1)
+            else:
+                top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+                block_s = scores
+            best_s, best_r = self._merge(best_s, best_r, block_s, top + start, k)
+
+        return self._results(best_s, best_r)
+
+    def _results(self, best_s, best_r) -> list[list[tuple[int, float]]]:
+        results = []
+        for scores, rows in zip(best_s, best_r):
+            order = np.argsort(-scores)
+            results.append([
+                (int(self.ids[rows[i]]), float(scores[i]))
+                for i in order
+                if np.isfinite(scores[i])
+            ])
+        return results
+
+    # ── IVF (approximate) search ─────────────────
+    def train_ivf(self, nlist: int, sample_size: int = 100_000, iterations: int = 10, seed: int = 0):
+        """
+        Spherical k-means over a sample → `nlist` centroids; every row is
+        assigned to its nearest centroid. New rows are assigned on add().
+        """
+        with self._writer():
+            rng = np.random.default_rng(seed)
+            count = self.count
+            sample = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+            data = np.asarray(self.vectors[sample])
+            centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+
+            for _ in range(iterations):
+                assign = np.argmax(data @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, data)
+                empty = ~sums.any(axis=1)
+                sums[empty] = data[rng.choice(len(data), size=int(empty.sum()))]
+                centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+
+            np.save(self._file("centroids.npy"), centroids.astype(np.float32))
+            self.centroids = centroids.astype(np.float32)
+            self.lists = self._map("lists.i32", np.int32, (self.meta["capacity"],))
+            for start in range(0, count, self.block_rows):
+                end = min(start + self.block_rows, count)
+                self.lists[start:end] = np.argmax(self.vectors[start:end] @ self.centroids.T, axis=1)
+            self.lists.flush()
+
+            self.meta["nlist"] = nlist
+            self.meta["ivf_version"] = self.meta.get("ivf_version", 0) + 1
+            self._write_meta()
+            self._postings = None
+
+    def _posting_lists(self):
+        # Rebuilt only when too many rows were appended since the last build
+        if self._postings is None or self.count - self._postings[2] > IVF_TAIL_ROWS:
+            built = self.count
+            assign = np.asarray(self.lists[:built])
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(assign[order], np.arange(self.meta["nlist"] + 1))
+            self._postings = (order, bounds, built)
+        return self._postings
+
+    def search(self, queries: np.ndarray, k: int, group=None, nprobe: int = 16):
+        """Top-k via IVF when trained (probing `nprobe` lists), exact otherwise."""
+        self.refresh()
+        if not self.meta.get("nlist"):
+            return self.search_exact(queries, k, group)
+
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        order, bounds, built = self._posting_lists()
+        tail = np.arange(built, self.count)
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :nprobe]
+
+        best_s = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_r = np.zeros((len(queries), k), dtype=np.int64)
+        for qi, probe in enumerate(probes):
+            rows = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe] + [tail])
+            if len(rows) == 0:
+                continue
+            rows.sort()  # sequential page access on the memmap
+            scores = self.vectors[rows] @ queries[qi]
+            invalid = self.ids[rows] < 0
+            if group is not None:
+                invalid |= self.groups[rows] != group
+            scores[invalid] = -np.inf
+            if len(rows) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(rows))
+            best_s[qi, : len(top)] = scores[top]
+            best_r[qi, : len(top)] = rows[top]
+
+        return self._results(best_s, best_r)